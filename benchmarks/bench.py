@@ -0,0 +1,188 @@
+"""
+Измерение производительности на подмене ISS без сети.
+
+Запуск:
+    python benchmarks/bench.py [--quick] [--output results.json] [--baseline previous.json]
+
+Для каждого замера выводится число обработанных записей, лучшее время из нескольких прогонов, записей в секунду и
+пиковая память по `tracemalloc`. С `--baseline` замеры сравниваются с предыдущими результатами, и при замедлении
+больше допустимого код возврата ненулевой.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tracemalloc
+import typing as t
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+
+from moexsrc._candles import normalize_candle, resample_candle
+from moexsrc.assets import Asset
+from moexsrc.issclient import ISSClient
+from moexsrc.session import Session
+from moexsrc.tickers import Ticker
+from moexsrc.types import Period
+from moexsrc.utils import puffup, rollup
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests"))  # подмена ISS живет рядом с тестами
+from replay import CANDLE_COLUMNS, SHARES, ReplayTransport
+
+BEGIN = date(2026, 1, 12)
+
+Bench = Callable[[], Awaitable[int]]
+
+
+def candle_rows(days: int) -> list[dict[str, t.Any]]:
+    begin, end = datetime.combine(BEGIN, time.min), datetime.combine(BEGIN + timedelta(days=days - 1), time.max)
+    return [dict(zip(CANDLE_COLUMNS, row)) for row in ReplayTransport().candle_rows("MOEX", 1, begin, end)]
+
+
+def make_benches(days: int, latency: float) -> dict[str, Bench]:
+    end = BEGIN + timedelta(days=days - 1)
+    path = "engines/stock/markets/shares/boards/TQBR/securities/MOEX/candles"
+    params = {"interval": 1, "from": BEGIN.isoformat(), "till": end.isoformat()}
+    rows = candle_rows(days)
+    candles = [normalize_candle(**row, secid="MOEX", period=Period.ONE_MINUTE) for row in rows]
+
+    async def iss_request() -> int:
+        client = ISSClient(None, idle_timeout=0, transport=ReplayTransport(latency=latency))
+        return len(await rollup(client.request(path, "candles", **params)))
+
+    async def iss_request_pages() -> int:
+        client = ISSClient(None, idle_timeout=0, transport=ReplayTransport(latency=latency))
+        return sum(page.nrows for page in await rollup(client.request_pages(path, "candles", **params)))
+
+    async def normalize() -> int:
+        return len([normalize_candle(**row, secid="MOEX", period=Period.ONE_MINUTE) for row in rows])
+
+    async def resample() -> int:
+        await rollup(resample_candle(puffup(candles), "15min"))
+        return len(candles)
+
+    async def ticker_candles(compact: bool = False) -> int:
+        with Session(idle_timeout=0, transport=ReplayTransport(latency=latency)) as ctx:
+            return len(await rollup(Ticker(ctx, "MOEX").candles("1min", begin=BEGIN, end=end, compact=compact)))
+
+    async def asset_futoi(compact: bool = False) -> int:
+        with Session(idle_timeout=0, transport=ReplayTransport(latency=latency)) as ctx:
+            return len(await rollup(Asset(ctx, "SILV").futoi(begin=BEGIN, end=end, compact=compact)))
+
+    async def latest_candles() -> int:
+        # Последние 500 пятиминутных свечей всех акций подмены, как на панели мониторинга
+        with Session(idle_timeout=0, transport=ReplayTransport(latency=latency)) as ctx:
+            tickers = [Ticker(ctx, secid) for secid in SHARES]
+            results = await asyncio.gather(*(rollup(ticker.candles("5min", latest=500)) for ticker in tickers))
+            return sum(map(len, results))
+
+    benches = dict(
+        iss_request=iss_request,
+        iss_request_pages=iss_request_pages,
+        normalize_candle=normalize,
+        resample_candle=resample,
+        ticker_candles=ticker_candles,
+        ticker_candles_compact=partial(ticker_candles, compact=True),
+        asset_futoi=asset_futoi,
+        asset_futoi_compact=partial(asset_futoi, compact=True),
+        latest_candles=latest_candles,
+    )
+    try:
+        from moexsrc.dataframes import dataframe, frame
+    except ImportError:
+        pass
+    else:
+
+        async def to_dataframe() -> int:
+            return len(await dataframe(puffup(candles)))
+
+        async def ticker_dataframe() -> int:
+            with Session(idle_timeout=0, transport=ReplayTransport(latency=latency)) as ctx:
+                return len(await dataframe(Ticker(ctx, "MOEX").candles("1min", begin=BEGIN, end=end)))
+
+        async def to_frame() -> int:
+            with Session(idle_timeout=0, transport=ReplayTransport(latency=latency)) as ctx:
+                return len(await frame(Ticker(ctx, "MOEX").candle_batches("1min", begin=BEGIN, end=end)))
+
+        benches["dataframe"] = to_dataframe
+        benches["ticker_dataframe"] = ticker_dataframe
+        benches["frame"] = to_frame
+    return benches
+
+
+def measure(name: str, bench: Bench, repeat: int) -> dict[str, t.Any]:
+    seconds = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        started = perf_counter()
+        rows = asyncio.run(bench())
+        seconds = min(seconds, perf_counter() - started)
+    tracemalloc.start()
+    try:
+        asyncio.run(bench())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(name=name, rows=rows, seconds=round(seconds, 6), rows_per_sec=round(rows / seconds), peak_bytes=peak)
+
+
+def compare(results: list[dict[str, t.Any]], baseline: dict[str, t.Any], tolerance: float) -> list[str]:
+    previous = dict((item["name"], item) for item in baseline["results"])
+    regressions = list()
+    for item in results:
+        if (before := previous.get(item["name"])) is None:
+            continue
+        speed = item["rows_per_sec"] / before["rows_per_sec"]
+        memory = item["peak_bytes"] / max(1, before["peak_bytes"])
+        item["speed_ratio"], item["memory_ratio"] = round(speed, 3), round(memory, 3)
+        if speed < 1 - tolerance or memory > 1 + tolerance:
+            regressions.append(f"{item['name']}: speed x{speed:.2f}, memory x{memory:.2f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=20, help="Сколько дней данных обрабатывается")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа подмены ISS в секундах")
+    parser.add_argument("--repeat", type=int, default=3, help="Сколько раз повторяется каждый замер")
+    parser.add_argument("--quick", action="store_true", help="Быстрый прогон: 3 дня, один повтор")
+    parser.add_argument("--only", nargs="*", help="Выполнить только перечисленные замеры")
+    parser.add_argument("--output", help="Файл для результатов, по умолчанию stdout")
+    parser.add_argument("--baseline", help="Результаты с которыми сравнить")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимое ухудшение, доля")
+    args = parser.parse_args()
+    if args.quick:
+        args.days, args.repeat = 3, 1
+
+    benches = make_benches(args.days, args.latency)
+    results = [
+        measure(name, bench, args.repeat) for name, bench in benches.items() if not args.only or name in args.only
+    ]
+    report: dict[str, t.Any] = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        days=args.days,
+        latency=args.latency,
+        results=results,
+    )
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["regressions"] = compare(results, json.load(file), args.tolerance)
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import moexsrc.assets
 import moexsrc.markets
+import moexsrc.scheduler
 import moexsrc.tickers
 import moexsrc.session
 
@@ -17,3 +18,8 @@ class Market(moexsrc.markets.Market):
 class Ticker(moexsrc.tickers.Ticker):
     def __init__(self, symbol: str):
         super().__init__(moexsrc.session.ctx, symbol)
+
+
+class Scheduler(moexsrc.scheduler.Scheduler):
+    def __init__(self, *, lag: float = 1.0):
+        super().__init__(moexsrc.session.ctx, lag=lag)
@@ -0,0 +1,16 @@
+import argparse
+import sys
+
+from moexsrc import export
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m moexsrc", description="Данные Московской биржи из ISS.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export.add_parser(commands)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
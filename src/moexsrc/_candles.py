@@ -1,44 +1,45 @@
 import typing as t
-from collections.abc import AsyncIterable, AsyncIterator
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from datetime import datetime, date, timedelta
 
-from moexsrc.types import Candle, Period
-from moexsrc.utils import to_datetime
+from moexsrc.types import Block, Candle, Period, Timeframe
+from moexsrc.utils import chunked, puffup, rollup
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_MIN_ROWS = 64  # c меньшим числом строк быстрее обойтись без NumPy
+CANDLE_VALUES = dict(open=float, high=float, low=float, close=float, volume=int)  # "value" округляется отдельно
+
+
+def candle_columns(columns: Iterable[str] | None) -> list[str] | None:
+    """Колонки свечей для запроса к ISS: `begin`, `end` и значения `columns`, или `None` для всех колонок."""
+    if columns is None:
+        return None
+    columns = list(columns)
+    if unknown := [column for column in columns if column not in CANDLE_VALUES and column != "value"]:
+        raise ValueError(f"Unknown candle columns: {', '.join(unknown)}")
+    return ["begin", "end", *columns]
 
 
 def normalize_candle(**data: t.Any) -> Candle:
-    """Нормализует данные свечи."""
+    """Нормализует данные свечи, значения не полученные от ISS (см. `columns` у `Ticker.candles`) пропускаются."""
     match data:
-        case {
-            "begin": begin,
-            "end": end,
-            "open": open,
-            "high": high,
-            "low": low,
-            "close": close,
-            "volume": volume,
-            **kwargs,
-        }:
+        case {"begin": begin, "end": end, **kwargs}:
+            values = dict((key, convert(kwargs.pop(key))) for key, convert in CANDLE_VALUES.items() if key in kwargs)
             if "value" in kwargs:
                 kwargs["value"] = float(round(kwargs["value"], 0))
             begin = datetime.fromisoformat(begin) if isinstance(begin, str) else begin
             end = datetime.fromisoformat(end) if isinstance(end, str) else end
             minutes = kwargs["period"].minutes
-            if minutes not in (1, 5, 10, 60):
+            if minutes is None or minutes >= 24 * 60:
                 begin = begin.date()
                 end = end.date()
             else:
                 end = (begin + timedelta(minutes=minutes)) - timedelta(seconds=1)
-            return Candle(
-                open=float(open),
-                high=float(high),
-                low=float(low),
-                close=float(close),
-                volume=int(volume),
-                begin=begin,
-                end=end,
-                **kwargs,
-            )
+            return Candle(**values, begin=begin, end=end, **kwargs)
         case _:
             raise ValueError(f"Invalid candle data: {data}")
 
@@ -49,61 +50,133 @@ async def normalize_candles(aiter_: AsyncIterable[dict[str, t.Any]], **extra) ->
         yield normalize_candle(**item, **extra)
 
 
-async def resample_candle(
-    aiter_: AsyncIterable[Candle], period: Period, begin: date | datetime, end: date | datetime
+async def latest_candles(
+    aiter_: AsyncIterable[Candle], period: Period | Timeframe, count: int
 ) -> AsyncIterator[Candle]:
-    """Ресемлирует данные свечного графика."""
-    extra = dict()
-    minutes = period.minutes
-    if minutes is None:
-        raise ValueError("This is dataset cannot be resampled")
-
-    def range_it(begin: date, end: date):
-        begin = to_datetime(begin)
-        end_max = to_datetime(end, "end")
-        end = begin + timedelta(minutes=minutes) - timedelta(microseconds=1)
-        while end < end_max:
-            yield begin, end
-            begin += timedelta(minutes=minutes)
-            end = (begin + timedelta(minutes=minutes)) - timedelta(microseconds=1)
-
-    def make_candle(accum: list[dict[str, t.Any]], begin: datetime, end: datetime) -> Candle:
-        if len(extra) == 0:
-            extra.update(
-                (
-                    (k, v)
-                    for k, v in accum[0].items()
-                    if k not in ("begin", "end", "open", "high", "low", "close", "volume", "value", "period")
-                ),
-                period=period,
-            )
-        accum.sort(key=lambda x: x["begin"])
-        candle = normalize_candle(
-            begin=begin,
-            end=end,
-            open=accum[0]["open"],
-            high=max(item["high"] for item in accum),
-            low=min(item["high"] for item in accum),
-            close=accum[-1]["close"],
-            volume=sum(item["volume"] for item in accum),
-            value=sum(item["value"] for item in accum),
-            **extra,
-        )
-        accum.clear()
-        return candle
-
-    accum = list()
-    range = range_it(begin, end)
-    begin, end = next(range)
+    """
+    Последние `count` свечей периода `period` от поздних к ранним, из свечей идущих от поздних к ранним.
+
+    Источник читается только до первой свечи, не попадающей в последние `count` свечей периода.
+    """
+    timeframe = Timeframe.parse(period)
+    items, groups, start = list(), 0, None
     async for item in aiter_:
-        begin_item = item["begin"]
-        try:
-            while end < begin_item:
-                if accum:
-                    yield make_candle(accum, begin, end)
-                begin, end = next(range)
-            accum.append(item)
-        except StopIteration:
-            break
-    if accum:
-        yield make_candle(accum, begin, end)
+        if start is None or item["begin"] < start:
+            if groups == count:
+                break
+            groups += 1
+            start = timeframe.bounds(item["begin"])[0]
+        items.append(item)
+    candles = await rollup(resample_candle(puffup(reversed(items)), period))
+    for item in reversed(candles):
+        yield item
+
+
+async def resample_candle(aiter_: AsyncIterable[Candle], period: Period | Timeframe) -> AsyncIterator[Candle]:
+    """Ресемлирует упорядоченные по времени данные свечного графика."""
+    async for block in resample_blocks((Block.from_records(chunk) async for chunk in chunked(aiter_, 500)), period):
+        for item in block.records():
+            yield item
+
+
+def normalize_block(block: Block, **extra: t.Any) -> Block:
+    """Нормализует блок свечей, аналог `normalize_candle` для `Block`."""
+    size = block.nrows
+    minutes = extra["period"].minutes
+    begin = block["begin"]
+    if size and isinstance(begin[0], str):
+        begin = list(map(datetime.fromisoformat, begin))
+    if minutes is not None and minutes < 24 * 60:
+        tail = timedelta(minutes=minutes) - timedelta(seconds=1)
+        end = [item + tail for item in begin]
+    else:
+        end = block["end"]
+        if size and isinstance(end[0], str):
+            end = list(map(datetime.fromisoformat, end))
+        begin = [item.date() for item in begin]
+        end = [item.date() for item in end]
+    result = Block((key, list(map(convert, block[key]))) for key, convert in CANDLE_VALUES.items() if key in block)
+    result["begin"], result["end"] = begin, end
+    if "value" in block:
+        result["value"] = [float(round(item, 0)) for item in block["value"]]
+    for key, value in extra.items():
+        result[key] = [value] * size
+    return result
+
+
+def group_bounds(
+    timeframe: Timeframe, begin: list[date | datetime]
+) -> tuple[list[int], list[tuple[date | datetime, date | datetime]]]:
+    """Индексы начал групп свечей одной свечи периода `timeframe` и границы этих свечей, за один проход."""
+    starts, bounds = list(), list()
+    end = None
+    for index, item in enumerate(begin):
+        if end is None or item > end:
+            bounds.append(timeframe.bounds(item))
+            end = bounds[-1][1]
+            starts.append(index)
+    return starts, bounds
+
+
+def aggregate(block: Block, starts: list[int], stop: int) -> dict[str, list[t.Any]]:
+    """Сворачивает строки блока [starts[N], starts[N + 1]) в свечи, последняя группа заканчивается на `stop`."""
+    edges = list(zip(starts, starts[1:] + [stop]))
+    result = dict()
+    if "open" in block:
+        result["open"] = [block["open"][a] for a, _ in edges]
+    if "close" in block:
+        result["close"] = [block["close"][b - 1] for _, b in edges]
+    reducers = (("high", max, "maximum"), ("low", min, "minimum"), ("volume", sum, "add"), ("value", sum, "add"))
+    if np is not None and stop >= NUMPY_MIN_ROWS:
+        index = np.asarray(starts)
+        for column, _, ufunc in reducers:
+            if column in block:
+                result[column] = getattr(np, ufunc).reduceat(np.asarray(block[column][:stop]), index).tolist()
+    else:
+        for column, reducer, _ in reducers:
+            if column in block:
+                result[column] = [reducer(block[column][a:b]) for a, b in edges]
+    return result
+
+
+async def resample_blocks(aiter_: AsyncIterable[Block], period: Period | Timeframe) -> AsyncIterator[Block]:
+    """
+    Ресемлирует упорядоченные по времени блоки свечей в свечи произвольного периода.
+
+    Проход линейный по числу исходных свечей, пустые промежутки (ночи, выходные) не перебираются. Незавершенная
+    свеча переносится в следующий блок.
+    """
+    timeframe = Timeframe.parse(period)
+    period = timeframe.period
+    extra: dict[str, t.Any] | None = None
+    carry: Block | None = None
+
+    def make_block(columns: dict[str, list[t.Any]], bounds: list[tuple[t.Any, t.Any]]) -> Block:
+        size = len(bounds)
+        result = Block((column, columns[column]) for column in ("open", "high", "low", "close") if column in columns)
+        if "volume" in columns:
+            result["volume"] = [int(item) for item in columns["volume"]]
+        result["begin"] = [begin for begin, _ in bounds]
+        result["end"] = [end for _, end in bounds]
+        if "value" in columns:
+            result["value"] = [float(round(item, 0)) for item in columns["value"]]
+        for key, value in dict(extra, period=period).items():
+            result[key] = [value] * size
+        return result
+
+    async for block in aiter_:
+        if not block.nrows:
+            continue
+        if extra is None:
+            skip = ("begin", "end", "open", "high", "low", "close", "volume", "value", "period")
+            extra = dict((k, v[0]) for k, v in block.items() if k not in skip)
+        columns = [c for c in ("begin", "open", "high", "low", "close", "volume", "value") if c in block]
+        if carry is not None:
+            block = Block((column, carry[column] + block[column]) for column in columns)
+        starts, bounds = group_bounds(timeframe, block["begin"])
+        carry = Block((column, block[column][starts[-1] :]) for column in columns)
+        if len(starts) > 1:
+            yield make_block(aggregate(block, starts[:-1], starts[-1]), bounds[:-1])
+    if carry is not None:
+        starts, bounds = group_bounds(timeframe, carry["begin"])
+        yield make_block(aggregate(carry, starts, carry.nrows), bounds)
@@ -1,52 +1,135 @@
 import asyncio
-import json
-from datetime import datetime, date, time
 import typing as t
+from collections.abc import Collection, Iterable, Iterator
+from datetime import datetime, date, time, timedelta
 
-import httpx
+from moexsrc.issclient import ISSClient
 from moexsrc.types import FutOI
+from moexsrc.utils import rollup
 
+DAILY_FUTOI_URL = "https://www.moex.com/api/contract/OpenOptionService"
+FUTOI_ROWS_LIMIT = 1000  # Ответ ISS FutOI с таким числом строк считается обрезанным
+FUTOI_MAX_DAYS = 31
+FUTOI_DAY_ROWS = 180  # 5-минутных записей одной группы клиентов за торговый день
+FUTOI_KEYS = ("tradedate", "tradetime", "ticker", "clgroup")  # колонки ISS, запрашиваемые всегда
+FUTOI_VALUES = (
+    "pos",
+    "pos_long",
+    "pos_long_num",
+    "pos_short",
+    "pos_short_num",
+    "seqnum",
+    "sess_id",
+    "session_date",
+    "systime",
+)
 
-def normalize_futoi(**data: t.Any) -> FutOI:
-    """Нормализует данные FutOI."""
+
+def futoi_columns(columns: Iterable[str] | None) -> list[str] | None:
+    """Колонки FutOI для запроса к ISS: ключевые и значения `columns`, или `None` для всех колонок."""
+    if columns is None:
+        return None
+    columns = list(columns)
+    if unknown := [column for column in columns if column not in FUTOI_VALUES]:
+        raise ValueError(f"Unknown FutOI columns: {', '.join(unknown)}")
+    return [*FUTOI_KEYS, *("trade_session_date" if column == "session_date" else column for column in columns)]
+
+
+def normalize_futoi(columns: Collection[str] | None = None, **data: t.Any) -> FutOI:
+    """Нормализует данные FutOI, с `columns` из значений в записи остаются только перечисленные."""
     match data:
         case {
             "assetcode": assetcode,
             "clgroup": clgroup,
-            "pos": pos,
-            "pos_long": pos_long,
-            "pos_long_num": pos_long_num,
-            "pos_short": pos_short,
-            "pos_short_num": pos_short_num,
-            "systime": systime,
             "ticker": ticker,
             "tradedate": tradedate,
             "tradetime": tradetime,
             "period": period,
-            **other,  # "seqnum", "sess_id", "trade_session_date",
+            **other,  # "seqnum", "sess_id", "trade_session_date", "pos", ...
         }:
-            return FutOI(
+            result = FutOI(
                 sectype=ticker,
                 clgroup=clgroup.upper(),
-                pos=float(pos or 0),
-                pos_long=float(pos_long or 0),
-                pos_long_num=int(pos_long_num or 0),
-                pos_short=float(pos_short or 0),
-                pos_short_num=int(pos_short_num or 0),
+                pos=float(other.get("pos") or 0),
+                pos_long=float(other.get("pos_long") or 0),
+                pos_long_num=int(other.get("pos_long_num") or 0),
+                pos_short=float(other.get("pos_short") or 0),
+                pos_short_num=int(other.get("pos_short_num") or 0),
                 tradetime=datetime.combine(date.fromisoformat(tradedate), time.fromisoformat(tradetime)),
                 period=period,
                 assetcode=assetcode,
                 seqnum=other.get("seqnum", 0),
                 sess_id=other.get("sess_id", 0),
                 session_date=date.fromisoformat(other.get("trade_session_date", tradedate) or tradedate),
-                systime=datetime.fromisoformat(systime),
+                systime=datetime.fromisoformat(systime) if (systime := other.get("systime")) else None,
             )
+            if columns is not None:
+                return FutOI((key, value) for key, value in result.items() if key not in FUTOI_VALUES or key in columns)
+            return result
         case _:
             raise ValueError("Wrong FutOI data")
 
 
-async def daily_futoi(symbol: str, *dates: date):
-    """Дневные данные FUTOI с сайта."""
+class FutOIWindows:
+    """
+    Окна дат для запросов FutOI к ISS. Размер очередного окна подбирается по числу строк на день в уже
+    полученных ответах, так чтобы ответ на окно не превышал `FUTOI_ROWS_LIMIT`.
+
+    Args:
+        begin: Первая дата.
+        end: Последняя дата.
+        reverse: Выдавать окна от последней даты к первой.
+        days: Размер первого окна в днях.
+    """
+
+    def __init__(self, begin: date, end: date, reverse: bool = False, days: int = 2):
+        self._begin = begin
+        self._end = end
+        self._reverse = reverse
+        self._days = days
+        self._density = 0.0
+
+    def __iter__(self) -> Iterator[tuple[date, date]]:
+        begin, end = self._begin, self._end
+        while begin <= end:
+            days = timedelta(days=self._days - 1)
+            if self._reverse:
+                yield max(begin, end - days), end
+                end -= days + timedelta(days=1)
+            else:
+                yield begin, min(begin + days, end)
+                begin += days + timedelta(days=1)
+
+    def feedback(self, days: int, rows: int) -> None:
+        """Учитывает что окно в `days` дней вернуло `rows` строк."""
+        # Размер считается по самому плотному окну, чтобы окна с выходными не приводили к обрезанным ответам
+        self._density = max(self._density, rows / days)
+        if self._density:
+            days = int(FUTOI_ROWS_LIMIT * 0.9 / self._density)
+        else:
+            days = self._days * 2
+        self._days = max(1, min(FUTOI_MAX_DAYS, days))
+
+
+async def iss_futoi(
+    client: ISSClient, path: str, begin: date, end: date, columns: list[str] | None = None
+) -> list[dict[str, t.Any]]:
+    """Строки FutOI ISS за даты [begin, end], ответ который мог быть обрезан запрашивается заново по частям."""
+    params = {"from": begin.isoformat(), "till": end.isoformat()}
+    items = await rollup(client.request(path, "futoi", columns=columns, start=-1, **params))
+    if len(items) >= FUTOI_ROWS_LIMIT and begin < end:
+        middle = begin + (end - begin) // 2
+        # ISS выдает строки от поздних к ранним
+        later, earlier = await asyncio.gather(
+            iss_futoi(client, path, middle + timedelta(days=1), end, columns),
+            iss_futoi(client, path, begin, middle, columns),
+        )
+        return later + earlier
+    return items
+
+
+async def daily_futoi(client: ISSClient, symbol: str, date_: date) -> list[dict[str, t.Any]]:
+    """Дневные данные FUTOI с сайта moex.com за дату `date_`."""
 
     def to_int(value):
         return int(float(value.replace(",", ".").replace("\xa0", "")))
@@ -82,28 +165,6 @@ async def daily_futoi(symbol: str, *dates: date):
             ),
         ]
 
-    e = None
-    timeout = 1.0
     line_types = ["contracts", "daily_change", "pct_change", "clients"]
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        for date_ in dates:
-            cnt = 3
-            path = f"https://www.moex.com/api/contract/OpenOptionService/{date_.isoformat()}/F/{symbol}/json"
-            while cnt:
-                cnt -= 1
-                try:
-                    resp = await client.get(path, timeout=timeout)
-                    break
-                except httpx.HTTPStatusError:
-                    await asyncio.sleep(timeout)
-                    timeout += timeout
-            else:
-                raise e
-            if resp.is_success:
-                if resp.headers.get("content-type", "").startswith("application/json"):
-                    if data := json.loads(resp.text):
-                        for item in convert_data(dict((line_types[N], data[N]) for N in range(len(data)))):
-                            yield item
-                        continue
-                resp.status_code = 400
-            resp.raise_for_status()
+    data = await client.get_json(f"{DAILY_FUTOI_URL}/{date_.isoformat()}/F/{symbol}/json")
+    return convert_data(dict((line_types[N], data[N]) for N in range(len(data))))
@@ -0,0 +1,124 @@
+import codecs
+import json
+import typing as t
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = " \t\n\r"
+
+
+class StreamParser:
+    """
+    Инкрементальный разбор JSON ответа ISS вида `{"<секция>": {"columns": [...], "data": [[...], ...]}, ...}`.
+
+    Строки секции `data` разбираются по мере поступления байтов ответа, так что в памяти одновременно не
+    оказываются ни все байты ответа, ни его полное строковое представление. Результат совпадает с `json.loads`.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buf = ""
+        self._pos = 0
+        self._state = "top"
+        self._result: dict[str, t.Any] = dict()
+        self._section: dict[str, t.Any] | None = None
+        self._key: str | None = None
+        self._rows: list[t.Any] | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        """Принимает очередную порцию байтов ответа."""
+        self._buf = self._buf[self._pos :] + self._text.decode(chunk)
+        self._pos = 0
+        self._parse()
+
+    def close(self) -> dict[str, t.Any]:
+        """Завершает разбор и возвращает результат."""
+        self._buf = self._buf[self._pos :] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._parse()
+        if self._state != "done":
+            raise ValueError("Incomplete JSON document")
+        return self._result
+
+    def _skip(self, chars: str = WHITESPACE) -> str | None:
+        # Пропускает символы `chars`, возвращает следующий символ или None если данные кончились
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in chars:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _value(self) -> tuple[bool, t.Any]:
+        # Значение считается полным только если за ним что-то следует, иначе число могло быть обрезано
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        if end >= len(self._buf):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _parse(self) -> None:
+        while True:
+            match self._state:
+                case "top":
+                    if (char := self._skip()) is None:
+                        return
+                    if char != "{":
+                        raise ValueError("Unexpected JSON document")
+                    self._pos += 1
+                    self._state = "top_key"
+                case "top_key" | "key":
+                    if (char := self._skip(WHITESPACE + ",")) is None:
+                        return
+                    if char == "}":
+                        self._pos += 1
+                        self._state = "done" if self._state == "top_key" else "top_key"
+                        continue
+                    done, key = self._value()
+                    if not done:
+                        return
+                    self._key = key
+                    self._state = f"{self._state}_value"
+                case "top_key_value":
+                    if (char := self._skip(WHITESPACE + ":")) is None:
+                        return
+                    if char == "{":
+                        self._pos += 1
+                        self._section = self._result[self._key] = dict()
+                        self._state = "key"
+                    else:
+                        done, value = self._value()
+                        if not done:
+                            return
+                        self._result[self._key] = value
+                        self._state = "top_key"
+                case "key_value":
+                    if (char := self._skip(WHITESPACE + ":")) is None:
+                        return
+                    if char == "[" and self._key == "data":
+                        self._pos += 1
+                        self._rows = self._section["data"] = list()
+                        self._state = "rows"
+                    else:
+                        done, value = self._value()
+                        if not done:
+                            return
+                        self._section[self._key] = value
+                        self._state = "key"
+                case "rows":
+                    if (char := self._skip(WHITESPACE + ",")) is None:
+                        return
+                    if char == "]":
+                        self._pos += 1
+                        self._state = "key"
+                        continue
+                    done, row = self._value()
+                    if not done:
+                        return
+                    self._rows.append(row)
+                case "done":
+                    if self._skip() is not None:
+                        raise ValueError("Extra data after JSON document")
+                    return
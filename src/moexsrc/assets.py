@@ -1,15 +1,17 @@
 import typing as t
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Iterable
 
 from moexsrc.session import SessionCtx
 from moexsrc.tickers import Ticker
 from moexsrc.types import TickerFilter
 from datetime import date, datetime, timedelta
+from functools import partial
 
-from moexsrc._futoi import normalize_futoi, daily_futoi
-from moexsrc.resolver import resolve_path, NO_SECTYPE
-from moexsrc.types import Period, FutOI
-from moexsrc.utils import to_date, limited, rollup, puffup, date_pair_gen
+from moexsrc._futoi import normalize_futoi, daily_futoi, iss_futoi, futoi_columns, FutOIWindows
+from moexsrc._futoi import FUTOI_DAY_ROWS, FUTOI_ROWS_LIMIT
+from moexsrc.resolver import resolve_path, get_board, bind, NO_SECTYPE
+from moexsrc.types import Period, FutOI, FutOIRecord
+from moexsrc.utils import to_date, limited, date_pair_gen, gather_ordered
 
 
 class Asset:
@@ -19,7 +21,6 @@ class Asset:
 
     def __init__(self, ctx: SessionCtx, assetcode: str):
         self._desc = dict(assetcode=assetcode)
-        self._tickers = list()
         self._ctx = ctx
 
     def __repr__(self) -> str:
@@ -38,22 +39,18 @@ class Asset:
         return self._get_tickers(**filter)
 
     async def _get_tickers(self, **filter: t.Unpack[TickerFilter]) -> AsyncIterator[Ticker]:
-        filter = dict(is_traded=1, **filter, assetcode=self._desc["assetcode"])
-        if "is_traded" in filter and filter["is_traded"] and self._tickers:
-            for ticker in self._tickers:
-                yield ticker
-        else:
-            self._tickers.clear()
-            path = "engines/futures/markets/forts/securities.json"
-            async for short in self._ctx.client.request(path, "securities", start=-1):
-                short = dict([(k.lower(), v) for k, v in short.items()], is_traded=1)
-                if all(short.get(k) == v for k, v in filter.items()):
-                    ticker = Ticker(self._ctx, short["secid"])
-                    ticker._desc.update(short)
-                    self._tickers.append(ticker)
-                    yield ticker
-        symbol = self._tickers[0].symbol
-        self._desc.update(sectype=(symbol if symbol in NO_SECTYPE else symbol[:2]))
+        # Списки инструментов доски не содержат признака торгуемости, все они считаются торгуемыми
+        if not filter.pop("is_traded", True):
+            return
+        board = await get_board(self._ctx, "futures", "forts", "RFUD")
+        rows = board.find(**filter, assetcode=self._desc["assetcode"])
+        if rows:
+            symbol = rows[0]["secid"]
+            self._desc.update(sectype=(symbol if symbol in NO_SECTYPE else symbol[:2]))
+        for row in rows:
+            ticker = Ticker(self._ctx, row["secid"])
+            bind(ticker, row)
+            yield ticker
         # ToDo: Переделать на 'statistics/engines/futures/markets/forts/series', что бы получать также is_traded=False
 
     async def futoi(
@@ -64,6 +61,9 @@ class Asset:
         begin: str | date | datetime | None = None,
         end: str | date | datetime | None = None,
         latest: int | None = None,
+        concurrency: int = 8,
+        compact: bool = False,
+        columns: Iterable[str] | None = None,
     ) -> AsyncIterator[FutOI]:
         """
         Данные FutOI по заданным параметрам
@@ -72,8 +72,17 @@ class Asset:
             period: Период свечи, по умолчанию "5min"
             begin: Начиная с какого времени выдать данные
             end: По какое времени выдать данные
-            latest: Включает вывод последних 1 <= N <= 12 записей отсортированных в обратном порядке
+            latest: Включает вывод последних N записей отсортированных в обратном порядке, окна дат запрашиваются от
+                    поздних к ранним, пока не наберется N записей
+            concurrency: Сколько запросов выполняется одновременно.
+            compact: Выдавать компактные записи `FutOIRecord` вместо словарей
+            columns: Какие значения ("pos", "pos_long", "systime" и т.п.) запрашивать у ISS, по умолчанию все;
+                     дневные данные приходят целиком и сокращаются после загрузки.
         """
+        columns = None if columns is None else tuple(columns)
+        request_columns = futoi_columns(columns)
+        if compact and columns is not None:
+            raise ValueError("Compact records require all FutOI columns")
         path = await resolve_path(self._ctx, self, "futoi")
         if path is None:
             raise NotImplementedError("FutOI not implemented for this ticker")
@@ -85,36 +94,55 @@ class Asset:
             begin = to_date(begin)
             end = to_date(end)
         else:
-            if not (1 <= latest <= 12):
-                raise ValueError("Value for latest must be between 1 and 12")
+            if latest < 1:
+                raise ValueError("Value for latest must be positive")
+            # Начало лишь ограничивает перебор окон: они запрашиваются лениво, пока не наберутся записи
+            per_day = FUTOI_DAY_ROWS if period is Period.FIVE_MINUTES else 1
             end = date.today()
-            begin = end - timedelta(days=10)
+            begin = end - timedelta(days=14 + -(-latest // per_day) * 7 // 5)
+            # Заранее запрашивается не больше окон, чем должно понадобиться, и одно следующее
+            if period is Period.FIVE_MINUTES:
+                concurrency = min(concurrency, 2 + latest * 2 // FUTOI_ROWS_LIMIT)
+            else:
+                concurrency = min(concurrency, latest + 1)
 
+        client = self._ctx.client
         if period is Period.ONE_DAY:
             # Дневные метрики скачиваются с ендпоитов наполняющих сайт moex.com
             if latest is None:
                 dates = list(d for d, _ in date_pair_gen(begin, end, 1))
             else:
                 dates = list(reversed(list(d for d, _ in date_pair_gen(begin, end, 1))))
-            aiter = daily_futoi(self.symbol, *dates)
+            factories = (partial(daily_futoi, client, self.symbol, date_) for date_ in dates)
         else:
-            # Пагинация для ISS FutOI, одним запросом скачиваю два дня
-            if latest is None:
-                date_pairs = date_pair_gen(begin, end)
-            else:
-                date_pairs = reversed(list(date_pair_gen(begin, end)))
+            # Окна дат запрашиваются одновременно, ISS выдает строки окна от поздних к ранним
+            windows = FutOIWindows(begin, end, reverse=latest is not None)
 
-            async def aiter_():
-                for begin_, end_ in date_pairs:
-                    params = {"from": begin_.isoformat(), "till": end_.isoformat()}
-                    items = await rollup(self._ctx.client.request(path, "futoi", **params, start=-1))
-                    async for item in puffup(reversed(items)):
-                        yield item
+            async def fetch(begin_: date, end_: date) -> list[dict[str, t.Any]]:
+                items = await iss_futoi(client, path, begin_, end_, request_columns)
+                windows.feedback((end_ - begin_).days + 1, len(items))
+                return items if latest is not None else items[::-1]
 
-            aiter = aiter_()
+            factories = (partial(fetch, begin_, end_) for begin_, end_ in windows)
 
+        async def aiter_():
+            async for items in gather_ordered(factories, concurrency):
+                for item in items:
+                    yield item
+
+        pipeline = client.instrument.pipeline("futoi", assetcode=self.symbol, period=period.literal)
+        aiter = pipeline.stage(aiter_(), "fetch")
         if latest:
             aiter = limited(aiter, latest * 2)
         extra = dict(**dict((k, v) for k, v in self._desc.items() if k in ("assetcode",)), ticker=ticker, period=period)
-        async for item in aiter:
-            yield normalize_futoi(**dict(item, **extra))
+
+        columns = None if columns is None else frozenset(columns)
+
+        async def normalized():
+            series = dict()
+            async for item in aiter:
+                item = normalize_futoi(columns, **dict(item, **extra))
+                yield FutOIRecord.from_mapping(item, series) if compact else item
+
+        async for item in pipeline.stage(normalized(), "normalize"):
+            yield item
@@ -0,0 +1,123 @@
+"""
+Блокирующий фасад: корутины и асинхронные итераторы moexsrc выполняются в фоновом цикле событий отдельного потока.
+
+Подходит для пулов потоков, воркеров Dask и multiprocessing: вызывающий поток блокируется только на ожидании
+результата, так что анализ уже загруженных данных идет параллельно загрузке следующих. Объекты `Ticker`, `Asset`
+и т.п. создаются в воркере, между процессами передаются только их коды:
+
+    def load(secid):
+        return blocking.collect(Ticker(blocking.ctx(), secid).candles("5min", latest=500))
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(load, secids))
+"""
+
+import asyncio
+import os
+import threading
+import typing as t
+from collections.abc import AsyncIterable, Coroutine, Iterator
+from concurrent.futures import Future
+
+import moexsrc.session
+from moexsrc.session import SessionCtx
+from moexsrc.utils import chunked, rollup
+
+
+class BackgroundLoop:
+    """
+    Цикл событий в отдельном потоке-демоне. Запускается при первом обращении, и заново в дочернем процессе после
+    `fork`, где поток родителя не существует.
+
+    Args:
+        name: Имя потока цикла событий.
+    """
+
+    def __init__(self, name: str = "moexsrc"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий, запускается при первом обращении."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed() or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self._name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit[T](self, coro: Coroutine[t.Any, t.Any, T]) -> Future[T]:
+        """Запускает корутину в фоновом цикле, возвращает `concurrent.futures.Future` ее результата."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run[T](self, coro: Coroutine[t.Any, t.Any, T], timeout: float | None = None) -> T:
+        """Выполняет корутину в фоновом цикле и дожидается результата."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Cannot block inside the background loop, await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def ctx(self) -> SessionCtx:
+        """Контекст `moexsrc.session.ctx` с клиентом фонового цикла."""
+
+        async def context() -> SessionCtx:
+            return moexsrc.session.ctx
+
+        return self.run(context())
+
+    def collect[T](self, aiter: AsyncIterable[T], timeout: float | None = None) -> list[T]:
+        """Собирает все элементы асинхронного итератора в список."""
+        return self.run(rollup(aiter), timeout)
+
+    def iterate[T](self, aiter: AsyncIterable[T], size: int = 500) -> Iterator[T]:
+        """Выдает элементы асинхронного итератора по мере получения, переходя в фоновый цикл за `size` элементами."""
+        chunks = chunked(aiter, size)
+
+        async def step() -> list[T] | None:
+            return await anext(chunks, None)
+
+        try:
+            while (chunk := self.run(step())) is not None:
+                yield from chunk
+        finally:
+            if self._loop is not None and not self._loop.is_closed() and self._pid == os.getpid():
+                self.run(chunks.aclose())
+
+    def close(self) -> None:
+        """Закрывает клиент `ctx` фонового цикла и останавливает цикл."""
+        with self._lock:
+            loop, thread, self._loop = self._loop, self._thread, None
+        if loop is None or loop.is_closed() or self._pid != os.getpid():
+            return
+        asyncio.run_coroutine_threadsafe(moexsrc.session.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+_default = BackgroundLoop()
+
+
+def ctx() -> SessionCtx:
+    """Контекст `moexsrc.session.ctx` с клиентом общего фонового цикла."""
+    return _default.ctx()
+
+
+def run[T](coro: Coroutine[t.Any, t.Any, T], timeout: float | None = None) -> T:
+    """Выполняет корутину в общем фоновом цикле и дожидается результата."""
+    return _default.run(coro, timeout)
+
+
+def collect[T](aiter: AsyncIterable[T], timeout: float | None = None) -> list[T]:
+    """Собирает все элементы асинхронного итератора в список в общем фоновом цикле."""
+    return _default.collect(aiter, timeout)
+
+
+def iterate[T](aiter: AsyncIterable[T], size: int = 500) -> Iterator[T]:
+    """Выдает элементы асинхронного итератора, выполняемого в общем фоновом цикле, по мере получения."""
+    return _default.iterate(aiter, size)
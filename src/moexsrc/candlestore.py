@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import typing as t
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timedelta
+
+from moexsrc.types import MSK
+from moexsrc.utils import to_date, to_datetime
+
+if t.TYPE_CHECKING:
+    from moexsrc.issclient import ISSClient
+
+COLUMNS = ("begin", "end", "open", "close", "high", "low", "value", "volume")
+
+INTERVALS = (1, 10, 60, 24)  # недельные и месячные свечи не кэшируются, последняя из них всегда не закрыта
+
+
+class CandleStore:
+    """
+    Локальное хранилище свечей ISS.
+
+    Хранит свечи по ключу (secid, boardid, interval) и помнит какие торговые дни уже загружены. Загруженные закрытые
+    дни считаются неизменными и повторно не запрашиваются, текущий (московский) день всегда запрашивается заново.
+    """
+
+    def __init__(self, path: str | os.PathLike = ":memory:"):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS candles ("
+                " secid TEXT, boardid TEXT, interval INTEGER,"
+                " begin TEXT, end TEXT, open REAL, close REAL, high REAL, low REAL, value REAL, volume REAL,"
+                " PRIMARY KEY (secid, boardid, interval, begin)) WITHOUT ROWID"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS coverage (secid TEXT, boardid TEXT, interval INTEGER, first TEXT, last TEXT)"
+            )
+
+    def close(self) -> None:
+        """Закрывает хранилище."""
+        self._db.close()
+
+    def coverage(self, secid: str, boardid: str, interval: int) -> list[tuple[date, date]]:
+        """Возвращает отсортированный список загруженных интервалов дней."""
+        cursor = self._db.execute(
+            "SELECT first, last FROM coverage WHERE secid=? AND boardid=? AND interval=? ORDER BY first",
+            (secid, boardid, interval),
+        )
+        return [(date.fromisoformat(first), date.fromisoformat(last)) for first, last in cursor]
+
+    def missing(self, secid: str, boardid: str, interval: int, begin: date, end: date) -> list[tuple[date, date]]:
+        """Возвращает интервалы дней из [begin, end] которых нет в хранилище."""
+        result = list()
+        for first, last in self.coverage(secid, boardid, interval):
+            if last < begin:
+                continue
+            if first > end:
+                break
+            if first > begin:
+                result.append((begin, first - timedelta(days=1)))
+            begin = last + timedelta(days=1)
+        if begin <= end:
+            result.append((begin, end))
+        return result
+
+    def put(
+        self,
+        secid: str,
+        boardid: str,
+        interval: int,
+        rows: list[dict[str, t.Any]],
+        covered: tuple[date, date] | None = None,
+    ) -> None:
+        """
+        Сохраняет свечи.
+
+        Args:
+            secid: Код инструмента.
+            boardid: Торговая площадка.
+            interval: Интервал свечей ISS.
+            rows: Свечи в представлении ISS.
+            covered: Интервал дней который эти свечи полностью покрывают, или `None`.
+        """
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((secid, boardid, interval, *(row.get(column) for column in COLUMNS)) for row in rows),
+            )
+            if covered is not None:
+                intervals = sorted([*self.coverage(secid, boardid, interval), covered])
+                merged = [intervals[0]]
+                for first, last in intervals[1:]:
+                    if first <= merged[-1][1] + timedelta(days=1):
+                        merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+                    else:
+                        merged.append((first, last))
+                self._db.execute(
+                    "DELETE FROM coverage WHERE secid=? AND boardid=? AND interval=?", (secid, boardid, interval)
+                )
+                self._db.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?, ?)",
+                    ((secid, boardid, interval, first.isoformat(), last.isoformat()) for first, last in merged),
+                )
+
+    def get(self, secid: str, boardid: str, interval: int, begin: datetime, end: datetime) -> list[dict[str, t.Any]]:
+        """Возвращает сохраненные свечи c началом в [begin, end] в представлении ISS."""
+        cursor = self._db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM candles"
+            " WHERE secid=? AND boardid=? AND interval=? AND begin>=? AND begin<=? ORDER BY begin",
+            (secid, boardid, interval, begin.isoformat(" ", "seconds"), end.isoformat(" ", "seconds")),
+        )
+        return [dict(zip(COLUMNS, row)) for row in cursor]
+
+    async def request(
+        self, client: "ISSClient", path: str, secid: str, boardid: str, **params: t.Any
+    ) -> AsyncIterator[dict[str, t.Any]]:
+        """
+        Запрос свечей через хранилище.
+
+        Из ISS запрашиваются только отсутствующие закрытые дни и текущий день, остальное выдается из хранилища.
+        Запросы не поддерживаемые хранилищем передаются в `client.request` как есть.
+
+        Args:
+            client: ISS клиент.
+            path: URI запроса свечей.
+            secid: Код инструмента.
+            boardid: Торговая площадка.
+            params: Параметры запроса свечей ISS.
+        """
+        interval = params.get("interval")
+        if interval not in INTERVALS or "from" not in params or "till" not in params or "iss.reverse" in params:
+            async for row in client.request(path, "candles", **params):
+                yield row
+            return
+
+        begin = to_datetime(params["from"], "begin")
+        end = to_datetime(params["till"], "end")
+        today = datetime.now(MSK).date()
+        for first, last in self.missing(secid, boardid, interval, begin.date(), min(end.date(), today - timedelta(1))):
+            params_ = dict(params, **{"from": first.isoformat(), "till": last.isoformat()})
+            self.put(
+                secid,
+                boardid,
+                interval,
+                [row async for row in client.request(path, "candles", **params_)],
+                (first, last),
+            )
+        if end.date() >= today:
+            params_ = dict(params, **{"from": max(to_date(begin), today).isoformat(), "till": end.date().isoformat()})
+            self.put(secid, boardid, interval, [row async for row in client.request(path, "candles", **params_)])
+        for row in self.get(secid, boardid, interval, begin, end):
+            yield row
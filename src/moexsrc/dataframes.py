@@ -1,5 +1,7 @@
+import importlib
+import time
 import typing as t
-from collections.abc import AsyncIterable
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from datetime import date, datetime
 
 import moexsrc.session
@@ -7,19 +9,153 @@ import moexsrc.tickers
 import moexsrc.markets
 import moexsrc.assets
 import moexsrc.utils
-from moexsrc.types import Period, TickerFilter, AssetFilter
+from moexsrc.instrument import Instrumentation, StageEvent
+from moexsrc.types import Block, Period, Timeframe, TickerFilter, AssetFilter
 
-__all__ = ["Asset", "Market", "Period", "Ticker"]
+__all__ = ["Asset", "Market", "Period", "Ticker", "Timeframe"]
 
 try:
+    import numpy as np
     import pandas as pd
 except ImportError:
     raise ImportError("You must install pandas to use module `moexsrc.dataframes`.")
 
+CATEGORIES = ("secid", "assetcode", "sectype", "clgroup", "boardid", "period")  # колонки с малым числом значений
 
-async def dataframe(it: AsyncIterable[t.Any]) -> pd.DataFrame:
-    """ "Сворачивает" асинхронный итератор в `pandas.DataFrame`."""
-    return pd.DataFrame.from_records(await moexsrc.utils.rollup(it))
+type Output = t.Literal["pandas", "arrow", "polars"]
+
+
+async def dataframe(it: AsyncIterable[t.Any], instrument: Instrumentation | None = None) -> pd.DataFrame:
+    """ "Сворачивает" асинхронный итератор в `pandas.DataFrame`, время построения учитывается в `instrument`."""
+    records = await moexsrc.utils.rollup(it)
+    if instrument is None or not instrument.enabled:
+        return pd.DataFrame.from_records(records)
+    started, clock = time.time(), time.perf_counter()
+    result = pd.DataFrame.from_records(records)
+    instrument.emit(StageEvent("dataframe", "build", time.perf_counter() - clock, len(records), started, {}))
+    return result
+
+
+def block_arrays(block: Block, float32: bool = False) -> dict[str, np.ndarray]:
+    """
+    Колонки блока в массивах NumPy: целые `int64`, дробные `float64` (или `float32`), даты и время
+    `datetime64[s]`, периоды литералами, остальное объектами.
+    """
+    result = dict()
+    for column, values in block.items():
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, (Period, Timeframe)):
+            array = np.array([value.literal for value in values], dtype=object)
+        elif isinstance(sample, (date, datetime)):
+            array = np.array(values, dtype="datetime64[s]")
+        elif isinstance(sample, float) or (isinstance(sample, int) and None in values):
+            array = np.array(values, dtype=np.float32 if float32 else np.float64)
+        elif isinstance(sample, bool):
+            array = np.array(values, dtype=np.bool_)
+        elif isinstance(sample, int):
+            array = np.array(values, dtype=np.int64)
+        else:
+            array = np.array(values, dtype=object)
+        result[column] = array
+    return result
+
+
+def build_frame(
+    arrays: dict[str, np.ndarray], output: Output = "pandas", categories: t.Collection[str] = CATEGORIES
+) -> t.Any:
+    """Строит таблицу `output` из колонок, колонки `categories` становятся категориальными."""
+    match output:
+        case "pandas":
+            columns = dict(
+                (column, pd.Categorical(array) if column in categories else array) for column, array in arrays.items()
+            )
+            return pd.DataFrame(columns, copy=False)
+        case "arrow":
+            pa = _require("pyarrow")
+            columns = dict(
+                (column, pa.array(array).dictionary_encode() if column in categories else pa.array(array))
+                for column, array in arrays.items()
+            )
+            return pa.table(columns)
+        case "polars":
+            pl = _require("polars")
+            columns = [
+                pl.Series(
+                    column,
+                    array.astype("datetime64[ms]") if array.dtype.kind == "M" else array,  # секунд Polars не знает
+                    dtype=pl.Categorical if column in categories else None,
+                )
+                for column, array in arrays.items()
+            ]
+            return pl.DataFrame(columns)
+        case _:
+            raise ValueError(f"Invalid output {output}")
+
+
+async def frame(
+    blocks: AsyncIterable[Block],
+    *,
+    output: Output = "pandas",
+    float32: bool = False,
+    categories: t.Collection[str] = CATEGORIES,
+    instrument: Instrumentation | None = None,
+) -> t.Any:
+    """
+    Строит таблицу из колоночных блоков: каждый блок сразу переводится в массивы NumPy, и записи в виде объектов
+    Python целиком в памяти не собираются.
+
+    Args:
+        blocks: Асинхронный итератор блоков, например `Ticker.candle_batches`.
+        output: Вид таблицы: "pandas" (`pandas.DataFrame`), "arrow" (`pyarrow.Table`) или "polars"
+                (`polars.DataFrame`).
+        float32: Хранить дробные значения в `float32`.
+        categories: Какие колонки сделать категориальными.
+        instrument: Инструментация, учитывает время построения.
+    """
+    started, clock, seconds = time.time(), time.perf_counter(), 0.0
+    chunks: list[dict[str, np.ndarray]] = list()
+    async for block in blocks:
+        clock = time.perf_counter()
+        chunks.append(block_arrays(block, float32))
+        seconds += time.perf_counter() - clock
+    clock = time.perf_counter()
+    if chunks:
+        arrays = dict((column, np.concatenate([chunk[column] for chunk in chunks])) for column in chunks[0])
+    else:
+        arrays = dict()
+    chunks.clear()
+    result = build_frame(arrays, output, categories)
+    if instrument is not None and instrument.enabled:
+        rows = len(next(iter(arrays.values()), ()))
+        seconds += time.perf_counter() - clock
+        instrument.emit(StageEvent("dataframe", "build", seconds, rows, started, dict(output=output)))
+    return result
+
+
+async def frames(
+    blocks: AsyncIterable[Block],
+    *,
+    output: Output = "pandas",
+    float32: bool = False,
+    categories: t.Collection[str] = CATEGORIES,
+) -> AsyncIterator[t.Any]:
+    """Построчная по блокам версия `frame`: выдает по таблице на каждый непустой блок."""
+    async for block in blocks:
+        if block.nrows:
+            yield build_frame(block_arrays(block, float32), output, categories)
+
+
+async def record_blocks(it: AsyncIterable[t.Mapping[str, t.Any]], size: int = 500) -> AsyncIterator[Block]:
+    """Собирает записи асинхронного итератора в блоки по `size` записей."""
+    async for chunk in moexsrc.utils.chunked(it, size):
+        yield Block.from_records(chunk)
+
+
+def _require(name: str) -> t.Any:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError(f"You must install {name} to use output `{name}`.")
 
 
 class Ticker(moexsrc.tickers.Ticker):
@@ -32,7 +168,7 @@ class Ticker(moexsrc.tickers.Ticker):
 
     async def candles(
         self,
-        period: Period | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] = "10min",
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
         /,
         *,
         begin: str | date | datetime | None = None,
@@ -40,8 +176,31 @@ class Ticker(moexsrc.tickers.Ticker):
         latest: int | None = None,
         offset: int | None = None,
         limit: int | None = None,
+        output: Output = "pandas",
+        float32: bool = False,
+        columns: Iterable[str] | None = None,
     ) -> pd.DataFrame:
-        return await dataframe(super().candles(period, begin=begin, end=end, latest=latest))
+        if latest is None:
+            blocks = super().candle_batches(period, begin=begin, end=end, columns=columns)
+        else:
+            blocks = record_blocks(super().candles(period, latest=latest, columns=columns))
+        return await frame(blocks, output=output, float32=float32, instrument=self._ctx.client.instrument)
+
+    async def candle_frames(
+        self,
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
+        /,
+        *,
+        begin: str | date | datetime | None = None,
+        end: str | date | datetime | None = None,
+        output: Output = "pandas",
+        float32: bool = False,
+        columns: Iterable[str] | None = None,
+    ) -> AsyncIterator[t.Any]:
+        """Данные для "Свечного графика" по таблице на страницу ответа ISS, см. `frames`."""
+        blocks = super().candle_batches(period, begin=begin, end=end, columns=columns)
+        async for item in frames(blocks, output=output, float32=float32):
+            yield item
 
 
 class Asset(moexsrc.assets.Asset):
@@ -56,7 +215,7 @@ class Asset(moexsrc.assets.Asset):
         tickers = list()
         for ticker_ in await moexsrc.utils.rollup(super().get_tickers(**filter)):
             ticker = Ticker(ticker_.symbol)
-            ticker._desc.update(ticker_._desc)
+            ticker._desc = ticker_._desc
             tickers.append(ticker)
         return tickers
 
@@ -68,8 +227,15 @@ class Asset(moexsrc.assets.Asset):
         begin: str | date | datetime | None = None,
         end: str | date | datetime | None = None,
         latest: int | None = None,
+        concurrency: int = 8,
+        output: Output = "pandas",
+        float32: bool = False,
+        columns: Iterable[str] | None = None,
     ) -> pd.DataFrame:
-        return await dataframe(super().futoi(period, begin=begin, end=end, latest=latest))
+        records = super().futoi(period, begin=begin, end=end, latest=latest, concurrency=concurrency, columns=columns)
+        return await frame(
+            record_blocks(records), output=output, float32=float32, instrument=self._ctx.client.instrument
+        )
 
 
 class Market(moexsrc.markets.Market):
@@ -80,11 +246,13 @@ class Market(moexsrc.markets.Market):
     def __init__(self, arg: str, *args: str):
         super().__init__(moexsrc.session.ctx, arg, *args)
 
-    async def get_tickers(self, **filter: t.Unpack[TickerFilter]) -> list[Ticker]:
+    async def get_tickers(
+        self, *, columns: Iterable[str] | None = None, **filter: t.Unpack[TickerFilter]
+    ) -> list[Ticker]:
         tickers = list()
-        for ticker_ in await moexsrc.utils.rollup(super()._get_tickers(**filter)):
+        for ticker_ in await moexsrc.utils.rollup(super()._get_tickers(columns, **filter)):
             ticker = Ticker(ticker_.symbol)
-            ticker._desc.update(ticker_._desc)
+            ticker._desc = ticker_._desc
             tickers.append(ticker)
         return tickers
 
@@ -92,6 +260,12 @@ class Market(moexsrc.markets.Market):
         assets = list()
         for asset_ in await moexsrc.utils.rollup(super()._get_assets(**filter)):
             asset = Asset(asset_.symbol)
-            asset._desc.update(asset_._desc)
+            asset._desc = asset_._desc
             assets.append(asset)
         return assets
+
+    async def snapshot(self, *columns: str) -> pd.DataFrame:
+        # Индекс строится по `Snapshot.index`, он есть и у пустого среза без колонки `secid`
+        snapshot = await super().snapshot(*columns)
+        index = pd.Index(list(snapshot.index), name="secid")
+        return pd.DataFrame(snapshot, index=index).drop(columns="secid", errors="ignore")
@@ -0,0 +1,380 @@
+"""
+Выгрузка свечей и FutOI в файлы Parquet или CSV.
+
+Примеры:
+    python -m moexsrc export --tickers SBER GAZP --period 1D --begin 2025-01-01 --end 2025-12-31 --output data
+    python -m moexsrc export --market fo --dataset futoi --begin 2025-06-01 --end 2025-06-30 --output data
+
+Данные раскладываются по файлам `<output>/<dataset>/period=<period>/<secid|assetcode>=<symbol>/<part>.<format>`,
+где `<part>` год, месяц или день начала части. Каждая часть пишется потоково, по странице ответа ISS, и после
+записи отмечается в `<output>/_checkpoint.jsonl` вместе с выгруженным интервалом дат и форматом, поэтому прерванная
+выгрузка продолжается с неготовых частей. Часть пропускается только если ее интервал уже выгружен в том же формате,
+иначе она выгружается заново за объединение прежнего и нового интервалов. Части с текущим днем не отмечаются и
+выгружаются заново.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+import typing as t
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from moexsrc.assets import Asset
+from moexsrc.instrument import Event, RequestEvent
+from moexsrc.markets import Market
+from moexsrc.session import Session, SessionCtx
+from moexsrc.tickers import Ticker
+from moexsrc.types import MSK, Block, Period, Timeframe
+from moexsrc.utils import chunked, gather_ordered, rollup, to_date
+
+CHECKPOINT = "_checkpoint.jsonl"
+
+logger = logging.getLogger(__name__)
+
+type Dataset = t.Literal["candles", "futoi"]
+type Partition = t.Literal["year", "month", "day"]
+type Format = t.Literal["parquet", "csv"]
+
+
+class Job(t.NamedTuple):
+    """Часть выгрузки: данные одного инструмента или актива за интервал дат."""
+
+    dataset: Dataset
+    source: Ticker | Asset
+    period: Timeframe
+    begin: date
+    end: date
+    part: str
+
+    @property
+    def key(self) -> str:
+        """Ключ части в отметках о готовности."""
+        return f"{self.dataset}/{self.period.literal}/{self.source.symbol}/{self.part}"
+
+    def path(self, output: str | os.PathLike, format_: Format) -> str:
+        """Путь к файлу части."""
+        column = "secid" if self.dataset == "candles" else "assetcode"
+        directory = os.path.join(
+            output, self.dataset, f"period={self.period.literal}", f"{column}={self.source.symbol}"
+        )
+        return os.path.join(directory, f"{self.part}.{format_}")
+
+
+class Report(t.NamedTuple):
+    """Итоги выгрузки."""
+
+    jobs: int
+    skipped: int
+    rows: int
+    files: int
+    written: int
+    requests: int
+    downloaded: int
+    seconds: float
+
+    def __str__(self) -> str:
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"jobs: {self.jobs} done, {self.skipped} skipped; rows: {self.rows} ({self.rows / seconds:.0f}/s); "
+            f"files: {self.files}, {self.written / 2**20:.1f} MiB; requests: {self.requests} "
+            f"({self.requests / seconds:.1f}/s), {self.downloaded / 2**20:.1f} MiB downloaded "
+            f"({self.downloaded / 2**20 / seconds:.2f} MiB/s); {self.seconds:.1f} s"
+        )
+
+
+def partitions(begin: date, end: date, by: Partition) -> list[tuple[date, date, str]]:
+    """Делит интервал дат на части по годам, месяцам или дням: (начало, конец, имя части)."""
+    result = list()
+    while begin <= end:
+        match by:
+            case "year":
+                stop, name = date(begin.year, 12, 31), f"{begin:%Y}"
+            case "month":
+                stop = date(begin.year + begin.month // 12, begin.month % 12 + 1, 1) - timedelta(days=1)
+                name = f"{begin:%Y-%m}"
+            case _:
+                stop, name = begin, f"{begin:%Y-%m-%d}"
+        result.append((begin, min(stop, end), name))
+        begin = stop + timedelta(days=1)
+    return result
+
+
+async def universe(
+    ctx: SessionCtx,
+    dataset: Dataset,
+    *,
+    market: str | None = None,
+    assets: Sequence[str] = (),
+    tickers: Sequence[str] = (),
+) -> list[Ticker | Asset]:
+    """
+    Инструменты (для свечей) или активы (для FutOI) выгрузки.
+
+    Args:
+        ctx: Контекст сессии.
+        dataset: Какие данные выгружаются.
+        market: Псевдоним рынка из `resolver.ALIASES`, выгружаются все инструменты или активы рынка.
+        assets: Коды активов, для свечей выгружаются их торгуемые контракты.
+        tickers: Коды инструментов, только для свечей.
+    """
+    if dataset == "futoi":
+        if tickers:
+            raise ValueError("FutOI is exported for assets, not tickers")
+        if market is not None:
+            return list(await rollup(Market(ctx, market).get_assets(*assets)))
+        return [Asset(ctx, assetcode) for assetcode in assets]
+    result: list[Ticker | Asset] = [Ticker(ctx, secid) for secid in tickers]
+    if market is not None:
+        result.extend(await rollup(Market(ctx, market).get_tickers()))
+    for assetcode in assets:
+        result.extend(await rollup(Asset(ctx, assetcode).get_tickers()))
+    return result
+
+
+def _values(values: list[t.Any]) -> list[t.Any]:
+    # Периоды записываются литералами
+    if values and isinstance(values[0], (Period, Timeframe)):
+        return [value.literal for value in values]
+    return values
+
+
+class CsvWriter:
+    """Потоковая запись блоков в CSV."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._columns: list[str] | None = None
+
+    def write(self, block: Block) -> None:
+        if self._columns is None:
+            self._columns = list(block.keys())
+            self._writer.writerow(self._columns)
+        self._writer.writerows(zip(*(_values(block[column]) for column in self._columns)))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """Потоковая запись блоков в Parquet, по группе строк на блок."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("You must install pyarrow to export to Parquet.")
+        self._pa, self._pq = pa, pq
+        self._path = path
+        self._writer: t.Any = None
+
+    def write(self, block: Block) -> None:
+        table = self._pa.table(dict((column, self._pa.array(_values(values))) for column, values in block.items()))
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, table.schema, compression="zstd")
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is None:
+            # Пустая часть записывается пустым файлом, чтобы отличать ее от не выгруженной
+            self._pq.write_table(self._pa.table({}), self._path)
+        else:
+            self._writer.close()
+
+
+WRITERS: dict[str, t.Callable[[str], CsvWriter | ParquetWriter]] = dict(csv=CsvWriter, parquet=ParquetWriter)
+
+
+def read_checkpoint(path: str | os.PathLike) -> dict[tuple[str, str], tuple[date, date]]:
+    """Выгруженные интервалы дат частей по ключу части и формату."""
+    done = dict()
+    if os.path.exists(path):
+        with open(path) as file:
+            for mark in (json.loads(line) for line in file if line.strip()):
+                # Отметки без интервала и формата не доказывают готовность части
+                if all(key in mark for key in ("begin", "end", "format")):
+                    range_ = date.fromisoformat(mark["begin"]), date.fromisoformat(mark["end"])
+                    done[(mark["job"], mark["format"])] = range_
+    return done
+
+
+def mark_done(path: str | os.PathLike, job: Job, format_: Format, rows: int) -> None:
+    """Отмечает готовность части."""
+    mark = dict(job=job.key, begin=job.begin.isoformat(), end=job.end.isoformat(), format=format_, rows=rows)
+    with open(path, "a") as file:
+        file.write(json.dumps(mark) + "\n")
+
+
+def _commit(path: str) -> int:
+    # Готовый файл части заменяет прежний, возвращает его размер
+    os.replace(path + ".part", path)
+    return os.path.getsize(path)
+
+
+async def blocks(job: Job) -> AsyncIterator[Block]:
+    """Данные части по блокам."""
+    if job.dataset == "candles":
+        async for block in job.source.candle_batches(job.period, begin=job.begin, end=job.end):
+            yield block
+    else:
+        records = job.source.futoi(job.period.period, begin=job.begin, end=job.end)
+        async for chunk in chunked(records, 1000):
+            yield Block.from_records(chunk)
+
+
+async def export(
+    ctx: SessionCtx,
+    sources: Sequence[Ticker | Asset],
+    dataset: Dataset,
+    period: Period | Timeframe | str,
+    *,
+    begin: str | date | datetime | None,
+    end: str | date | datetime | None,
+    output: str | os.PathLike,
+    format: Format = "parquet",
+    partition: Partition = "month",
+    concurrency: int = 4,
+) -> Report:
+    """
+    Выгружает данные инструментов или активов в файлы, см. описание модуля.
+
+    Args:
+        ctx: Контекст сессии.
+        sources: Инструменты для свечей или активы для FutOI, см. `universe`.
+        dataset: Какие данные выгружаются: "candles" или "futoi".
+        period: Период свечей или FutOI ("5min", "1D").
+        begin: Первая дата.
+        end: Последняя дата.
+        output: Каталог для файлов.
+        format: Формат файлов: "parquet" или "csv".
+        partition: По каким интервалам делить данные на файлы: "year", "month" или "day".
+        concurrency: Сколько частей выгружается одновременно.
+    """
+    timeframe = Timeframe.parse(period)
+    if dataset == "futoi" and timeframe.period not in (Period.FIVE_MINUTES, Period.ONE_DAY):
+        raise ValueError(f"Period {timeframe.literal} not implemented for FutOI")
+    today = datetime.now(MSK).date()
+    begin, end = to_date(begin), min(to_date(end) or today, today)
+    os.makedirs(output, exist_ok=True)
+    checkpoint = os.path.join(output, CHECKPOINT)
+    done = await asyncio.to_thread(read_checkpoint, checkpoint)
+    jobs = [
+        Job(dataset, source, timeframe, begin_, end_, name)
+        for source in sources
+        for begin_, end_, name in partitions(begin, end, partition)
+    ]
+    pending = list()
+    for job in jobs:
+        if (range_ := done.get((job.key, format))) is None:
+            pending.append(job)
+        elif not (range_[0] <= job.begin and job.end <= range_[1]):
+            # Файл части переписывается целиком, прежде выгруженные даты не должны пропасть
+            pending.append(job._replace(begin=min(range_[0], job.begin), end=max(range_[1], job.end)))
+
+    requests, downloaded = 0, 0
+
+    def count(event: Event) -> None:
+        nonlocal requests, downloaded
+        if isinstance(event, RequestEvent):
+            requests += 1
+            downloaded += event.bytes
+
+    async def run(job: Job) -> tuple[Job, int, int]:
+        path = job.path(output, format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer, rows = WRITERS[format](path + ".part"), 0
+        try:
+            async for block in blocks(job):
+                writer.write(block)
+                rows += block.nrows
+        finally:
+            writer.close()
+        size = await asyncio.to_thread(_commit, path)
+        logger.info("Exported %s: %d rows", job.key, rows)
+        return job, rows, size
+
+    started = time.perf_counter()
+    rows, files, written = 0, 0, 0
+    ctx.client.instrument.add_sink(count)
+    try:
+        async for job, rows_, size in gather_ordered((partial(run, job) for job in pending), concurrency):
+            rows, files, written = rows + rows_, files + 1, written + size
+            if job.end < today:
+                await asyncio.to_thread(mark_done, checkpoint, job, format, rows_)
+    finally:
+        ctx.client.instrument.remove_sink(count)
+    return Report(
+        len(pending),
+        len(jobs) - len(pending),
+        rows,
+        files,
+        written,
+        requests,
+        downloaded,
+        time.perf_counter() - started,
+    )
+
+
+def add_parser(commands: t.Any) -> None:
+    """Добавляет команду `export` в разбор командной строки."""
+    parser = commands.add_parser(
+        "export",
+        help="Выгрузка свечей и FutOI в Parquet или CSV",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    universe_ = parser.add_argument_group("Что выгружать")
+    universe_.add_argument("--market", help="Псевдоним рынка: eq, fx, fo и т.п.")
+    universe_.add_argument("--assets", nargs="+", default=[], help="Коды активов срочного рынка")
+    universe_.add_argument("--tickers", nargs="+", default=[], help="Коды инструментов")
+    parser.add_argument("--dataset", choices=("candles", "futoi"), default="candles", help="Данные, по умолчанию свечи")
+    parser.add_argument("--period", help='Период, по умолчанию "1D" для свечей и "5min" для FutOI')
+    parser.add_argument("--begin", required=True, help="Первая дата")
+    parser.add_argument("--end", help="Последняя дата, по умолчанию сегодня")
+    parser.add_argument("--output", required=True, help="Каталог для файлов")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet", help="Формат файлов")
+    parser.add_argument("--partition", choices=("year", "month", "day"), default="month", help="Деление на файлы")
+    parser.add_argument("--concurrency", type=int, default=4, help="Сколько частей выгружается одновременно")
+    parser.add_argument("--token", default=os.environ.get("APIKEY"), help="Ключ APIM, по умолчанию $APIKEY")
+    parser.add_argument("--rate-limit", type=float, help="Запросов в секунду")
+    parser.add_argument("--http-cache", help="Файл дискового кэша ответов")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Сообщать о каждой выгруженной части")
+    parser.set_defaults(handler=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """Выполняет команду `export`."""
+    if not (args.market or args.assets or args.tickers):
+        print("Nothing to export: set --market, --assets or --tickers", file=sys.stderr)
+        return 2
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    period = args.period or ("1D" if args.dataset == "candles" else "5min")
+
+    async def run() -> Report:
+        async with Session(args.token, rate_limit=args.rate_limit, http_cache=args.http_cache) as ctx:
+            sources = await universe(ctx, args.dataset, market=args.market, assets=args.assets, tickers=args.tickers)
+            return await export(
+                ctx,
+                sources,
+                args.dataset,
+                period,
+                begin=args.begin,
+                end=args.end,
+                output=args.output,
+                format=args.format,
+                partition=args.partition,
+                concurrency=args.concurrency,
+            )
+
+    print(asyncio.run(run()), file=sys.stderr)
+    return 0
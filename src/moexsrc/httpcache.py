@@ -0,0 +1,208 @@
+import math
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from moexsrc.types import MSK
+
+META_TTL = 12 * 3600
+
+# Сколько дней после `till` свеча интервала ISS может еще формироваться
+CANDLE_HORIZON = {1: 1, 10: 1, 60: 1, 24: 1, 7: 7, 31: 31, 4: 92}
+
+# Признаки ошибки в теле ответа ISS, который при этом приходит со статусом 200
+ERROR_MARKERS = (b'"ERROR_MESSAGE"', b'"error"')
+
+type Policy = Callable[[httpx.URL], float | None]
+
+
+def _past(value: str | None, days: int = 1) -> bool:
+    # Дата из параметра запроса раньше текущего (московского) дня не меньше чем на `days` дней
+    try:
+        moment = date.fromisoformat(value[:10]) if value else None
+    except ValueError:
+        return False
+    return moment is not None and moment <= datetime.now(MSK).date() - timedelta(days=days)
+
+
+def cache_ttl(url: httpx.URL) -> float | None:
+    """
+    Правило кэширования по умолчанию, возвращает время жизни ответа в секундах.
+
+    Неизменными (`math.inf`) считаются свечи и FutOI с `till` в прошедших днях и дневной FutOI за прошедший день,
+    описание инструмента живет `META_TTL`. Остальные ответы, в том числе данные торгов, не кэшируются (`None`).
+    """
+    path = url.path
+    if path.endswith("/candles.json") or path.endswith("/candles"):
+        interval = int(url.params.get("interval", 1))
+        if _past(url.params.get("till"), CANDLE_HORIZON.get(interval, 92)):
+            return math.inf
+    elif "/analyticalproducts/futoi/" in path:
+        if _past(url.params.get("till")):
+            return math.inf
+    elif match := re.search(r"/OpenOptionService/(\d{4}-\d{2}-\d{2})/", path):
+        if _past(match.group(1)):
+            return math.inf
+    elif re.search(r"/securities/[^/]+\.json$", path) and "/engines/" not in path:
+        return META_TTL
+    return None
+
+
+def cache_key(url: httpx.URL) -> str:
+    """Ключ кэша: хост, путь и отсортированные параметры запроса."""
+    params = "&".join(f"{key}={value}" for key, value in sorted(url.params.multi_items()))
+    return f"{url.host}{url.path}?{params}"
+
+
+class ResponseCache:
+    """
+    Дисковый кэш ответов HTTP.
+
+    Тела ответов хранятся сжатыми, при превышении `max_size` вытесняются давно не читавшиеся ответы.
+
+    Args:
+        path: Путь к файлу кэша, по умолчанию кэш живет в памяти.
+        max_size: Предельный суммарный размер сжатых ответов в байтах.
+    """
+
+    def __init__(self, path: str | os.PathLike = ":memory:", max_size: int = 512 << 20):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, content_type TEXT, body BLOB, size INTEGER, expires REAL, accessed REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._max_size = max_size
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер сжатых ответов в байтах."""
+        return self._size
+
+    def close(self) -> None:
+        """Закрывает кэш."""
+        self._db.close()
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        """Возвращает тип содержимого и тело ответа, или `None` если его нет или он устарел."""
+        row = self._db.execute("SELECT content_type, body, expires FROM responses WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[2] is not None and row[2] <= now:
+            self.delete(key)
+            return None
+        with self._db:
+            self._db.execute("UPDATE responses SET accessed=? WHERE key=?", (now, key))
+        return row[0], zlib.decompress(row[1])
+
+    def set(self, key: str, content_type: str, content: bytes, ttl: float = math.inf) -> None:
+        """Сохраняет ответ на `ttl` секунд, `math.inf` для неизменного ответа."""
+        body = zlib.compress(content)
+        if len(body) > self._max_size:
+            return
+        now = time.time()
+        expires = None if math.isinf(ttl) else now + ttl
+        self.delete(key)
+        with self._db:
+            self._db.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, content_type, body, len(body), expires, now)
+            )
+        self._size += len(body)
+        if self._size > self._max_size:
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Удаляет ответ."""
+        with self._db:
+            if row := self._db.execute("DELETE FROM responses WHERE key=? RETURNING size", (key,)).fetchone():
+                self._size -= row[0]
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        with self._db:
+            self._db.execute("DELETE FROM responses")
+        self._size = 0
+
+    def _evict(self) -> None:
+        # Вытесняет давно не читавшиеся ответы пока размер не станет меньше 90% предельного
+        target = self._max_size * 0.9
+        with self._db:
+            self._db.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            cursor = self._db.execute("SELECT key, size FROM responses ORDER BY accessed")
+            evicted = list()
+            for key, size in cursor:
+                if self._size <= target:
+                    break
+                evicted.append((key,))
+                self._size -= size
+            self._db.executemany("DELETE FROM responses WHERE key=?", evicted)
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx кэширующий успешные JSON ответы на GET запросы. Ответы с сообщением ISS об ошибке не кэшируются.
+
+    Args:
+        transport: Транспорт выполняющий запросы, по умолчанию `httpx.AsyncHTTPTransport`.
+        cache: Кэш ответов.
+        policy: Правило кэширования, по URL запроса возвращает время жизни ответа или `None` если его не кэшировать.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        policy: Policy = cache_ttl,
+    ):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._cache = cache if cache is not None else ResponseCache()
+        self._policy = policy
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Кэш ответов."""
+        return self._cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or (ttl := self._policy(request.url)) is None:
+            return await self._transport.handle_async_request(request)
+        key = cache_key(request.url)
+        if (cached := self._cache.get(key)) is not None:
+            content_type, content = cached
+            return httpx.Response(
+                200,
+                stream=httpx.ByteStream(content),
+                headers={"content-type": content_type, "content-length": str(len(content))},
+                request=request,
+            )
+        response = await self._transport.handle_async_request(request)
+        content_type = response.headers.get("content-type", "")
+        if response.status_code == 200 and content_type.startswith("application/json"):
+            try:
+                # Тело сохраняется уже раскодированным из `content-encoding`
+                content = await response.aread()
+            finally:
+                await response.aclose()
+            headers = [
+                (key, value)
+                for key, value in response.headers.multi_items()
+                if key.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+            ]
+            headers.append(("content-length", str(len(content))))
+            if not any(marker in content for marker in ERROR_MARKERS):
+                self._cache.set(key, content_type, content, ttl)
+            return httpx.Response(200, stream=httpx.ByteStream(content), headers=headers, request=request)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,317 @@
+import logging
+import time
+import typing as t
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RequestEvent(t.NamedTuple):
+    """
+    Событие HTTP запроса одной страницы.
+
+    Attributes:
+        path: Путь или URL запроса.
+        params: Параметры запроса.
+        status: Код HTTP ответа, или `None` если ответ не получен.
+        bytes: Размер тела ответа в байтах.
+        latency: Длительность в секундах, включая повторы и ожидание ограничителя частоты.
+        retries: Сколько раз запрос повторялся.
+        throttle_wait: Сколько секунд запрос ждал ограничителя частоты.
+        decode: Сколько секунд заняла десериализация ответа.
+        started: Время начала, `time.time()`.
+        error: Описание ошибки, если запрос не удался.
+    """
+
+    path: str
+    params: dict[str, t.Any]
+    status: int | None
+    bytes: int
+    latency: float
+    retries: int
+    throttle_wait: float
+    decode: float
+    started: float
+    error: str | None = None
+
+
+class StageEvent(t.NamedTuple):
+    """
+    Событие завершения этапа обработки данных.
+
+    Attributes:
+        pipeline: Имя конвейера, например "candles".
+        stage: Имя этапа, например "fetch", "normalize", "resample".
+        seconds: Собственное время этапа в секундах, без времени вложенных этапов.
+        rows: Сколько записей выдал этап.
+        started: Время начала конвейера, `time.time()`.
+        attrs: Дополнительные атрибуты, например код инструмента.
+    """
+
+    pipeline: str
+    stage: str
+    seconds: float
+    rows: int
+    started: float
+    attrs: dict[str, t.Any]
+
+
+type Event = RequestEvent | StageEvent
+type Sink = Callable[[Event], None]
+
+
+class RequestStats:
+    """Накопитель показателей одного запроса, заполняется клиентом."""
+
+    __slots__ = ("attempts", "bytes", "decode", "status", "throttle_wait")
+
+    def __init__(self):
+        self.status: int | None = None
+        self.bytes = 0
+        self.throttle_wait = 0.0
+        self.decode = 0.0
+        self.attempts = 0
+
+
+class Pipeline:
+    """
+    Таймеры этапов одного конвейера из асинхронных итераторов.
+
+    Время этапа считается собственным: пока этап ждет следующую запись от вложенного этапа, идет время вложенного.
+    События отправляются когда завершается внешний этап.
+    """
+
+    def __init__(self, instrument: "Instrumentation", name: str, attrs: dict[str, t.Any]):
+        self._instrument = instrument
+        self._name = name
+        self._attrs = attrs
+        self._started = time.time()
+        self._seconds: dict[str, float] = dict()
+        self._rows: dict[str, int] = dict()
+        self._stack: list[list[t.Any]] = list()
+        self._outer: str | None = None
+
+    def _enter(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._seconds[parent[0]] += now - parent[1]
+        self._stack.append([stage, now])
+
+    def _leave(self) -> None:
+        now = time.perf_counter()
+        stage, started = self._stack.pop()
+        self._seconds[stage] += now - started
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def stage[T](self, aiter_: AsyncIterable[T], stage: str) -> AsyncIterator[T]:
+        """Оборачивает итератор этапа `stage`, этапы оборачиваются от внутреннего к внешнему."""
+        self._seconds.setdefault(stage, 0.0)
+        self._rows.setdefault(stage, 0)
+        self._outer = stage
+        return self._timed(aiter_, stage)
+
+    async def _timed[T](self, aiter_: AsyncIterable[T], stage: str) -> AsyncIterator[T]:
+        it = aiter(aiter_)
+        try:
+            while True:
+                self._enter(stage)
+                try:
+                    item = await anext(it)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    self._leave()
+                self._rows[stage] += 1
+                yield item
+        finally:
+            if stage == self._outer:
+                for name, seconds in self._seconds.items():
+                    self._instrument.emit(
+                        StageEvent(self._name, name, seconds, self._rows[name], self._started, self._attrs)
+                    )
+
+
+class _NoPipeline:
+    # Заменяет `Pipeline` при отключенной инструментации, ничего не делает
+
+    @staticmethod
+    def stage[T](aiter_: AsyncIterable[T], stage: str) -> AsyncIterable[T]:
+        return aiter_
+
+
+NO_PIPELINE = _NoPipeline()
+
+
+class Instrumentation:
+    """
+    Точка подключения обработчиков событий инструментации.
+
+    Пока не подключен ни один обработчик инструментация отключена, и клиент с конвейерами не измеряют ничего.
+
+    Args:
+        sinks: Обработчики событий `RequestEvent` и `StageEvent`.
+    """
+
+    def __init__(self, *sinks: Sink):
+        self._sinks: list[Sink] = list(sinks)
+
+    @property
+    def enabled(self) -> bool:
+        """Подключен ли хотя бы один обработчик."""
+        return bool(self._sinks)
+
+    def add_sink(self, sink: Sink) -> None:
+        """Подключает обработчик событий."""
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        """Отключает обработчик событий."""
+        self._sinks.remove(sink)
+
+    def emit(self, event: Event) -> None:
+        """Передает событие обработчикам, ошибки обработчиков не прерывают работу."""
+        for sink in self._sinks:
+            try:
+                sink(event)
+            except Exception:
+                logger.exception("Instrumentation sink failed")
+
+    def pipeline(self, name: str, **attrs: t.Any) -> Pipeline | _NoPipeline:
+        """Таймеры этапов нового конвейера `name`."""
+        if not self._sinks:
+            return NO_PIPELINE
+        return Pipeline(self, name, attrs)
+
+
+class LoggingSink:
+    """Пишет события в лог."""
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.DEBUG):
+        self._logger = logger or logging.getLogger("moexsrc")
+        self._level = level
+
+    def __call__(self, event: Event) -> None:
+        if not self._logger.isEnabledFor(self._level):
+            return
+        if isinstance(event, RequestEvent):
+            self._logger.log(
+                self._level,
+                "GET %s %s status=%s bytes=%d latency=%.3fs retries=%d throttle=%.3fs decode=%.3fs%s",
+                event.path,
+                event.params,
+                event.status,
+                event.bytes,
+                event.latency,
+                event.retries,
+                event.throttle_wait,
+                event.decode,
+                f" error={event.error}" if event.error else "",
+            )
+        else:
+            self._logger.log(
+                self._level,
+                "%s.%s rows=%d seconds=%.3f %s",
+                event.pipeline,
+                event.stage,
+                event.rows,
+                event.seconds,
+                event.attrs,
+            )
+
+
+class HistogramSink:
+    """
+    Собирает в памяти распределения длительностей: запросов по секции ответа и этапов по конвейеру.
+
+    Args:
+        size: Сколько последних значений хранится для расчета квантилей по каждому ключу.
+    """
+
+    def __init__(self, size: int = 1000):
+        self._size = size
+        self._samples: dict[str, deque[float]] = dict()
+        self._totals: dict[str, list[float]] = dict()
+
+    def __call__(self, event: Event) -> None:
+        if isinstance(event, RequestEvent):
+            section = event.path.split("?")[0].split("/")[-1].split(".")[0]
+            self._add(f"request.{section}", event.latency, 1)
+            self._add(f"request.{section}.decode", event.decode, 1)
+            if event.throttle_wait:
+                self._add(f"request.{section}.throttle", event.throttle_wait, 1)
+        else:
+            self._add(f"{event.pipeline}.{event.stage}", event.seconds, event.rows)
+
+    def _add(self, key: str, seconds: float, rows: int) -> None:
+        if key not in self._samples:
+            self._samples[key] = deque(maxlen=self._size)
+            self._totals[key] = [0, 0.0, 0]
+        self._samples[key].append(seconds)
+        totals = self._totals[key]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += rows
+
+    def clear(self) -> None:
+        self._samples.clear()
+        self._totals.clear()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Сводка по ключам: количество, суммарное время, записи, медиана, 95-й перцентиль и максимум."""
+        result = dict()
+        for key, samples in self._samples.items():
+            count, total, rows = self._totals[key]
+            ordered = sorted(samples)
+            result[key] = dict(
+                count=count,
+                total=total,
+                rows=rows,
+                p50=ordered[len(ordered) // 2],
+                p95=ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                max=ordered[-1],
+            )
+        return result
+
+
+class OpenTelemetrySink:
+    """
+    Превращает события в спаны OpenTelemetry.
+
+    Зависимость от `opentelemetry` не требуется: подойдет любой объект с методом
+    `start_span(name, start_time=..., attributes=...)` возвращающим спан с методом `end(end_time=...)`,
+    например `opentelemetry.trace.get_tracer("moexsrc")`. Время передается в наносекундах.
+
+    Args:
+        tracer: Трассировщик OpenTelemetry.
+    """
+
+    def __init__(self, tracer: t.Any):
+        self._tracer = tracer
+
+    def __call__(self, event: Event) -> None:
+        start = int(event.started * 1e9)
+        if isinstance(event, RequestEvent):
+            name, seconds = "GET", event.latency
+            attributes = {
+                "url.path": event.path,
+                "http.response.status_code": event.status or 0,
+                "http.response.body.size": event.bytes,
+                "moexsrc.params": repr(event.params),
+                "moexsrc.retries": event.retries,
+                "moexsrc.throttle_wait": event.throttle_wait,
+                "moexsrc.decode": event.decode,
+            }
+            if event.error:
+                attributes["error.type"] = event.error
+        else:
+            name, seconds = f"{event.pipeline}.{event.stage}", event.seconds
+            attributes = {"moexsrc.rows": event.rows}
+            attributes.update(
+                (f"moexsrc.{k}", v if isinstance(v, (str, int, float, bool)) else repr(v))
+                for k, v in event.attrs.items()
+            )
+        span = self._tracer.start_span(name, start_time=start, attributes=attributes)
+        span.end(end_time=start + int(seconds * 1e9))
@@ -1,19 +1,103 @@
 import asyncio
-import json
 import logging
+import os
+import time
 import typing as t
-from collections.abc import AsyncIterator
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
 
 import httpx
 
+from moexsrc._jsonstream import StreamParser
+from moexsrc.httpcache import CachingTransport, ResponseCache
+from moexsrc.instrument import Instrumentation, RequestEvent, RequestStats
+from moexsrc.retry import CircuitBreaker, LatencyTracker, RetryPolicy, hedged, retrying
+from moexsrc.throttle import RateLimiter
+from moexsrc.types import Block
+from moexsrc.utils import extract
+
+logger = logging.getLogger(__name__)
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
 
 class ISSClientError(Exception):
     """Ошибка в запросе данных от ISS."""
 
 
+def section_from(path: str) -> str:
+    """Секция ответа по умолчанию, совпадает с последним элементом пути запроса."""
+    return path.split("/")[-1].split(".")[0]
+
+
+def section_of(data: dict[str, t.Any], section: str) -> dict[str, t.Any] | None:
+    """Возвращает секцию ответа ISS, или `None` если данные недоступны для бесплатных пользователей."""
+    data = data[section]
+    if "error" in data:
+        raise ISSClientError(data["error"])
+    elif "ERROR_MESSAGE" in data["columns"]:
+        message = data["data"][0][0]
+        if "Free users can't receive data" in message:
+            logger.debug(message)
+            return None
+        raise ISSClientError(message)
+    return data
+
+
+def projection(
+    section: str, columns: Iterable[str] | None = None, sections: Iterable[str] | None = None
+) -> dict[str, str]:
+    """
+    Параметры отбора секций (`iss.only`) и колонок (`<section>.columns`) ответа на стороне ISS.
+
+    Args:
+        section: Основная секция запроса.
+        columns: Колонки основной секции.
+        sections: Секции ответа, по умолчанию с `columns` только основная секция и ее курсор.
+    """
+    params = dict()
+    if sections is None and columns is not None and section != "*":
+        sections = (section, f"{section}.cursor")
+    if sections is not None:
+        params["iss.only"] = ",".join(sections)
+    if columns is not None:
+        params[f"{section}.columns"] = ",".join(columns)
+    return params
+
+
 class ISSClient:
     """
     ISS клиент.
+
+    Args:
+        api_key: Ключ APIM, если задан запросы идут через `apim.moex.com`.
+        base_url: Базовый URI ISS.
+        request_timeout: Тайм-аут HTTP запроса.
+        idle_timeout: Тайм-аут между HTTP запросами, задает частоту запросов если не задан `rate_limit`.
+        read_ahead: Сколько страниц ответа может запрашиваться одновременно с обработкой текущей.
+        decoder: Функция десериализующая JSON из байтов ответа, по умолчанию `orjson.loads` если установлен `orjson`,
+                 иначе `json.loads`. Значение "stream" включает инкрементальный разбор ответа по мере получения.
+        offload_size: Ответы от этого размера в байтах десериализуются в отдельном потоке, `None` отключает.
+        rate_limit: Максимальная частота запросов в секунду общая для всех корутин клиента, или словарь
+                    {хост: частота} с отдельными бюджетами для ISS, APIM и других хостов.
+        retry: Политика повторов неудачных запросов страниц, по умолчанию `RetryPolicy()`; `RetryPolicy(attempts=1)`
+               отключает повторы.
+        hedge: Дублировать запрос страницы если он длится дольше 95-го перцентиля наблюдаемой длительности.
+        transport: Транспорт httpx, например подмена ISS для работы без сети.
+        instrument: Инструментация запросов и конвейеров обработки, по умолчанию отключенная.
+        cache: Дисковый кэш неизменных ответов, или путь к его файлу, см. `moexsrc.httpcache.cache_ttl`.
+        coalesce: Объединять одинаковые одновременные запросы страниц в один.
+        max_connections: Наибольшее число одновременных соединений пула, `None` без ограничения.
+        keepalive_expiry: Сколько секунд простаивающее соединение остается в пуле.
+        http2: Использовать HTTP/2, запросы мультиплексируются в нескольких соединениях; требует пакета `h2`.
+        limiters: Словарь ограничителей частоты по хостам, общий для нескольких клиентов, например работающих в
+                  разных потоках и циклах событий, чтобы они делили один бюджет запросов.
+
+    Пул соединений принадлежит клиенту и закрывается `aclose`, или при выходе из `async with`. Параметры пула не
+    действуют, если задан `transport`.
     """
 
     def __init__(
@@ -24,8 +108,34 @@ class ISSClient:
         *,
         request_timeout=60,
         idle_timeout=0.01,
+        read_ahead=4,
+        decoder: t.Callable[[bytes], t.Any] | t.Literal["stream"] | None = None,
+        offload_size: int | None = 1 << 20,
+        rate_limit: float | dict[str, float] | None = None,
+        retry: RetryPolicy | None = None,
+        hedge: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+        instrument: Instrumentation | None = None,
+        cache: ResponseCache | str | os.PathLike | None = None,
+        coalesce: bool = True,
+        max_connections: int | None = 100,
+        keepalive_expiry: float | None = 5.0,
+        http2: bool = False,
+        limiters: dict[str, RateLimiter | None] | None = None,
     ):
-        options: dict[str, t.Any] = dict(timeout=request_timeout)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections and min(20, max_connections),
+            keepalive_expiry=keepalive_expiry,
+        )
+        options: dict[str, t.Any] = dict(timeout=request_timeout, limits=limits, http2=http2)
+        self.__cache = None
+        if cache is not None:
+            if not isinstance(cache, ResponseCache):
+                cache = self.__cache = ResponseCache(cache)
+            transport = CachingTransport(transport or httpx.AsyncHTTPTransport(limits=limits, http2=http2), cache)
+        if transport is not None:
+            options["transport"] = transport
         if api_key is not None:
             options["base_url"] = base_url or "https://apim.moex.com/iss"
             options.setdefault("headers", []).append(("Authorization", f"Bearer {api_key}"))
@@ -33,18 +143,310 @@ class ISSClient:
             options["base_url"] = base_url or "https://iss.moex.com/iss"
         self._client = httpx.AsyncClient(**options)
         self.__idle_timeout = idle_timeout
+        self.__read_ahead = read_ahead
+        self.__decoder = decoder or loads
+        self.__offload_size = offload_size
+        default_rate = 1 / idle_timeout if idle_timeout > 0 else None
+        if isinstance(rate_limit, dict):
+            self.__rate_limits = dict(rate_limit)
+        else:
+            self.__rate_limits = {self._client.base_url.host: rate_limit or default_rate}
+        self.__default_rate = default_rate
+        self.__limiters: dict[str, RateLimiter | None] = limiters if limiters is not None else dict()
+        self.__retry = retry if retry is not None else RetryPolicy()
+        self.__hedge = hedge
+        self.__breaker = CircuitBreaker()
+        self.__latency = LatencyTracker()
+        self.__instrument = instrument or Instrumentation()
+        self.__coalesce = coalesce
+        self.__inflight: dict[tuple[str, str], list[t.Any]] = dict()
+        self.__loop: asyncio.AbstractEventLoop | None = None  # цикл событий, которому принадлежат соединения пула
+        self.__discarded = False
+
+    async def __aenter__(self) -> t.Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    @property
+    def closed(self) -> bool:
+        """Закрыт ли клиент."""
+        return self.__discarded or self._client.is_closed
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений клиента и созданный им кэш ответов."""
+        for task, _ in list(self.__inflight.values()):
+            task.cancel()
+        self.__inflight.clear()
+        await self._client.aclose()
+        self.__release()
+
+    def close(self) -> None:
+        """
+        Закрывает клиент вне цикла событий. Пул соединений закрывается в цикле событий, в котором открывались его
+        соединения, а если этот цикл уже закрыт, пул отбрасывается: закрыть его соединения больше нельзя.
+        """
+        loop = self.__loop
+        if loop is None:
+            asyncio.run(self.aclose())
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        elif not loop.is_closed():
+            loop.run_until_complete(self.aclose())
+        else:
+            self.__inflight.clear()
+            self.__discarded = True
+            self.__release()
+
+    def __release(self) -> None:
+        if self.__cache is not None:
+            self.__cache.close()
+            self.__cache = None
 
     @property
     def idle_timeout(self) -> float:
         """Тайм-аут между HTTP запросами."""
         return self.__idle_timeout
 
+    @property
+    def read_ahead(self) -> int:
+        """Сколько страниц ответа может запрашиваться одновременно с обработкой текущей."""
+        return self.__read_ahead
+
+    @property
+    def retry(self) -> RetryPolicy:
+        """Политика повторов неудачных запросов."""
+        return self.__retry
+
+    @property
+    def instrument(self) -> Instrumentation:
+        """Инструментация клиента, подключение обработчика событий включает ее."""
+        return self.__instrument
+
+    def _limiter(self, host: str) -> RateLimiter | None:
+        """Ограничитель частоты запросов к хосту, или `None` если частота не ограничена."""
+        if host not in self.__limiters:
+            rate = self.__rate_limits.get(host, self.__default_rate)
+            # `setdefault` атомарен, клиенты в разных потоках получат один ограничитель
+            return self.__limiters.setdefault(host, RateLimiter(rate) if rate else None)
+        return self.__limiters[host]
+
+    async def _fetch(self, path: str, params: dict[str, t.Any]) -> dict[str, t.Any]:
+        """
+        Запрашивает одну страницу с повторами и возвращает десериализованный JSON ответа.
+
+        Одинаковые одновременные запросы объединяются: страница запрашивается один раз и ее JSON получают все
+        ожидающие, поэтому изменять его нельзя. Запрос отменяется когда его перестают ожидать все.
+        """
+        if not self.__coalesce:
+            return await self._fetch_page(path, params)
+        key = (path, repr(sorted(params.items())))
+        if (flight := self.__inflight.get(key)) is None or flight[0].cancelled():
+            flight = self.__inflight[key] = [asyncio.ensure_future(self._fetch_page(path, params)), 0]
+            flight[0].add_done_callback(lambda task: self.__forget(key, task))
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not flight[0].done():
+                # Запрос забывается сразу, пришедший следом за отменой получит новый, а не отмененный
+                self.__forget(key, flight[0])
+                flight[0].cancel()
+
+    def __forget(self, key: tuple[str, str], task: asyncio.Future) -> None:
+        # Под тем же ключом уже может быть следующий запрос, его не трогаем
+        if (flight := self.__inflight.get(key)) is not None and flight[0] is task:
+            del self.__inflight[key]
+
+    async def _fetch_page(self, path: str, params: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Запрашивает одну страницу с повторами, см. `ISSClient._fetch`."""
+        stats = RequestStats() if self.__instrument.enabled else None
+
+        def call() -> t.Awaitable[dict[str, t.Any]]:
+            if stats is not None:
+                stats.attempts += 1
+            if self.__hedge:
+                return hedged(lambda: self._get(path, params, stats), self.__latency)
+            return self._get(path, params, stats)
+
+        def run() -> t.Awaitable[dict[str, t.Any]]:
+            if self.__retry.attempts <= 1:
+                return call()
+            return retrying(self.__retry, call, self.__breaker)
+
+        if stats is None:
+            return await run()
+        started, clock, error = time.time(), time.perf_counter(), None
+        try:
+            return await run()
+        except Exception as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            latency = time.perf_counter() - clock
+            retries = max(0, stats.attempts - 1)
+            self.__instrument.emit(
+                RequestEvent(
+                    path,
+                    params,
+                    stats.status,
+                    stats.bytes,
+                    latency,
+                    retries,
+                    stats.throttle_wait,
+                    stats.decode,
+                    started,
+                    error,
+                )
+            )
+
+    async def _get(self, path: str, params: dict[str, t.Any], stats: RequestStats | None = None) -> dict[str, t.Any]:
+        """Запрашивает одну страницу и возвращает десериализованный JSON ответа."""
+        if limiter := self._limiter(httpx.URL(path).host or self._client.base_url.host):
+            waited = await limiter.acquire()
+            if stats is not None:
+                stats.throttle_wait += waited
+        params = dict((key, value) for key, value in params.items() if not (key == "start" and value < 0))
+        request = self._client.build_request("GET", path, params=params)
+        if foreign := request.url.host != self._client.base_url.host:
+            # Ключ доступа ISS не передается сторонним хостам
+            request.headers.pop("Authorization", None)
+        self.__loop = asyncio.get_running_loop()
+        resp = await self._client.send(request, stream=True)
+        try:
+            if stats is not None:
+                stats.status = resp.status_code
+            if limiter:
+                limiter.feedback(resp.status_code, resp.headers.get("Retry-After"))
+            if resp.is_success:
+                if resp.headers.get("content-type", "").startswith("application/json"):
+                    if data := await self._decode(resp, not foreign, stats):
+                        return data
+                else:
+                    resp.status_code = 403
+                resp.status_code = 400
+            resp.raise_for_status()
+        finally:
+            if stats is not None:
+                stats.bytes += resp.num_bytes_downloaded
+            await resp.aclose()
+        raise RuntimeError("Unreachable")
+
+    async def _decode(self, resp: httpx.Response, stream: bool = True, stats: RequestStats | None = None) -> t.Any:
+        """
+        Десериализует JSON ответа выбранным способом, `stream=False` для ответов не в формате ISS.
+
+        В `stats` учитывается время десериализации, при инкрементальном разборе вместе с получением ответа.
+        """
+        clock = time.perf_counter() if stats is not None else 0.0
+        if self.__decoder == "stream" and stream:
+            parser = StreamParser(resp.encoding or "utf-8")
+            async for chunk in resp.aiter_bytes():
+                parser.feed(chunk)
+            data = parser.close()
+        else:
+            decoder = loads if self.__decoder == "stream" else self.__decoder
+            content = await resp.aread()
+            if stats is not None:
+                clock = time.perf_counter()
+            if self.__offload_size is not None and len(content) >= self.__offload_size:
+                data = await asyncio.to_thread(decoder, content)
+            else:
+                data = decoder(content)
+        if stats is not None:
+            stats.decode += time.perf_counter() - clock
+        return data
+
+    async def _pages(
+        self,
+        path: str,
+        section: str | None,
+        continuer: t.Callable[[dict[str, t.Any], dict[str, t.Any], str], dict[str, t.Any]] | None,
+        read_ahead: int | None,
+        parameters: dict[str, t.Any],
+        max_records: int | None = None,
+    ) -> AsyncIterator[dict[str, t.Any]]:
+        """Асинхронный итератор страниц ответа в порядке следования, см. `ISSClient.request`."""
+
+        def default_continuer(
+            params: dict[str, t.Any], data: dict[str, t.Any], section: str
+        ) -> dict[str, t.Any] | None:
+            if section != "*":
+                data = data[section]["data"]
+                start = params.get("start", 0)
+                if len(data) > 0 and start >= 0 and (stop is None or start + len(data) < stop):
+                    return dict(start=start + len(data))
+            return None
+
+        def page_window(params: dict[str, t.Any], data: dict[str, t.Any]) -> tuple[int, int, int | None] | None:
+            # Возвращает (start следующей страницы, размер страницы, всего записей) для параллельной пагинации
+            if section == "*" or (start := params.get("start", 0)) < 0 or "data" not in data.get(section, {}):
+                return None
+            if "ERROR_MESSAGE" in data[section]["columns"]:
+                return None
+            if cursor := data.get(f"{section}.cursor"):
+                if cursor["data"]:
+                    index, total, pagesize = extract(
+                        dict(zip(cursor["columns"], cursor["data"][0])), "INDEX", "TOTAL", "PAGESIZE"
+                    )
+                    if pagesize:
+                        return index + pagesize, pagesize, total
+            if size := len(data[section]["data"]):
+                return start + size, size, None
+            return None
+
+        path = path + ".json" if not path.endswith(".json") else path
+        params = dict(parameters, **{"iss.meta": "off"})
+        read_ahead = self.__read_ahead if read_ahead is None else read_ahead
+        parallel = continuer is None and read_ahead > 0
+        continuer = continuer or default_continuer
+        # Смещение после которого страницы не запрашиваются
+        stop = None if max_records is None else max(0, params.get("start", 0)) + max_records
+
+        pending: deque[asyncio.Task[dict[str, t.Any]]] = deque()
+        try:
+            data = await self._fetch(path, params)
+            if parallel and (window := page_window(params, data)):
+                # Страницы запрашиваются по смещениям, до `read_ahead` запросов одновременно
+                next_start, pagesize, total = window
+                counted = total is not None
+                if stop is not None:
+                    total = stop if total is None else min(total, stop)
+                while True:
+                    while len(pending) < read_ahead and (total is None or next_start < total):
+                        pending.append(asyncio.create_task(self._fetch(path, dict(params, start=next_start))))
+                        next_start += pagesize
+                    yield data
+                    if not pending or (not counted and len(data[section]["data"]) < pagesize):
+                        break
+                    data = await pending.popleft()
+            else:
+                while True:
+                    if continue_params := continuer(params, data, section):
+                        params = dict(params, **continue_params)
+                        if read_ahead > 0:
+                            pending.append(asyncio.create_task(self._fetch(path, params)))
+                    yield data
+                    if not continue_params:
+                        break
+                    data = await pending.popleft() if pending else await self._fetch(path, params)
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def request(
         self,
         path: str,
         section: str | None = None,
         deserializer: t.Callable[[dict[str, t.Any], str], list[dict[str, t.Any]]] | None = None,
         continuer: t.Callable[[dict[str, t.Any], dict[str, t.Any], str], dict[str, t.Any]] | None = None,
+        *,
+        read_ahead: int | None = None,
+        columns: Iterable[str] | None = None,
+        sections: Iterable[str] | None = None,
+        max_records: int | None = None,
         **parameters: t.Any,
     ) -> AsyncIterator[dict[str, t.Any]]:
         """
@@ -55,6 +457,13 @@ class ISSClient:
             section: Какую секцию запроса следует считать.
             deserializer: Метод десериализующий данные ответа в список словарей.
             continuer: Метод возвращает словарь параметров запроса следующей страницы, или `None` для прерывания.
+            read_ahead: Сколько страниц запрашивать наперед, по умолчанию `ISSClient.read_ahead`; 0 отключает
+                        упреждающее чтение. Со стандартным `continuer` страницы запрашиваются параллельно по
+                        смещениям `start` (по секции `<section>.cursor`, если она есть в ответе), с
+                        пользовательским - следующая страница запрашивается пока обрабатывается текущая.
+            columns: Колонки секции `section`, которые должен вернуть ISS, по умолчанию все.
+            sections: Секции, которые должен вернуть ISS, по умолчанию все, а с `columns` только `section`.
+            max_records: Выдать не больше стольких записей, со стандартным `continuer` страницы дальше не запрашиваются.
             parameters: Словарь параметров запроса. Если не переопределен параметер `continuer`, `start=-1` выведет
                         только первую страницу данных.
         Returns:
@@ -62,62 +471,73 @@ class ISSClient:
         """
 
         def default_deserializer(data: dict[str, t.Any], section: str) -> list[dict[str, t.Any]]:
-            data = data[section]
-            if "error" in data:
-                raise ISSClientError(data["error"])
-            elif "ERROR_MESSAGE" in data["columns"]:
-                message = data["data"][0][0]
-                if "Free users can't receive data" in message:
-                    logging.debug(message)
-                    return []
-                raise ISSClientError(message)
-            return [dict(zip(data["columns"], row)) for row in data["data"]]
-
-        def default_continuer(
-            params: dict[str, t.Any], data: dict[str, t.Any], section: str
-        ) -> dict[str, t.Any] | None:
-            if section != "*":
-                data = data[section]["data"]
-                start = params.get("start", 0)
-                if len(data) > 0 and start >= 0:
-                    return dict(start=start + len(data))
-            return None
-
-        path = path + ".json" if not path.endswith(".json") else path
-        params = dict(parameters, **{"iss.meta": "off"})
-        continuer = continuer or default_continuer
+            if data := section_of(data, section):
+                return [dict(zip(data["columns"], row)) for row in data["data"]]
+            return []
 
         if deserializer is None:
             if section is None:
-                section = path.split("/")[-1].split(".")[0]
+                section = section_from(path)
             deserializer = default_deserializer
+        if columns is not None or sections is not None:
+            parameters = dict(projection(section or section_from(path), columns, sections), **parameters)
 
-        def process_response(resp: httpx.Response) -> tuple[list[dict[str, t.Any]], dict[str, t.Any] | None]:
-            if resp.is_success:
-                if resp.headers.get("content-type", "").startswith("application/json"):
-                    if data := json.loads(resp.text):
-                        result = deserializer(data, section)
-                        if continue_params := continuer(params, data, section):
-                            params.update(continue_params)
-                            return result, params
-                        return result, None
-                else:
-                    resp.status_code = 403
-                resp.status_code = 400
-            resp.raise_for_status()
-            raise RuntimeError("Unreachable")
+        pipeline = self.__instrument.pipeline("request", path=path)
 
-        while True:
-            resp = await self._client.get(
-                path, params=dict((key, value) for key, value in params.items() if not (key == "start" and value < 0))
-            )
-            data, params = process_response(resp)
-            for rec in data:
-                yield rec
-            if params:
-                await asyncio.sleep(self.__idle_timeout)
-                continue
-            break
+        async def records(pages: t.AsyncIterable[dict[str, t.Any]]) -> AsyncIterator[dict[str, t.Any]]:
+            count = 0
+            async for data in pages:
+                for rec in deserializer(data, section):
+                    if max_records is not None and count >= max_records:
+                        return
+                    count += 1
+                    yield rec
+
+        pages = pipeline.stage(self._pages(path, section, continuer, read_ahead, parameters, max_records), "pages")
+        async for rec in pipeline.stage(records(pages), "deserialize"):
+            yield rec
+
+    async def request_pages(
+        self,
+        path: str,
+        section: str | None = None,
+        continuer: t.Callable[[dict[str, t.Any], dict[str, t.Any], str], dict[str, t.Any]] | None = None,
+        *,
+        read_ahead: int | None = None,
+        columns: Iterable[str] | None = None,
+        sections: Iterable[str] | None = None,
+        max_records: int | None = None,
+        **parameters: t.Any,
+    ) -> AsyncIterator[Block]:
+        """
+        Запрос данных постранично в колоночном представлении.
+
+        Параметры те же что и у `ISSClient.request`, но вместо словаря на каждую запись выдается один `Block` на
+        страницу ответа.
+
+        Returns:
+            Асинхронный итератор возвращающий блоки записей, по одному на страницу.
+        """
+        section = section or section_from(path)
+        if columns is not None or sections is not None:
+            parameters = dict(projection(section, columns, sections), **parameters)
+        pipeline = self.__instrument.pipeline("request_pages", path=path)
+        pages = self._pages(path, section, continuer, read_ahead, parameters, max_records)
+        async for data in pipeline.stage(pages, "pages"):
+            if data_ := section_of(data, section):
+                if max_records is not None:
+                    data_ = dict(data_, data=data_["data"][:max_records])
+                    max_records -= len(data_["data"])
+                yield Block.from_rows(data_["columns"], data_["data"])
+                if max_records is not None and max_records <= 0:
+                    break
+
+    async def get_json(self, url: str, **parameters: t.Any) -> t.Any:
+        """
+        Запрашивает JSON документ по полному URL, например с сайта moex.com, с общими для клиента ограничением
+        частоты запросов к хосту и повторами.
+        """
+        return await self._fetch(url, parameters)
 
     async def get_security(self, secid: str) -> dict[str, t.Any] | None:
         """
@@ -148,7 +568,13 @@ class ISSClient:
                     result.append(dict(data, **boards[0]))
             return result
 
-        if found := [s async for s in self.request(f"securities/{secid}", "*", deserializer, start=-1)]:
+        # Из описания нужны только названия и значения полей
+        params = {"description.columns": "name,value"}
+        sections = ("description", "boards")
+        if found := [
+            s
+            async for s in self.request(f"securities/{secid}", "*", deserializer, sections=sections, start=-1, **params)
+        ]:
             return found[0]
         return None
 
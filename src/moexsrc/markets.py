@@ -1,12 +1,14 @@
 import typing as t
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Iterable
+from datetime import date, datetime
 
 from moexsrc.assets import Asset
-from moexsrc.resolver import ALIASES, resolve_desc, resolve_alias, NO_SECTYPE
+from moexsrc.resolver import ALIASES, resolve_desc, resolve_alias, get_board, bind, NO_SECTYPE
+from moexsrc.secindex import BoardIndex
 from moexsrc.session import SessionCtx
-from moexsrc.tickers import Ticker
-from moexsrc.types import TickerFilter, AssetFilter
-from moexsrc.utils import extract
+from moexsrc.tickers import Ticker, candles_many
+from moexsrc.types import Block, Candle, Period, Snapshot, Timeframe, TickerFilter, AssetFilter
+from moexsrc.utils import extract, rollup
 
 
 class Market:
@@ -31,37 +33,97 @@ class Market:
     def __str__(self) -> str:
         return repr(self)
 
-    def get_tickers(self, **filter: t.Unpack[TickerFilter]) -> AsyncIterator[Ticker]:
-        """Асинхронный итератор возвращающий инструменты рынка."""
-        return self._get_tickers(**filter)
+    def get_tickers(
+        self, *, columns: Iterable[str] | None = None, **filter: t.Unpack[TickerFilter]
+    ) -> AsyncIterator[Ticker]:
+        """
+        Асинхронный итератор возвращающий инструменты рынка.
+
+        Args:
+            columns: Какие поля списка инструментов (`SECID`, `BOARDID` и поля `filter` всегда) запрашивать у ISS,
+                     если список доски еще не загружен в индекс сессии; по умолчанию все.
+            filter: Отбор инструментов по полям списка.
+        """
+        return self._get_tickers(columns, **filter)
 
     def get_assets(self, *assetcodes: str, **filter: t.Unpack[AssetFilter]) -> AsyncIterator[Asset]:
         """Асинхронный итератор возвращающий активы контрактов срочного рынка."""
         return self._get_assets(*assetcodes, **filter)
 
-    async def _get_tickers(self, **filter: t.Unpack[TickerFilter]) -> AsyncIterator[Ticker]:
+    async def candles(
+        self,
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
+        /,
+        *,
+        begin: str | date | datetime | None = None,
+        end: str | date | datetime | None = None,
+        ordered: bool = True,
+        concurrency: int = 8,
+        **filter: t.Unpack[TickerFilter],
+    ) -> AsyncIterator[Candle]:
+        """
+        Данные для "Свечного графика" инструментов рынка, загружаемые одновременно.
+
+        Args:
+            period: Период свечи, по умолчанию "10min"
+            begin: Начиная с какого времени выдать данные
+            end: По какое времени выдать данные
+            ordered: Выдавать свечи всех инструментов упорядоченными по началу, иначе по мере загрузки.
+            concurrency: Сколько инструментов загружается одновременно.
+            filter: Отбор инструментов как в `Market.get_tickers`.
+        """
+        tickers = await rollup(self._get_tickers(**filter))
+        async for item in candles_many(tickers, period, begin=begin, end=end, ordered=ordered, concurrency=concurrency):
+            yield item
+
+    async def snapshot(self, *columns: str) -> Snapshot:
+        """
+        Данные торгов (секция `marketdata`) всех инструментов доски одним запросом.
+
+        Args:
+            columns: Колонки секции, по умолчанию все.
+
+        Returns:
+            Колоночная таблица с записями по `secid`, сравнивается с предыдущей через `Snapshot.diff`.
+        """
         engine, market, boardid = extract(self._desc, "engine", "market", "boardid")
         path = f"engines/{engine}/markets/{market}/boards/{boardid}/securities.json"
-        async for short in self._ctx.client.request(path, "securities", start=-1):
-            short = dict((k.lower(), v) for k, v in short.items())
-            if not filter or all(short.get(k) == v for k, v in filter.items()):
-                ticker = Ticker(self._ctx, short["secid"])
-                ticker._desc.update(short)
-                yield ticker
+        params: dict[str, t.Any] = {"iss.only": "marketdata", "start": -1}
+        if columns:
+            params["marketdata.columns"] = ",".join(dict.fromkeys(["SECID", *(c.upper() for c in columns)]))
+        pages = await rollup(self._ctx.client.request_pages(path, "marketdata", **params))
+        return Snapshot((column.lower(), values) for column, values in Block.concat(pages).items())
+
+    async def _get_tickers(
+        self, columns: Iterable[str] | None = None, **filter: t.Unpack[TickerFilter]
+    ) -> AsyncIterator[Ticker]:
+        engine, market, boardid = extract(self._desc, "engine", "market", "boardid")
+        index = self._ctx.index
+        if columns is None or (index is not None and index.get((engine, market, boardid)) is not None):
+            board = await get_board(self._ctx, engine, market, boardid)
+        else:
+            # Сокращенный список запрашивается отдельно и в общий индекс сессии не попадает
+            path = f"engines/{engine}/markets/{market}/boards/{boardid}/securities.json"
+            keys = (key.upper() for key in filter if key not in ("engine", "market"))
+            columns = list(dict.fromkeys(["SECID", "BOARDID", *(column.upper() for column in columns), *keys]))
+            rows = await rollup(self._ctx.client.request(path, "securities", columns=columns, start=-1))
+            board = BoardIndex((engine, market, boardid), rows)
+        for row in board.find(**filter):
+            ticker = Ticker(self._ctx, row["secid"])
+            bind(ticker, row)
+            yield ticker
 
     async def _get_assets(self, *assetcodes: str, **filter: t.Unpack[AssetFilter]) -> AsyncIterator[Asset]:
-        assets: dict[str, list[Ticker]] = dict()
         engine, market, boardid = extract(self._desc, "engine", "market", "boardid")
         if engine != "futures":
             raise NotImplementedError("This method is not implemented for this market.")
-
-        async for ticker in self._get_tickers(**filter):
-            if not assetcodes or ticker._desc["assetcode"] in assetcodes:
-                assets.setdefault(ticker._desc["assetcode"], []).append(ticker)
-
-        for assetcode, tickers in assets.items():
-            asset = Asset(self._ctx, assetcode)
-            symbol = tickers[0].symbol
-            asset._desc.update(engine=engine, sectype=(symbol if symbol in NO_SECTYPE else symbol[:2]))
-            asset._tickers = tickers
-            yield asset
+        # Списки инструментов доски не содержат признака торгуемости, все они считаются торгуемыми
+        if not filter.pop("is_traded", True):
+            return
+        board = await get_board(self._ctx, engine, market, boardid)
+        for assetcode in assetcodes or board.values("assetcode"):
+            if rows := board.find(assetcode=assetcode, **filter):
+                asset = Asset(self._ctx, assetcode)
+                symbol = rows[0]["secid"]
+                asset._desc.update(engine=engine, sectype=(symbol if symbol in NO_SECTYPE else symbol[:2]))
+                yield asset
@@ -0,0 +1,53 @@
+import json
+import os
+import sqlite3
+import time
+import typing as t
+from collections.abc import Awaitable, Callable
+
+
+class MetaCache:
+    """
+    Кэш метаданных инструментов (описаний инструментов и списков инструментов рынков).
+
+    По умолчанию живет в памяти в пределах сессии, если задан путь к файлу то сохраняется между запусками.
+    """
+
+    def __init__(self, path: str | os.PathLike = ":memory:", ttl: float = 12 * 3600):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT, stamp REAL)")
+        self._ttl = ttl
+
+    @property
+    def ttl(self) -> float:
+        """Время жизни записи в секундах."""
+        return self._ttl
+
+    def close(self) -> None:
+        """Закрывает кэш."""
+        self._db.close()
+
+    def get(self, key: str, ttl: float | None = None) -> t.Any | None:
+        """Возвращает значение по ключу, или `None` если его нет или оно старше `ttl` (по умолчанию `self.ttl`)."""
+        row = self._db.execute("SELECT value, stamp FROM meta WHERE key=?", (key,)).fetchone()
+        if row is not None and time.time() - row[1] < (self._ttl if ttl is None else ttl):
+            return json.loads(row[0])
+        return None
+
+    def set(self, key: str, value: t.Any) -> None:
+        """Сохраняет значение по ключу."""
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?)", (key, json.dumps(value), time.time()))
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        with self._db:
+            self._db.execute("DELETE FROM meta")
+
+    async def fetch[T](self, key: str, factory: Callable[[], Awaitable[T]], ttl: float | None = None) -> T:
+        """Возвращает значение по ключу, если его нет получает его из `factory` и сохраняет (кроме `None`)."""
+        if (value := self.get(key, ttl)) is None:
+            if (value := await factory()) is not None:
+                self.set(key, value)
+        return value
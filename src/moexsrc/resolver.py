@@ -1,5 +1,8 @@
 import typing as t
+from collections import ChainMap
+from collections.abc import MutableMapping
 
+from moexsrc.secindex import BoardIndex
 from moexsrc.session import SessionCtx
 from moexsrc.utils import extract, rollup
 
@@ -31,29 +34,81 @@ def resolve_alias(alias: str) -> dict[str, t.Any]:
 
 
 class HasDesc(t.Protocol):
-    _desc: dict[str, t.Any]
+    _desc: MutableMapping[str, t.Any]
 
 
 NO_SECTYPE = ("CNYRUBF", "EURRUBF", "GAZPF", "GLDRUBF", "IMOEXF", "SBERF", "USDRUBF")  # исключения для тикера FutOI
 
 
+async def get_security(ctx: SessionCtx, secid: str) -> dict[str, t.Any] | None:
+    """Описание инструмента через кэш метаданных сессии."""
+    if ctx.meta is None:
+        return await ctx.client.get_security(secid)
+    return await ctx.meta.fetch(f"security/{secid}", lambda: ctx.client.get_security(secid))
+
+
+async def get_securities(ctx: SessionCtx, path: str, ttl: float | None = None) -> list[dict[str, t.Any]]:
+    """
+    Список инструментов рынка (секция `securities`, первая страница) через кэш метаданных сессии.
+
+    Списки содержат и цены прошлой сессии (`PREVPRICE` и т.п.), поэтому живут в кэше `ttl` секунд, обычно меньше
+    описаний инструментов.
+    """
+    if ctx.meta is None:
+        return await rollup(ctx.client.request(path, "securities", start=-1))
+    return await ctx.meta.fetch(path, lambda: rollup(ctx.client.request(path, "securities", start=-1)), ttl)
+
+
+async def get_board(ctx: SessionCtx, engine: str, market: str, boardid: str) -> BoardIndex:
+    """
+    Индекс инструментов доски из общего индекса сессии, при отсутствии загружается одним запросом.
+
+    Args:
+        ctx: Контекст сессии.
+        engine: Торговая система.
+        market: Рынок.
+        boardid: Режим торгов.
+    """
+    board = (engine, market, boardid)
+    if ctx.index is not None and (index := ctx.index.get(board)) is not None:
+        return index
+    path = f"engines/{engine}/markets/{market}/boards/{boardid}/securities.json"
+    if ctx.index is not None and ctx.index.stale(board) and ctx.meta is not None:
+        rows = await rollup(ctx.client.request(path, "securities", start=-1))
+        ctx.meta.set(path, rows)
+    else:
+        rows = await get_securities(ctx, path, ctx.index.ttl if ctx.index is not None else None)
+    index = BoardIndex(board, rows)
+    if ctx.index is not None:
+        ctx.index.put(index)
+    return index
+
+
+def bind(hd: HasDesc, row: dict[str, t.Any]) -> None:
+    """Связывает описание со строкой индекса доски без копирования, собственные значения пишутся поверх нее."""
+    local = hd._desc.maps[0] if isinstance(hd._desc, ChainMap) else hd._desc
+    hd._desc = ChainMap(local, row)
+
+
 async def resolve_path(ctx: SessionCtx, hd: HasDesc, topic: str) -> str | None:
     symbol = None
     assetcode, secid = extract(hd._desc, "assetcode", "secid")
     if secid is not None:
         # Ticker
-        if security := await ctx.client.get_security(secid):
-            hd._desc.update(security)
-        else:
-            return None
+        if not all(extract(hd._desc, "engine", "market", "boardid")):
+            if security := await get_security(ctx, secid):
+                hd._desc.update(security)
+            else:
+                return None
         symbol = secid
     else:
         if assetcode is not None:
             # Asset
-            tickers = await rollup(hd._get_tickers())
-            symbol = tickers[0].symbol
-            if symbol not in NO_SECTYPE:
-                symbol = symbol[:2]
+            if (symbol := hd._desc.get("sectype")) is None:
+                tickers = await rollup(hd._get_tickers())
+                symbol = tickers[0].symbol
+                if symbol not in NO_SECTYPE:
+                    symbol = symbol[:2]
     match topic:
         case "candles":
             if secid:
@@ -66,3 +121,36 @@ async def resolve_path(ctx: SessionCtx, hd: HasDesc, topic: str) -> str | None:
             return None
         case _:
             raise ValueError(f"Unknown topic: {topic}")
+
+
+async def resolve_many(ctx: SessionCtx, *objects: HasDesc) -> None:
+    """
+    Заполняет описания множества инструментов и активов.
+
+    Инструменты ищутся в индексах досок из `ALIASES`, по одному запросу на доску, и только не найденные там
+    запрашиваются по отдельности. Активы получают свои инструменты из общего индекса доски FORTS.
+
+    Args:
+        ctx: Контекст сессии.
+        objects: Экземпляры `Ticker` и `Asset`.
+    """
+    pending: dict[str, list[HasDesc]] = dict()
+    for hd in objects:
+        if (secid := hd._desc.get("secid")) is not None and not all(extract(hd._desc, "engine", "market", "boardid")):
+            pending.setdefault(secid, []).append(hd)
+    for engine, market, boardid in ALIASES.keys():
+        if not pending:
+            break
+        board = await get_board(ctx, engine, market, boardid)
+        for secid in list(pending):
+            if (row := board.get(secid)) is not None:
+                for hd in pending.pop(secid):
+                    bind(hd, row)
+    for secid, found in pending.items():
+        if security := await get_security(ctx, secid):
+            for hd in found:
+                hd._desc.update(security)
+
+    for hd in objects:
+        if "secid" not in hd._desc and "assetcode" in hd._desc and "sectype" not in hd._desc:
+            await rollup(hd._get_tickers())
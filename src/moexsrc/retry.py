@@ -0,0 +1,142 @@
+import asyncio
+import random
+import time
+import typing as t
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+
+class CircuitOpenError(Exception):
+    """Запросы временно прекращены после серии неудачных попыток."""
+
+
+class RetryPolicy(t.NamedTuple):
+    """
+    Политика повторов запросов: экспоненциальная задержка со случайным разбросом.
+
+    Args:
+        attempts: Максимальное количество попыток.
+        backoff: Задержка перед второй попыткой в секундах, далее удваивается.
+        max_backoff: Максимальная задержка в секундах.
+        jitter: Доля задержки на которую она случайно уменьшается.
+        statuses: Коды HTTP ответов после которых запрос повторяется.
+    """
+
+    attempts: int = 4
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    jitter: float = 0.5
+    statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def delay(self, attempt: int) -> float:
+        """Задержка после неудачной попытки с номером `attempt`, начиная с нуля."""
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """Следует ли повторить запрос завершившийся исключением `exc`."""
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.statuses
+        return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель: после `threshold` неудачных попыток подряд запросы отклоняются `reset_timeout` секунд,
+    после чего пропускается пробный запрос.
+    """
+
+    def __init__(self, threshold: int = 8, reset_timeout: float = 30.0):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Отклоняются ли запросы в данный момент."""
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self._reset_timeout
+
+    def check(self) -> None:
+        """Вызывает `CircuitOpenError` если запросы отклоняются."""
+        if self.is_open:
+            raise CircuitOpenError(f"Too many failed requests, paused for {self._reset_timeout}s")
+
+    def success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._threshold:
+            self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Скользящая статистика длительности запросов."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._min_samples = min_samples
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def quantile(self, q: float = 0.95) -> float | None:
+        """Квантиль длительности, или `None` если данных пока недостаточно."""
+        if len(self._samples) < self._min_samples:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def retrying[T](
+    policy: RetryPolicy, call: Callable[[], Awaitable[T]], breaker: CircuitBreaker | None = None
+) -> T:
+    """Выполняет `call` с повторами согласно `policy`."""
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.check()
+        try:
+            result = await call()
+        except Exception as exc:
+            if not policy.is_retryable(exc):
+                raise
+            if breaker is not None:
+                breaker.failure()
+            if (attempt := attempt + 1) >= policy.attempts:
+                raise
+            await asyncio.sleep(policy.delay(attempt - 1))
+        else:
+            if breaker is not None:
+                breaker.success()
+            return result
+
+
+async def hedged[T](call: Callable[[], Awaitable[T]], tracker: LatencyTracker) -> T:
+    """
+    Выполняет `call`, и если он длится дольше 95-го перцентиля наблюдаемой длительности, запускает дубликат.
+    Возвращает первый успешный результат.
+    """
+    started = time.monotonic()
+    tasks = {asyncio.ensure_future(call())}
+    try:
+        if (threshold := tracker.quantile()) is not None:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done:
+                tasks.add(asyncio.ensure_future(call()))
+        error: BaseException | None = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    tracker.add(time.monotonic() - started)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import typing as t
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+
+import httpx
+
+from moexsrc.issclient import ISSClientError
+from moexsrc.resolver import resolve_many
+from moexsrc.retry import CircuitOpenError
+from moexsrc.session import SessionCtx
+from moexsrc.tickers import Ticker
+from moexsrc.types import MSK, Period, Timeframe
+from moexsrc.utils import Failure, extract, rollup
+
+SECURITIES_LIMIT = 10  # больше инструментов в параметре `securities` ISS не принимает, запрашивается вся доска
+REQUEST_ERRORS = (httpx.HTTPError, ISSClientError, CircuitOpenError)  # ошибки запроса, опрос повторится позже
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(AsyncIterator[dict[str, t.Any]]):
+    """
+    Подписка на данные торгов инструмента: асинхронный итератор по строкам секции `marketdata` его доски,
+    получаемым на закрытии каждой свечи периода подписки. Ошибка запроса возбуждается итератором, подписка при этом
+    сохраняется и итерацию можно продолжить.
+    """
+
+    def __init__(self, scheduler: "Scheduler", ticker: Ticker, timeframe: Timeframe, due: datetime):
+        self.ticker = ticker
+        self.timeframe = timeframe
+        self.due = due
+        self._scheduler = scheduler
+        self._queue: asyncio.Queue[t.Any] = asyncio.Queue()
+
+    def __repr__(self) -> str:
+        return f'Subscription("{self.ticker.symbol}", "{self.timeframe.literal}")'
+
+    async def __anext__(self) -> dict[str, t.Any]:
+        item = await self._queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Failure):
+            raise item.exc
+        return item
+
+    def cancel(self) -> None:
+        """Отменяет подписку."""
+        self._scheduler.unsubscribe(self)
+
+
+class Scheduler:
+    """
+    Планировщик опроса данных торгов для множества подписок.
+
+    Подписки на закрывающиеся одновременно свечи сводятся в один запрос `marketdata` на доску, результат которого
+    раздается подписчикам. Запросы идут через клиент сессии и подчиняются его ограничению частоты, первыми
+    выполняются запросы подписок чьи свечи закрылись раньше.
+
+    Args:
+        ctx: Контекст сессии.
+        lag: Сколько секунд после закрытия свечи выждать перед опросом.
+    """
+
+    def __init__(self, ctx: SessionCtx, *, lag: float = 1.0):
+        self._ctx = ctx
+        self._lag = timedelta(seconds=lag)
+        self._subscriptions: list[Subscription] = list()
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> t.Self:
+        self._task = asyncio.create_task(self.run())
+        return self
+
+    async def __aexit__(self, *args: t.Any) -> bool:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+        return False
+
+    @property
+    def subscriptions(self) -> list[Subscription]:
+        """Действующие подписки."""
+        return list(self._subscriptions)
+
+    def subscribe(
+        self,
+        ticker: Ticker,
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "1min",
+    ) -> Subscription:
+        """
+        Подписывается на данные торгов инструмента на закрытии свечей периода `period`.
+
+        Args:
+            ticker: Инструмент.
+            period: Период свечи, по умолчанию "1min"
+        """
+        timeframe = Timeframe.parse(period)
+        subscription = Subscription(self, ticker, timeframe, timeframe.closes(self._now()) + self._lag)
+        self._subscriptions.append(subscription)
+        self._changed.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Отменяет подписку и завершает ее итератор."""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            subscription._queue.put_nowait(None)
+            self._changed.set()
+
+    async def run(self) -> None:
+        """Выполняет опрос пока не будет отменен."""
+        while True:
+            self._changed.clear()
+            if self._subscriptions:
+                delay = (min(item.due for item in self._subscriptions) - self._now()).total_seconds()
+                if delay <= 0:
+                    try:
+                        await self.tick()
+                    except Exception:
+                        # Сбой опроса не должен завершать `run`, иначе подписчики будут ждать данных вечно
+                        logger.exception("Scheduler tick failed")
+                    continue
+            else:
+                delay = None
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except TimeoutError:
+                pass
+
+    async def tick(self) -> None:
+        """Опрашивает доски подписок чьи свечи закрылись и раздает результат подписчикам."""
+        moment = self._now()
+        due = [item for item in self._subscriptions if item.due <= moment]
+        for subscription in due:
+            subscription.due = subscription.timeframe.closes(moment) + self._lag
+        tickers = set(item.ticker for item in due)
+        failed: dict[Ticker, Exception] = dict()
+        try:
+            await resolve_many(self._ctx, *tickers)
+        except REQUEST_ERRORS:
+            # Инструменты разрешаются по одному, чтобы ошибка одного не задела остальные
+            for ticker in tickers:
+                try:
+                    await resolve_many(self._ctx, ticker)
+                except REQUEST_ERRORS as exc:
+                    failed[ticker] = exc
+        boards: dict[tuple[str, str, str], list[Subscription]] = dict()
+        for subscription in due:
+            board = extract(subscription.ticker._desc, "engine", "market", "boardid")
+            if (exc := failed.get(subscription.ticker)) is not None:
+                subscription._queue.put_nowait(Failure(exc))
+            elif not all(board):
+                # Описание инструмента не найдено, опрашивать нечего
+                subscription._queue.put_nowait(
+                    Failure(ISSClientError(f"Unknown security: {subscription.ticker.symbol}"))
+                )
+                self.unsubscribe(subscription)
+            else:
+                boards.setdefault(board, list()).append(subscription)
+        # Запросы начинаются в порядке закрытия свечей, ограничитель частоты клиента сохраняет этот порядок
+        ordered = sorted(boards.items(), key=lambda item: min(subscription.due for subscription in item[1]))
+        await asyncio.gather(*(self._poll(board, subscriptions) for board, subscriptions in ordered))
+
+    async def _poll(self, board: tuple[str, str, str], subscriptions: list[Subscription]) -> None:
+        engine, market, boardid = board
+        path = f"engines/{engine}/markets/{market}/boards/{boardid}/securities.json"
+        params: dict[str, t.Any] = {"iss.only": "marketdata", "start": -1}
+        secids = sorted(set(item.ticker.symbol for item in subscriptions))
+        if len(secids) <= SECURITIES_LIMIT:
+            params["securities"] = ",".join(secids)
+        try:
+            rows = await rollup(self._ctx.client.request(path, "marketdata", **params))
+        except REQUEST_ERRORS as exc:
+            # Подписки сохраняются, доска будет опрошена на закрытии следующей свечи
+            for subscription in subscriptions:
+                subscription._queue.put_nowait(Failure(exc))
+            return
+        rows = dict((row["SECID"], row) for row in rows if row["SECID"] in secids)
+        for subscription in subscriptions:
+            if (row := rows.get(subscription.ticker.symbol)) is not None:
+                row = dict((k.lower(), v) for k, v in row.items())
+                subscription._queue.put_nowait(dict(row, period=subscription.timeframe.period))
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(MSK).replace(tzinfo=None)
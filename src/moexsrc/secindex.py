@@ -0,0 +1,95 @@
+import time
+import typing as t
+from collections.abc import Iterable
+
+INDEXED = ("secid", "assetcode", "isin", "sectype")  # поля по которым строятся индексы
+
+type Board = tuple[str, str, str]
+
+
+class BoardIndex:
+    """
+    Индекс инструментов доски: по одной строке на инструмент, с ключами в нижнем регистре, `engine` и `market`.
+
+    Строки общие для всех `Ticker` этой доски, изменять их нельзя.
+
+    Args:
+        board: Площадка (engine, market, boardid).
+        rows: Строки секции `securities` списка инструментов доски.
+    """
+
+    def __init__(self, board: Board, rows: Iterable[dict[str, t.Any]]):
+        engine, market, _ = board
+        self.board = board
+        self.stamp = time.monotonic()
+        self.rows = [dict(((k.lower(), v) for k, v in row.items()), engine=engine, market=market) for row in rows]
+        self._index: dict[str, dict[t.Any, list[dict[str, t.Any]]]] = dict((field, dict()) for field in INDEXED)
+        for row in self.rows:
+            for field, index in self._index.items():
+                if (value := row.get(field)) is not None:
+                    index.setdefault(value, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, secid: str) -> dict[str, t.Any] | None:
+        """Строка инструмента `secid`, или `None` если его нет на доске."""
+        if rows := self._index["secid"].get(secid):
+            return rows[0]
+        return None
+
+    def find(self, **filter: t.Any) -> list[dict[str, t.Any]]:
+        """Строки совпадающие с `filter`, отбор по `secid`, `assetcode`, `isin` и `sectype` идет по индексу."""
+        rows = self.rows
+        for field in INDEXED:
+            if field in filter:
+                rows = self._index[field].get(filter[field], [])
+                break
+        if not filter:
+            return list(rows)
+        return [row for row in rows if all(row.get(k) == v for k, v in filter.items())]
+
+    def values(self, field: str) -> list[t.Any]:
+        """Значения индексированного поля в порядке первого появления, например все `assetcode` доски."""
+        return list(self._index[field].keys())
+
+
+class SecurityIndex:
+    """
+    Общие для сессии индексы инструментов досок. Индекс доски загружается одним запросом при первом обращении и
+    обновляется по истечении `ttl` или после `refresh`.
+
+    Args:
+        ttl: Время жизни индекса доски в секундах.
+    """
+
+    def __init__(self, ttl: float = 12 * 3600):
+        self._ttl = ttl
+        self._boards: dict[Board, BoardIndex] = dict()
+        self._stale: set[Board] = set()
+
+    @property
+    def ttl(self) -> float:
+        """Время жизни индекса доски в секундах."""
+        return self._ttl
+
+    def get(self, board: Board) -> BoardIndex | None:
+        """Индекс доски, или `None` если он не загружен или устарел."""
+        if (index := self._boards.get(board)) is not None and time.monotonic() - index.stamp < self._ttl:
+            return index
+        return None
+
+    def put(self, index: BoardIndex) -> None:
+        """Сохраняет индекс доски."""
+        self._boards[index.board] = index
+        self._stale.discard(index.board)
+
+    def stale(self, board: Board) -> bool:
+        """Сброшен ли индекс доски через `refresh` и еще не загружен заново, тогда кэш метаданных пропускается."""
+        return board in self._stale
+
+    def refresh(self, *boards: Board) -> None:
+        """Сбрасывает индексы досок `boards`, по умолчанию всех, они загрузятся заново при следующем обращении."""
+        for board in boards or list(self._boards):
+            self._boards.pop(board, None)
+            self._stale.add(board)
@@ -1,47 +1,226 @@
+import asyncio
+import os
+import threading
 import typing as t
+import weakref
+
+import httpx
 
 import moexsrc.issclient
+from moexsrc.candlestore import CandleStore
+from moexsrc.httpcache import ResponseCache
+from moexsrc.instrument import Instrumentation
+from moexsrc.metacache import MetaCache
+from moexsrc.secindex import SecurityIndex
 
 TOKEN: str | None = None
 BASE_URL: str | None = None
 REQUEST_TIMEOUT = 60
 IDLE_TIMEOUT = 0.1
+RATE_LIMIT: float | dict[str, float] | None = None
+CANDLE_STORE: str | os.PathLike | None = None
+META_CACHE: str | os.PathLike | None = ":memory:"
+META_TTL = 12 * 3600
+LIST_TTL = 15 * 60
+HTTP_CACHE: str | os.PathLike | None = None
+
+CLIENT_OPTIONS = (
+    "request_timeout",
+    "idle_timeout",
+    "rate_limit",
+    "transport",
+    "instrument",
+    "cache",
+    "max_connections",
+    "keepalive_expiry",
+    "http2",
+)  # параметры сессии передаваемые `ISSClient`
+
+TRANSPORT: httpx.AsyncBaseTransport | None = None
 
-_current = dict()
+_current = dict()  # общие для всех контекстов `ctx` кэши, индекс инструментов и ограничители частоты
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, moexsrc.issclient.ISSClient] = (
+    weakref.WeakKeyDictionary()
+)  # клиенты `ctx` по циклам событий
+_thread = threading.local()  # клиент `ctx` потока, обращающегося к нему вне цикла событий
+_lock = threading.RLock()
+_closing: set[asyncio.Task] = set()  # задачи закрытия клиентов сессий, завершенных через `with`
 
 
 class SessionCtx(t.NamedTuple):
     client: moexsrc.issclient.ISSClient
+    store: CandleStore | None = None
+    meta: MetaCache | None = None
+    index: SecurityIndex | None = None
 
 
 def __getattr__(name):
     match name:
         case "ctx":
-            if "client" not in _current:
-                _current["client"] = moexsrc.issclient.ISSClient(TOKEN, BASE_URL)
-            return SessionCtx(**_current)
+            return _context()
         case _:
             raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
+def _context() -> SessionCtx:
+    """
+    Контекст `ctx`: свой клиент ISS для каждого цикла событий, а вне цикла событий для каждого потока, с общими
+    кэшами, индексом инструментов и ограничителями частоты, так что все клиенты делят один бюджет запросов.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        if "index" not in _current:
+            _current["meta"] = MetaCache(META_CACHE, META_TTL) if META_CACHE is not None else None
+            _current["index"] = SecurityIndex(LIST_TTL)
+            _current["limiters"] = dict()
+            if CANDLE_STORE is not None:
+                _current["store"] = CandleStore(CANDLE_STORE)
+            if HTTP_CACHE is not None:
+                _current["cache"] = ResponseCache(HTTP_CACHE)
+        client = _clients.get(loop) if loop is not None else getattr(_thread, "client", None)
+        if client is None or client.closed:
+            client = moexsrc.issclient.ISSClient(
+                TOKEN,
+                BASE_URL,
+                rate_limit=RATE_LIMIT,
+                transport=TRANSPORT,
+                cache=_current.get("cache"),
+                limiters=_current["limiters"],
+            )
+            if loop is not None:
+                _clients[loop] = client
+            else:
+                _thread.client = client
+        return SessionCtx(client, _current.get("store"), _current["meta"], _current["index"])
+
+
+def _reset() -> None:
+    """Забывает клиенты и общие кэши `ctx` не закрывая их, например в дочернем процессе после `fork`."""
+    global _clients, _thread
+    with _lock:
+        _current.clear()
+        _clients = weakref.WeakKeyDictionary()
+        _thread = threading.local()
+
+
+os.register_at_fork(after_in_child=_reset)
+
+
+async def aclose() -> None:
+    """Закрывает клиент `ctx` текущего цикла событий, при следующем обращении он создается заново."""
+    with _lock:
+        client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 class Session:
     """
-    Класс реализует сессию подключения к источнику данных
+    Класс реализует сессию подключения к источнику данных.
+
+    Сессия владеет одним клиентом ISS с пулом соединений, который закрывается при выходе из `async with`. Вход через
+    `with` также поддерживается: вне цикла событий клиент закрывается сразу (пул, чей цикл событий уже закрыт,
+    отбрасывается), а внутри него закрытие лишь планируется в текущем цикле.
+
+    Args:
+        meta_cache: Кэш метаданных, путь к его файлу или `":memory:"`; `None` отключает кэш.
+        meta_ttl: Время жизни описаний инструментов в кэше метаданных, в секундах.
+        list_ttl: Время жизни списков инструментов досок в кэше метаданных и индексе, в секундах. Списки содержат
+            цены прошлой сессии, поэтому живут меньше описаний.
+        max_connections: Наибольшее число одновременных соединений пула.
+        keepalive_expiry: Сколько секунд простаивающее соединение остается в пуле.
+        http2: Использовать HTTP/2, чтобы одновременные запросы делили немного соединений; требует пакета `h2`.
     """
 
     def __init__(
-        self, token: str | None = None, base_url: str | None = None, /, request_timeout: float = 60.0, idle_timeout=0.1
+        self,
+        token: str | None = None,
+        base_url: str | None = None,
+        /,
+        request_timeout: float = 60.0,
+        idle_timeout=0.1,
+        rate_limit: float | dict[str, float] | None = None,
+        candle_store: str | os.PathLike | CandleStore | None = None,
+        meta_cache: str | os.PathLike | MetaCache | None = ":memory:",
+        meta_ttl: float = META_TTL,
+        list_ttl: float = LIST_TTL,
+        transport: httpx.AsyncBaseTransport | None = None,
+        instrument: Instrumentation | None = None,
+        http_cache: str | os.PathLike | ResponseCache | None = None,
+        max_connections: int | None = 100,
+        keepalive_expiry: float | None = 5.0,
+        http2: bool = False,
     ) -> None:
         self._token = token or TOKEN
         self._base_url = base_url or BASE_URL
         self._options = dict(
             request_timeout=request_timeout,
             idle_timeout=idle_timeout,
+            rate_limit=rate_limit,
+            candle_store=candle_store,
+            meta_cache=meta_cache,
+            meta_ttl=meta_ttl,
+            list_ttl=list_ttl,
+            transport=transport,
+            instrument=instrument,
+            cache=http_cache,
+            max_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
         )
+        self._ctx: SessionCtx | None = None
+        self._owned: list[t.Any] = list()
 
-    def __enter__(self):
-        kwargs = dict((k, v) for k, v in self._options.items() if k in ("request_timeout", "idle_timeout"))
-        return SessionCtx(client=moexsrc.issclient.ISSClient(self._token, self._base_url, **kwargs))
+    def __enter__(self) -> SessionCtx:
+        return self._open()
 
     def __exit__(self, *exc_info):
+        if self._ctx is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Вне цикла событий пул соединений закрывается в цикле, которому принадлежат его соединения
+                self._ctx.client.close()
+                self._close()
+            else:
+                task = loop.create_task(self._ctx.client.aclose())
+                _closing.add(task)
+                task.add_done_callback(_closing.discard)
+                self._close()
+        return False
+
+    async def __aenter__(self) -> SessionCtx:
+        return self._open()
+
+    async def __aexit__(self, *exc_info):
+        if self._ctx is not None:
+            await self._ctx.client.aclose()
+            self._close()
         return False
+
+    def _open(self) -> SessionCtx:
+        kwargs = dict((k, v) for k, v in self._options.items() if k in CLIENT_OPTIONS)
+        store = self._options["candle_store"]
+        if store is not None and not isinstance(store, CandleStore):
+            store = CandleStore(store)
+            self._owned.append(store)
+        meta = self._options["meta_cache"]
+        if meta is not None and not isinstance(meta, MetaCache):
+            meta = MetaCache(meta, self._options["meta_ttl"])
+            self._owned.append(meta)
+        self._ctx = SessionCtx(
+            client=moexsrc.issclient.ISSClient(self._token, self._base_url, **kwargs),
+            store=store,
+            meta=meta,
+            index=SecurityIndex(self._options["list_ttl"]),
+        )
+        return self._ctx
+
+    def _close(self) -> None:
+        # Созданные сессией хранилища закрываются вместе с ней, переданные извне остаются открытыми
+        while self._owned:
+            self._owned.pop().close()
+        self._ctx = None
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Разбирает заголовок `Retry-After` в секунды, или `None` если он не задан или некорректен."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Асинхронный ограничитель частоты запросов по алгоритму "token bucket".
+
+    Общий для всех корутин, адаптируется к ответам сервера: на 429/503 частота снижается вдвое и запросы
+    приостанавливаются на время `Retry-After`, каждый успешный ответ постепенно возвращает ее к заданной. Один
+    ограничитель может использоваться из нескольких потоков и циклов событий: каждый запрос сразу резервирует
+    свой токен, а дожидается его уже без блокировки. Ответ 429/503 отменяет сделанные резервы, и ожидающие
+    запросы резервируют токены заново по сниженной частоте.
+
+    Args:
+        rate: Максимальная частота запросов в секунду.
+        burst: Сколько запросов может быть начато разом после простоя.
+        min_rate: Частота ниже которой ограничитель не опускается.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.2):
+        self._max_rate = self._rate = rate
+        self._min_rate = min(min_rate, rate)
+        self._burst = self._tokens = burst
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._generation = 0  # номер резервов, увеличивается когда ответ сервера их отменяет
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Текущая частота запросов в секунду."""
+        return self._rate
+
+    async def acquire(self) -> float:
+        """Дожидается разрешения на запрос, возвращает время ожидания в секундах."""
+        waited = 0.0
+        while True:
+            delay, generation = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+            with self._lock:
+                if generation == self._generation:
+                    return waited
+
+    def _reserve(self) -> tuple[float, int]:
+        # Токен резервируется на момент после паузы, возвращает задержку до него и номер резерва
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._paused_until)
+            self._tokens = min(self._burst, self._tokens + (start - self._stamp) * self._rate) - 1
+            self._stamp = start
+            return start - now + max(0.0, -self._tokens / self._rate), self._generation
+
+    def feedback(self, status_code: int, retry_after: str | None = None) -> None:
+        """Учитывает ответ сервера."""
+        with self._lock:
+            if status_code in (429, 503):
+                self._rate = max(self._min_rate, self._rate / 2)
+                # Резервы сделаны по прежней частоте, ожидающие запросы резервируют токены заново
+                self._tokens = 0
+                self._stamp = time.monotonic()
+                self._generation += 1
+                if (pause := parse_retry_after(retry_after)) is None:
+                    pause = 1 / self._rate
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            elif self._rate < self._max_rate:
+                self._rate = min(self._max_rate, self._rate + self._max_rate / 20)
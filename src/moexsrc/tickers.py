@@ -1,12 +1,20 @@
+import asyncio
 import typing as t
-from collections.abc import AsyncIterator
-from datetime import date, datetime
+from collections.abc import AsyncIterator, Iterable
+from datetime import date, datetime, timedelta
 
-from moexsrc._candles import resample_candle, normalize_candles
-from moexsrc.resolver import resolve_path
+from moexsrc._candles import (
+    resample_candle,
+    normalize_candles,
+    normalize_block,
+    resample_blocks,
+    candle_columns,
+    latest_candles,
+)
+from moexsrc.resolver import resolve_path, resolve_many
 from moexsrc.session import SessionCtx
-from moexsrc.types import Period, Candle
-from moexsrc.utils import to_datetime, to_date, limited, rollup, puffup
+from moexsrc.types import MSK, Period, Timeframe, Candle, CandleRecord, Block
+from moexsrc.utils import to_datetime, to_date, limited, extract, chunked, merge, interleave
 
 
 class Ticker:
@@ -31,12 +39,14 @@ class Ticker:
 
     async def candles(
         self,
-        period: Period | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] = "10min",
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
         /,
         *,
         begin: str | date | datetime | None = None,
         end: str | date | datetime | None = None,
         latest: int | None = None,
+        compact: bool = False,
+        columns: Iterable[str] | None = None,
     ) -> AsyncIterator[Candle]:
         """
         Данные для "Свечного графика" по заданным параметрам
@@ -45,16 +55,29 @@ class Ticker:
             period: Период свечи, по умолчанию "10min"
             begin: Начиная с какого времени выдать данные
             end: По какое времени выдать данные
-            latest: Включает вывод последних 1 <= N <= 12 записей отсортированных в обратном порядке
+            latest: Включает вывод последних N записей отсортированных в обратном порядке, страницы запрашиваются от
+                    поздних к ранним, пока не наберется N свечей периода
+            compact: Выдавать компактные записи `CandleRecord` вместо словарей
+            columns: Какие значения свечи ("open", "high", "low", "close", "volume", "value") запрашивать у ISS,
+                     по умолчанию все; `begin` и `end` запрашиваются всегда.
         """
+        columns = candle_columns(columns)
+        if compact and columns is not None:
+            raise ValueError("Compact records require all candle columns")
+        if compact and latest is None:
+            async for block in self.candle_batches(period, begin=begin, end=end):
+                for record in CandleRecord.from_block(block):
+                    yield record
+            return
         path = await resolve_path(self._ctx, self, "candles")
         if path is None:
             raise NotImplementedError("Candles not implemented for this ticker")
-        period = period if isinstance(period, Period) else Period.from_literal(period)
-        params: dict[str, t.Any] = dict(interval=period.value)
+        timeframe = Timeframe.parse(period)
+        period, source = timeframe.period, timeframe.source
+        params: dict[str, t.Any] = dict(interval=source.value)
         if latest is None:
             limit = 0
-            if period.minutes:
+            if source.minutes:
                 begin = to_datetime(begin, "begin")
                 end = to_datetime(end, "end")
             else:
@@ -62,25 +85,177 @@ class Ticker:
                 end = to_date(end)
             params.update({"from": begin.isoformat(), "till": end.isoformat()})
         else:
-            if not (1 <= latest <= 12):
-                raise ValueError("Value for latest must be between 1 and 12")
+            if latest < 1:
+                raise ValueError("Value for latest must be positive")
             limit = latest
             params["iss.reverse"] = "true"
-        if period is Period.FIVE_MINUTES:
-            params["interval"] = 1
 
         extra = dict((k, v) for k, v in self._desc.items() if k in ("assetcode", "secid"))
-        aiter_ = normalize_candles(self._ctx.client.request(path, "candles", **params), **extra, period=period)
-        if period is Period.FIVE_MINUTES:
+        pipeline = self._ctx.client.instrument.pipeline("candles", secid=self.symbol, period=timeframe.literal)
+        if latest is not None:
+            # Свеча периода собирается не больше чем из `ratio` свечей источника, дальше страницы не нужны
+            records = latest * timeframe.ratio if source is not period else latest
+            rows = self._ctx.client.request(path, "candles", columns=columns, max_records=records, **params)
+        elif self._ctx.store is not None:
+            # Хранилище держит полные свечи, лишние колонки отбрасываются после чтения
+            secid, boardid = extract(self._desc, "secid", "boardid")
+            rows = self._ctx.store.request(self._ctx.client, path, secid, boardid, **params)
+            if columns is not None:
+                rows = (dict((k, row[k]) for k in columns if k in row) async for row in rows)
+        else:
+            rows = self._ctx.client.request(path, "candles", columns=columns, **params)
+        aiter_ = pipeline.stage(normalize_candles(pipeline.stage(rows, "fetch"), **extra, period=source), "normalize")
+        if source is not period:
             if latest is not None:
-                candles = await rollup(limited(aiter_, (limit + 2) * 5))
-                aiter_ = puffup(reversed(candles))
-                aiter_ = resample_candle(aiter_, period, candles[0]["begin"].date(), candles[0]["end"].date())
-                aiter_ = puffup(reversed(await rollup(aiter_)))
+                aiter_ = pipeline.stage(latest_candles(aiter_, period, latest), "resample")
             else:
-                aiter_ = resample_candle(aiter_, period, begin, end)
+                aiter_ = pipeline.stage(resample_candle(aiter_, period), "resample")
         if limit:
             aiter_ = limited(aiter_, limit)
 
+        series = dict()
         async for item in aiter_:
-            yield item
+            yield CandleRecord.from_mapping(item, series) if compact else item
+
+    async def candle_batches(
+        self,
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
+        /,
+        *,
+        begin: str | date | datetime | None = None,
+        end: str | date | datetime | None = None,
+        columns: Iterable[str] | None = None,
+    ) -> AsyncIterator[Block]:
+        """
+        Данные для "Свечного графика" в колоночном представлении, по блоку на страницу ответа ISS.
+
+        Args:
+            period: Период свечи, по умолчанию "10min"
+            begin: Начиная с какого времени выдать данные
+            end: По какое времени выдать данные
+            columns: Какие значения свечи запрашивать у ISS, как в `Ticker.candles`.
+        """
+        columns = candle_columns(columns)
+        path = await resolve_path(self._ctx, self, "candles")
+        if path is None:
+            raise NotImplementedError("Candles not implemented for this ticker")
+        timeframe = Timeframe.parse(period)
+        period, source = timeframe.period, timeframe.source
+        if source.minutes:
+            begin = to_datetime(begin, "begin")
+            end = to_datetime(end, "end")
+        else:
+            begin = to_date(begin)
+            end = to_date(end)
+        params = {"interval": source.value, "from": begin.isoformat(), "till": end.isoformat()}
+
+        if self._ctx.store is not None:
+            secid, boardid = extract(self._desc, "secid", "boardid")
+            rows = self._ctx.store.request(self._ctx.client, path, secid, boardid, **params)
+            pages = (Block.from_records(chunk, columns) async for chunk in chunked(rows, 500))
+        else:
+            pages = self._ctx.client.request_pages(path, "candles", columns=columns, **params)
+        extra = dict((k, v) for k, v in self._desc.items() if k in ("assetcode", "secid"))
+        pipeline = self._ctx.client.instrument.pipeline("candle_batches", secid=self.symbol, period=timeframe.literal)
+        pages = pipeline.stage(pages, "fetch")
+        blocks = (normalize_block(page, **extra, period=source) async for page in pages if page.nrows)
+        blocks = pipeline.stage(blocks, "normalize")
+        if source is not period:
+            blocks = pipeline.stage(resample_blocks(blocks, period), "resample")
+        async for block in blocks:
+            yield block
+
+    async def watch_candles(
+        self,
+        period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
+        /,
+        *,
+        begin: str | date | datetime | None = None,
+        refresh: float | None = None,
+        lag: float = 1.0,
+    ) -> AsyncIterator[Candle]:
+        """
+        Следит за "Свечным графиком": выдает новые и изменившиеся свечи по мере их появления.
+
+        Каждый опрос запрашивает данные только с начала последней выданной свечи, опросы выравниваются по границам
+        свечей. Еще не закрытая свеча помечается `forming=True`, и выдается повторно при изменении и закрытии.
+
+        Args:
+            period: Период свечи, по умолчанию "10min"
+            begin: Начиная с какого времени выдать данные, по умолчанию с начала текущей свечи
+            refresh: Как часто в секундах обновлять формирующуюся свечу, по умолчанию только на границах свечей
+            lag: Сколько секунд после границы свечи выждать перед опросом, пока биржа ее опубликует
+        """
+        path = await resolve_path(self._ctx, self, "candles")
+        if path is None:
+            raise NotImplementedError("Candles not implemented for this ticker")
+        timeframe = Timeframe.parse(period)
+        period, source = timeframe.period, timeframe.source
+        extra = dict((k, v) for k, v in self._desc.items() if k in ("assetcode", "secid"))
+
+        def now() -> datetime:
+            return datetime.now(MSK).replace(tzinfo=None)
+
+        def is_forming(candle: Candle, moment: datetime) -> bool:
+            end = candle["end"]
+            return moment <= end if isinstance(end, datetime) else moment.date() <= end
+
+        def next_poll(moment: datetime) -> datetime:
+            boundary = timeframe.closes(moment)
+            if refresh is not None:
+                boundary = min(boundary, moment + timedelta(seconds=refresh))
+            return boundary + timedelta(seconds=lag)
+
+        since = to_datetime(timeframe.bounds(to_datetime(begin, "begin") if begin is not None else now())[0], "begin")
+        last: Candle | None = None
+        while True:
+            moment = now()
+            since_ = since.isoformat() if source.minutes else to_date(since).isoformat()
+            rows = self._ctx.client.request(path, "candles", interval=source.value, **{"from": since_})
+            aiter_ = normalize_candles(rows, **extra, period=source)
+            if source is not period:
+                aiter_ = resample_candle(aiter_, period)
+            async for candle in aiter_:
+                candle["forming"] = is_forming(candle, moment)
+                if last is not None and candle["begin"] < last["begin"]:
+                    continue
+                if last is None or candle["begin"] > last["begin"] or candle != last:
+                    yield candle
+                last = candle
+            if last is not None:
+                since = to_datetime(last["begin"], "begin")
+            await asyncio.sleep(max(0.0, (next_poll(moment) - now()).total_seconds()))
+
+
+async def candles_many(
+    tickers: Iterable[Ticker],
+    period: Period | Timeframe | t.Literal["1min", "5min", "10min", "1h", "1D", "1W", "1M"] | str = "10min",
+    /,
+    *,
+    begin: str | date | datetime | None = None,
+    end: str | date | datetime | None = None,
+    ordered: bool = True,
+    concurrency: int = 8,
+) -> AsyncIterator[Candle]:
+    """
+    Данные для "Свечного графика" множества инструментов, загружаемые одновременно.
+
+    Args:
+        tickers: Инструменты.
+        period: Период свечи, по умолчанию "10min"
+        begin: Начиная с какого времени выдать данные
+        end: По какое времени выдать данные
+        ordered: Выдавать свечи всех инструментов упорядоченными по началу, иначе по мере загрузки.
+        concurrency: Сколько инструментов загружается одновременно.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return
+    await resolve_many(tickers[0]._ctx, *tickers)
+    aiters = [ticker.candles(period, begin=begin, end=end) for ticker in tickers]
+    if ordered:
+        aiter_ = merge(aiters, key=lambda item: item["begin"], concurrency=concurrency)
+    else:
+        aiter_ = interleave(aiters, concurrency)
+    async for item in aiter_:
+        yield item
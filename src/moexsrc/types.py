@@ -1,7 +1,10 @@
 import typing as t
-from collections.abc import Sequence
-from datetime import datetime, date
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+import re
+from bisect import bisect_right
+from datetime import datetime, date, time, timedelta, timezone
 from enum import Enum
+from functools import cached_property
 
 
 class TickerFilter(t.TypedDict, total=False):
@@ -81,10 +84,128 @@ class Period(Enum):
         return None
 
 
+MSK = timezone(timedelta(hours=3))  # время биржи
+
+SESSIONS: tuple[time, ...] = (time(10, 0), time(19, 0))  # начала основной и вечерней торговых сессий
+
+
+class Timeframe(t.NamedTuple):
+    """
+    Произвольный период свечей: N минут ("15min"), часов ("4h"), дней ("2D"), недель ("1W"), месяцев ("3M"),
+    или торговая сессия ("S", границы сессий задает `SESSIONS`).
+    """
+
+    count: int
+    unit: t.Literal["min", "h", "D", "W", "M", "S"]
+
+    @classmethod
+    def parse(cls, value: "str | Period | Timeframe") -> "Timeframe":
+        """Создает период из литерала, `Period` или `Timeframe`."""
+        if isinstance(value, Timeframe):
+            return value
+        if isinstance(value, Period):
+            value = value.literal
+        match re.fullmatch(r"(\d*)(min|h|D|d|W|w|M|m|S|s)", value):
+            case None:
+                raise ValueError(f"Invalid period {value}")
+            case match:
+                count, unit = int(match[1] or 1), match[2]
+        unit = unit if unit in ("min", "h") else unit.upper()
+        if count < 1 or (unit in ("min", "h") and (24 * 60) % (count * (60 if unit == "h" else 1))):
+            raise ValueError(f"Invalid period {value}")
+        return cls(count, "S" if unit == "S" else unit)
+
+    @property
+    def literal(self) -> str:
+        return "S" if self.unit == "S" else f"{self.count}{self.unit}"
+
+    @property
+    def minutes(self) -> int | None:
+        """Количество минут в периоде внутри дня, или None если не применимо."""
+        match self.unit:
+            case "min":
+                return self.count
+            case "h":
+                return self.count * 60
+        return None
+
+    @property
+    def period(self) -> "Period | Timeframe":
+        """Соответствующий `Period`, если он есть, иначе сам период."""
+        try:
+            return Period.from_literal(self.literal)
+        except ValueError:
+            return self
+
+    @property
+    def source(self) -> "Period":
+        """Самый крупный интервал ISS из которого можно собрать свечи этого периода."""
+        match self.unit:
+            case "min" | "h":
+                for period in (Period.ONE_HOUR, Period.TEN_MINUTES, Period.ONE_MINUTE):
+                    if self.minutes % period.value == 0:
+                        return period
+            case "D":
+                return Period.ONE_DAY
+            case "W":
+                return Period.ONE_WEEK
+            case "M":
+                return Period.ONE_MONTH
+        return Period.TEN_MINUTES
+
+    @property
+    def ratio(self) -> int:
+        """Наибольшее количество свечей `source` в одной свече этого периода."""
+        match self.unit:
+            case "min" | "h":
+                return self.minutes // self.source.value
+            case "S":
+                return 24 * 60 // self.source.value
+        return self.count
+
+    def bounds(self, value: date | datetime) -> tuple[date | datetime, date | datetime]:
+        """Начало и конец (включительно) свечи этого периода в которую попадает момент `value`."""
+        match self.unit:
+            case "min" | "h":
+                minutes = self.minutes
+                offset = (value.hour * 60 + value.minute) % minutes
+                begin = value - timedelta(minutes=offset, seconds=value.second, microseconds=value.microsecond)
+                return begin, begin + timedelta(minutes=minutes, seconds=-1)
+            case "S":
+                index = bisect_right(SESSIONS, value.time())
+                begin = datetime.combine(value.date(), SESSIONS[index - 1] if index else time.min)
+                if index < len(SESSIONS):
+                    end = datetime.combine(value.date(), SESSIONS[index]) - timedelta(seconds=1)
+                else:
+                    end = datetime.combine(value.date(), time(23, 59, 59))
+                return begin, end
+        value = value.date() if isinstance(value, datetime) else value
+        match self.unit:
+            case "D":
+                begin = value - timedelta(days=(value.toordinal() - 1) % self.count)
+                return begin, begin + timedelta(days=self.count - 1)
+            case "W":
+                begin = value - timedelta(days=(value.toordinal() - 1) % (7 * self.count))
+                return begin, begin + timedelta(days=7 * self.count - 1)
+            case _:
+                index = value.year * 12 + value.month - 1
+                index -= index % self.count
+                begin = date(index // 12, index % 12 + 1, 1)
+                index += self.count
+                return begin, date(index // 12, index % 12 + 1, 1) - timedelta(days=1)
+
+    def closes(self, value: datetime) -> datetime:
+        """Момент закрытия свечи этого периода в которую попадает момент `value`."""
+        _, end = self.bounds(value)
+        if isinstance(end, datetime):
+            return end + timedelta(seconds=1)
+        return datetime.combine(end + timedelta(days=1), time.min)
+
+
 class Candle(t.TypedDict):
     secid: str
     assetcode: t.NotRequired[str]
-    period: Period
+    period: Period | Timeframe
     open: float
     high: float
     low: float
@@ -93,6 +214,7 @@ class Candle(t.TypedDict):
     value: t.NotRequired[float]
     begin: date | datetime
     end: date | datetime
+    forming: t.NotRequired[bool]
 
 
 class FutOI(t.TypedDict):
@@ -110,3 +232,186 @@ class FutOI(t.TypedDict):
     seqnum: int
     systime: datetime
     tradetime: datetime
+
+
+class CompactRecord(Mapping[str, t.Any]):
+    """
+    Компактная запись: значения хранятся в слотах, общие для всей серии значения (`SHARED`) в одном словаре на
+    серию. Поддерживает доступ как к словарю, `dict(record)` возвращает обычную запись.
+    """
+
+    __slots__ = ("shared",)
+    FIELDS: t.ClassVar[tuple[str, ...]] = ()
+    SHARED: t.ClassVar[tuple[str, ...]] = ()
+    OPTIONAL: t.ClassVar[frozenset[str]] = frozenset()  # поля без значения (`None`) в записи отсутствуют
+
+    def __init__(self, shared: dict[str, t.Any], *values: t.Any):
+        self.shared = shared
+        for field, value in zip(self.FIELDS, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, key: str) -> t.Any:
+        if key in self.shared:
+            return self.shared[key]
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None or key not in self.OPTIONAL:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.shared
+        for field in self.FIELDS:
+            if field not in self.OPTIONAL or getattr(self, field) is not None:
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    @classmethod
+    def from_mapping(cls, data: t.Mapping[str, t.Any], series: dict[tuple, dict[str, t.Any]] | None = None) -> t.Self:
+        """
+        Создает запись из словаря.
+
+        Args:
+            data: Запись-словарь.
+            series: Словари общих значений уже созданных записей, по ключу из этих значений. Записи одной серии
+                    созданные с одним `series` разделяют один словарь.
+        """
+        shared = dict((key, data[key]) for key in cls.SHARED if key in data)
+        if series is not None:
+            shared = series.setdefault(tuple(shared.items()), shared)
+        return cls(shared, *(data.get(field) for field in cls.FIELDS))
+
+    @classmethod
+    def from_block(cls, block: "Block") -> Iterator[t.Self]:
+        """Создает записи из блока, общие значения берутся из первой строки блока."""
+        if not block.nrows:
+            return
+        shared = dict((key, block[key][0]) for key in cls.SHARED if key in block)
+        missing = [None] * block.nrows
+        columns = [block.get(field, missing) for field in cls.FIELDS]
+        for values in zip(*columns):
+            yield cls(shared, *values)
+
+
+class CandleRecord(CompactRecord):
+    """Компактное представление `Candle`, атрибуты `record.open` и т.п. доступны напрямую."""
+
+    __slots__ = ("begin", "close", "end", "forming", "high", "low", "open", "value", "volume")
+    FIELDS = ("begin", "end", "open", "high", "low", "close", "volume", "value", "forming")  # порядок полей записи
+    SHARED = ("secid", "assetcode", "period")
+    OPTIONAL = frozenset(("value", "forming"))
+
+
+class FutOIRecord(CompactRecord):
+    """Компактное представление `FutOI`, атрибуты `record.pos` и т.п. доступны напрямую."""
+
+    __slots__ = (
+        "clgroup",
+        "pos",
+        "pos_long",
+        "pos_long_num",
+        "pos_short",
+        "pos_short_num",
+        "seqnum",
+        "sess_id",
+        "session_date",
+        "systime",
+        "tradetime",
+    )
+    FIELDS = (
+        "clgroup",
+        "pos",
+        "pos_long",
+        "pos_long_num",
+        "pos_short",
+        "pos_short_num",
+        "sess_id",
+        "session_date",
+        "seqnum",
+        "systime",
+        "tradetime",
+    )  # порядок полей записи
+    SHARED = ("assetcode", "sectype", "period")
+
+
+class Block(dict[str, list[t.Any]]):
+    """
+    Колоночный блок записей: имя колонки -> список значений, все списки одной длины.
+    """
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence[t.Any]]) -> t.Self:
+        """Создает блок из строк ответа ISS."""
+        if rows:
+            return cls(zip(columns, map(list, zip(*rows))))
+        return cls((column, []) for column in columns)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict[str, t.Any]], columns: Sequence[str] | None = None) -> t.Self:
+        """Создает блок из записей-словарей, по умолчанию колонки берутся из первой записи."""
+        records = list(records)
+        if columns is None:
+            columns = list(records[0].keys()) if records else []
+        return cls((column, [record.get(column) for record in records]) for column in columns)
+
+    @classmethod
+    def concat(cls, blocks: Iterable["Block"]) -> t.Self:
+        """Объединяет блоки с одинаковыми колонками в один."""
+        result = cls()
+        for block in blocks:
+            if not result:
+                result.update((column, list(values)) for column, values in block.items())
+            else:
+                for column, values in block.items():
+                    result[column].extend(values)
+        return result
+
+    @property
+    def nrows(self) -> int:
+        """Количество записей в блоке."""
+        return len(next(iter(self.values()), ()))
+
+    def records(self) -> Iterator[dict[str, t.Any]]:
+        """Итератор по записям блока в виде словарей."""
+        columns = list(self.keys())
+        for row in zip(*self.values()):
+            yield dict(zip(columns, row))
+
+
+class Snapshot(Block):
+    """
+    Срез данных торгов доски в колоночном представлении, записи ключуются колонкой `secid`.
+    """
+
+    @cached_property
+    def index(self) -> dict[str, int]:
+        """Номер записи по `secid`."""
+        return dict((secid, N) for N, secid in enumerate(self.get("secid", [])))
+
+    def record(self, secid: str) -> dict[str, t.Any] | None:
+        """Запись инструмента `secid`, или `None` если его нет в срезе."""
+        if (index := self.index.get(secid)) is None:
+            return None
+        return dict((column, values[index]) for column, values in self.items())
+
+    def diff(self, previous: "Snapshot", columns: Sequence[str] | None = None) -> t.Self:
+        """
+        Записи новые или изменившиеся по сравнению с `previous`.
+
+        Args:
+            previous: Предыдущий срез.
+            columns: Колонки изменения которых учитываются, по умолчанию все. Служебные колонки вроде
+                     `systime` и `seqnum` меняются в каждом срезе, их стоит исключить.
+        """
+        columns = [column for column in (columns or self.keys()) if column in previous]
+        rows = list()
+        for secid, index in self.index.items():
+            other = previous.index.get(secid)
+            if other is None or any(self[column][index] != previous[column][other] for column in columns):
+                rows.append(index)
+        return type(self)((column, [values[index] for index in rows]) for column, values in self.items())
@@ -1,6 +1,8 @@
 import asyncio
+import heapq
 import typing as t
-from collections.abc import AsyncIterable, AsyncIterator, Iterable, Coroutine, Callable, Iterator
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Iterable, Coroutine, Callable, Iterator
 from datetime import datetime, date, time, timedelta
 
 
@@ -24,6 +26,18 @@ async def limited(ait: AsyncIterable[t.Any], limit: int) -> AsyncIterator[t.Any]
             break
 
 
+async def chunked(ait: AsyncIterable[t.Any], size: int) -> AsyncIterator[list[t.Any]]:
+    """Группирует вывод асинхронного итератора в списки не длиннее `size`."""
+    chunk = list()
+    async for item in ait:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
 async def puffup(it: Iterable[t.Any]) -> AsyncIterator[t.Any]:
     """ "Развернуть" синхронный итератор в асинхронный итератор"""
     for item in it:
@@ -80,44 +94,150 @@ class AsyncTasks(Iterable[asyncio.Task]):
         task.add_done_callback(lambda x: self._tasks.remove(x))
 
 
+class Failure(t.NamedTuple):
+    """Исключение источника, передаваемое через очередь получателю, чтобы он возбудил его у себя."""
+
+    exc: Exception
+
+
+async def interleave[T](
+    aiters: AsyncIterable[AsyncIterator[T]] | Iterable[AsyncIterator[T]], concurrency: int = 8, buffer: int = 1024
+) -> AsyncIterator[T]:
+    """
+    Выдает элементы нескольких асинхронных итераторов по мере их поступления.
+
+    Args:
+        aiters: Итераторы-источники, синхронный или асинхронный итератор по ним.
+        concurrency: Сколько источников читается одновременно.
+        buffer: Сколько элементов может ожидать выдачи.
+    """
+    queue: asyncio.Queue[t.Any] = asyncio.Queue(buffer)
+    semaphore = asyncio.Semaphore(concurrency)
+    async_tasks = AsyncTasks()
+    done = object()
+    active = 1
+
+    async def produce(ait: AsyncIterator[T]):
+        try:
+            async for item in ait:
+                await queue.put(item)
+        except Exception as exc:
+            await queue.put(Failure(exc))
+        finally:
+            semaphore.release()
+            await queue.put(done)
+
+    async def feed():
+        nonlocal active
+        try:
+            async for ait in aiters if isinstance(aiters, AsyncIterable) else puffup(aiters):
+                await semaphore.acquire()
+                active += 1
+                async_tasks.run(produce(ait))
+        except Exception as exc:
+            await queue.put(Failure(exc))
+        finally:
+            await queue.put(done)
+
+    async_tasks.run(feed())
+    try:
+        while active:
+            item = await queue.get()
+            if item is done:
+                active -= 1
+            elif isinstance(item, Failure):
+                raise item.exc
+            else:
+                yield item
+    finally:
+        for task in list(async_tasks):
+            task.cancel()
+
+
+async def merge[T](
+    aiters: Iterable[AsyncIterator[T]], key: Callable[[T], t.Any], concurrency: int = 8, buffer: int = 500
+) -> AsyncIterator[T]:
+    """
+    Сливает упорядоченные по `key` асинхронные итераторы в один упорядоченный.
+
+    Args:
+        aiters: Итераторы-источники, каждый упорядочен по `key`.
+        key: Ключ упорядочения.
+        concurrency: Сколько источников читается одновременно.
+        buffer: Сколько прочитанных элементов каждого источника может ожидать выдачи, чтение источника
+            приостанавливается пока слияние не дойдет до них.
+    """
+    aiters = list(aiters)
+    queues: list[asyncio.Queue[t.Any]] = [asyncio.Queue(buffer) for _ in aiters]
+    semaphore = asyncio.Semaphore(concurrency)
+    async_tasks = AsyncTasks()
+    done = object()
+    heap: list[tuple[t.Any, int, T]] = list()
+
+    async def produce(ait: AsyncIterator[T], queue: asyncio.Queue[t.Any]):
+        # Семафор занят только на время чтения, источник с заполненной очередью не мешает читать остальные
+        item = None
+        try:
+            while item is not done:
+                async with semaphore:
+                    item = await anext(ait, done)
+                await queue.put(item)
+        except Exception as exc:
+            await queue.put(Failure(exc))
+
+    async def pull(index: int):
+        item = await queues[index].get()
+        if isinstance(item, Failure):
+            raise item.exc
+        elif item is not done:
+            heapq.heappush(heap, (key(item), index, item))
+
+    for ait, queue in zip(aiters, queues):
+        async_tasks.run(produce(ait, queue))
+    try:
+        for index in range(len(aiters)):
+            await pull(index)
+        while heap:
+            _, index, item = heapq.heappop(heap)
+            yield item
+            await pull(index)
+    finally:
+        for task in list(async_tasks):
+            task.cancel()
+
+
+async def gather_ordered[T](factories: Iterable[Callable[[], Awaitable[T]]], concurrency: int = 8) -> AsyncIterator[T]:
+    """
+    Выполняет одновременно, не более `concurrency` за раз, корутины создаваемые `factories`, и выдает их
+    результаты в порядке `factories`.
+
+    Очередная фабрика берется только когда освобождается место, так что `factories` может учитывать уже
+    полученные результаты.
+    """
+    factories = iter(factories)
+    pending: deque[asyncio.Future[T]] = deque()
+    try:
+        while True:
+            while len(pending) < concurrency and (factory := next(factories, None)) is not None:
+                pending.append(asyncio.ensure_future(factory()))
+            if not pending:
+                break
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
 async def async_up_aiter[A, B](
-    aiter: AsyncIterator[A], a2biter: Callable[[A], AsyncIterator[B]], *, timeout: float = 0.1
+    aiter: AsyncIterator[A], a2biter: Callable[[A], AsyncIterator[B]], *, timeout: float = 0.1, concurrency: int = 8
 ) -> AsyncIterator[B]:
-    async_tasks = AsyncTasks()
-    biters: list[AsyncIterator[B]] = list()
-    pending: set[asyncio.Task[A]] = set()
-
-    def to_pending(biter: AsyncIterator[B], index: int, timeout_: float = 0):
-        #
-        async def next_b():
-            if timeout_ > 0:
-                await asyncio.sleep(timeout_)
-            b = await anext(biter)
-            return b, index
-
-        pending.add(asyncio.create_task(next_b()))
-
-    async def create_biter(a: A):
-        biter = a2biter(a)
-        index = len(biters)
-        biters.append(biter)
-        to_pending(biter, index, timeout)
-
-    async def init():
-        async for a in aiter:
-            async_tasks.run(create_biter(a))
-
-    async_tasks.run(init())
-    while async_tasks or pending:
-        if pending:
-            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-            for task in done:
-                pending.remove(task)
-                try:
-                    result, index = task.result()
-                    yield result
-                    to_pending(biters[index], index)
-                except StopAsyncIteration:
-                    pass
-        else:
+    """Выдает по мере поступления элементы итераторов созданных `a2biter` для каждого элемента `aiter`."""
+
+    async def delayed(a: A) -> AsyncIterator[B]:
+        if timeout > 0:
             await asyncio.sleep(timeout)
+        async for b in a2biter(a):
+            yield b
+
+    async for b in interleave((delayed(a) async for a in aiter), concurrency):
+        yield b
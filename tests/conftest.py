@@ -1,14 +1,28 @@
 import os
 
 import pytest
+
+import moexsrc.session
 from moexsrc.issclient import ISSClient
 
+from replay import ReplayTransport
+
 
 @pytest.fixture
 def token():
     return os.environ.get("APIKEY")
 
 
+@pytest.fixture
+def replay(monkeypatch):
+    """Подмена ISS для модульного контекста `moexsrc.session.ctx`."""
+    transport = ReplayTransport()
+    monkeypatch.setattr(moexsrc.session, "TRANSPORT", transport)
+    moexsrc.session._reset()
+    yield transport
+    moexsrc.session._reset()
+
+
 @pytest.fixture
 def client(token):
     return ISSClient(token)
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import random
+import typing as t
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from datetime import date, datetime, time, timedelta
+
+import httpx
+
+from moexsrc.types import MSK
+
+SHARES = ("GAZP", "LKOH", "MOEX", "SBER", "VTBR")
+ASSETS = {"MOEX": "MX", "SILV": "SV", "Si": "Si"}
+FUTURES_MONTHS = "HMUZ"
+SESSION_MINUTES = ((time(10, 0), time(18, 50)), (time(19, 0), time(23, 50)))
+FUTOI_MINUTES = (time(9, 0), time(23, 55))
+CANDLE_COLUMNS = ("open", "close", "high", "low", "value", "volume", "begin", "end")
+FUTOI_COLUMNS = (
+    "sess_id",
+    "seqnum",
+    "tradedate",
+    "tradetime",
+    "ticker",
+    "clgroup",
+    "pos",
+    "pos_long",
+    "pos_short",
+    "pos_long_num",
+    "pos_short_num",
+    "systime",
+    "trade_session_date",
+)
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Подмена ISS и сайта moex.com для работы без сети: транспорт httpx отдающий записанные или синтетические
+    ответы для описаний и списков инструментов, данных торгов, свечей, FutOI и `OpenOptionService`.
+
+    Синтетические данные детерминированы и зависят только от запроса, торговыми считаются будние дни.
+
+    Args:
+        latency: Задержка ответа в секундах, или функция запроса возвращающая задержку.
+        page_size: Сколько свечей отдается на одной странице.
+        futoi_limit: Сколько строк FutOI отдается на один запрос.
+        recorded: Записанные ответы: путь запроса без префикса `/iss/`, например
+                  "securities/MOEX.json" -> JSON ответа. Отдаются вместо синтетических.
+        cursor: Добавлять в ответ со свечами секцию `candles.cursor`.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float | Callable[[httpx.Request], float] = 0.0,
+        page_size: int = 500,
+        futoi_limit: int = 1000,
+        recorded: Mapping[str, t.Any] | None = None,
+        cursor: bool = False,
+    ):
+        self._latency = latency
+        self._page_size = page_size
+        self._futoi_limit = futoi_limit
+        self._recorded = dict(recorded or {})
+        self._cursor = cursor
+        self._cache: OrderedDict[tuple[t.Any, ...], list[list[t.Any]]] = OrderedDict()
+        self.requests: list[httpx.Request] = list()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        latency = self._latency(request) if callable(self._latency) else self._latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        params = dict(request.url.params)
+        if request.url.host == "www.moex.com":
+            parts = request.url.path.split("/")
+            if len(parts) == 8 and parts[3] == "OpenOptionService":
+                return self._json(self._daily_futoi(parts[6], date.fromisoformat(parts[4])))
+            return httpx.Response(404, request=request)
+
+        path = request.url.path.removeprefix("/").removeprefix("iss/")
+        if path in self._recorded:
+            return self._json(self._project(self._recorded[path], params))
+        match path.removesuffix(".json").split("/"):
+            case ["securities", secid]:
+                data = self._security(secid)
+            case ["engines", engine, "markets", market, "boards", boardid, "securities"]:
+                data = self._board(engine, market, boardid, params)
+            case ["engines", "futures", "markets", "forts", "securities"]:
+                data = self._board("futures", "forts", "RFUD", params)
+            case ["engines", _, "markets", _, "boards", _, "securities", secid, "candles"]:
+                data = self._candles(secid, params)
+            case ["analyticalproducts", "futoi", "securities", sectype]:
+                data = self._futoi(sectype, params)
+            case _:
+                return httpx.Response(404, request=request)
+        return self._json(self._project(data, params))
+
+    @staticmethod
+    def _project(data: dict[str, t.Any], params: dict[str, str]) -> dict[str, t.Any]:
+        # Отбор секций `iss.only` и колонок `<section>.columns`, как на стороне ISS
+        result = dict()
+        for section, table in data.items():
+            if (only := params.get(f"{section}.columns")) and "columns" in table:
+                lower = [column.lower() for column in table["columns"]]
+                index = [lower.index(column.lower()) for column in only.split(",") if column.lower() in lower]
+                table = dict(table, columns=[table["columns"][i] for i in index])
+                table["data"] = [[row[i] for i in index] for row in data[section]["data"]]
+            result[section] = table
+        if only := params.get("iss.only"):
+            result = dict((key, value) for key, value in result.items() if key in only.split(","))
+        return result
+
+    @staticmethod
+    def _json(data: t.Any) -> httpx.Response:
+        # Тело отдается потоком, как из сети, чтобы клиент учитывал полученные байты
+        content = json.dumps(data, ensure_ascii=False).encode()
+        return httpx.Response(
+            200,
+            stream=httpx.ByteStream(content),
+            headers={"content-type": "application/json", "content-length": str(len(content))},
+        )
+
+    @staticmethod
+    def _table(columns: t.Sequence[str], rows: list[list[t.Any]]) -> dict[str, t.Any]:
+        return dict(columns=list(columns), data=rows)
+
+    @staticmethod
+    def _price(*seed: t.Any) -> float:
+        return round(100 + random.Random(repr(seed)).random() * 10, 2)
+
+    def _securities(self, boardid: str) -> list[dict[str, t.Any]]:
+        if boardid == "RFUD":
+            return [
+                dict(
+                    SECID=f"{sectype}{month}6",
+                    BOARDID=boardid,
+                    SHORTNAME=f"{assetcode}-{month}6",
+                    SECTYPE=sectype,
+                    ASSETCODE=assetcode,
+                )
+                for assetcode, sectype in ASSETS.items()
+                for month in FUTURES_MONTHS
+            ]
+        return [dict(SECID=secid, BOARDID=boardid, SHORTNAME=secid, ISIN=f"RU000{secid}") for secid in SHARES]
+
+    def _security(self, secid: str) -> dict[str, t.Any]:
+        futures = secid[:2] in ASSETS.values()
+        engine, market, boardid = ("futures", "forts", "RFUD") if futures else ("stock", "shares", "TQBR")
+        description = [["SECID", "Код ценной бумаги", secid], ["NAME", "Полное наименование", secid]]
+        if futures:
+            assetcode = next(code for code, sectype in ASSETS.items() if secid.startswith(sectype))
+            description.append(["ASSETCODE", "Код базового актива", assetcode])
+        return dict(
+            description=self._table(("name", "title", "value"), description),
+            boards=self._table(
+                ("secid", "boardid", "engine", "market", "is_primary"), [[secid, boardid, engine, market, 1]]
+            ),
+        )
+
+    def _board(self, engine: str, market: str, boardid: str, params: dict[str, str]) -> dict[str, t.Any]:
+        securities = self._securities(boardid)
+        if "securities" in params:
+            wanted = params["securities"].split(",")
+            securities = [item for item in securities if item["SECID"] in wanted]
+        now = datetime.now(MSK).replace(tzinfo=None)
+        marketdata = [
+            dict(
+                SECID=item["SECID"],
+                BOARDID=boardid,
+                LAST=(last := self._price(item["SECID"], now.minute)),
+                BID=round(last - 0.01, 2),
+                OFFER=round(last + 0.01, 2),
+                VOLTODAY=now.hour * 60 + now.minute,
+                SYSTIME=now.isoformat(" ", "seconds"),
+            )
+            for item in securities
+        ]
+        result = dict()
+        for section, records in (("securities", securities), ("marketdata", marketdata)):
+            columns = list(records[0].keys()) if records else ["SECID"]
+            result[section] = self._table(columns, [[item[column] for column in columns] for item in records])
+        return result
+
+    def _cached(self, key: tuple[t.Any, ...], factory: Callable[[], list[list[t.Any]]]) -> list[list[t.Any]]:
+        # Повторные запросы страниц одного ответа не генерируют данные заново
+        if key not in self._cache:
+            self._cache[key] = factory()
+            while len(self._cache) > 16:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(key)
+        return self._cache[key]
+
+    def _candles(self, secid: str, params: dict[str, str]) -> dict[str, t.Any]:
+        interval = int(params.get("interval", 10))
+        # С точностью до минуты, чтобы страницы одного запроса последних свечей брались из кэша
+        now = datetime.now(MSK).replace(tzinfo=None, second=0, microsecond=0)
+        end = datetime.fromisoformat(params["till"]) if "till" in params else now
+        if len(params.get("till", "")) == 10:
+            end = datetime.combine(end.date(), time.max)
+        # Без `from` отдается последний месяц, чего хватает для запросов последних свечей
+        begin = datetime.fromisoformat(params["from"]) if "from" in params else end - timedelta(days=31)
+        reverse = params.get("iss.reverse") == "true"
+        rows = self._cached(
+            (secid, interval, begin, end, reverse), lambda: self.candle_rows(secid, interval, begin, end, reverse)
+        )
+        start = int(params.get("start", 0))
+        result = dict(candles=self._table(CANDLE_COLUMNS, rows[start : start + self._page_size]))
+        if self._cursor:
+            cursor = [[start, len(rows), self._page_size]]
+            result["candles.cursor"] = self._table(("INDEX", "TOTAL", "PAGESIZE"), cursor)
+        return result
+
+    def candle_rows(
+        self, secid: str, interval: int, begin: datetime, end: datetime, reverse: bool = False
+    ) -> list[list[t.Any]]:
+        """Синтетические строки свечей в колонках `CANDLE_COLUMNS`, те же что отдаются на запрос."""
+        rows = list()
+        day = begin.date()
+        while day <= end.date():
+            if day.weekday() < 5:
+                for begin_, end_ in self._candle_spans(day, interval):
+                    if begin <= begin_ <= end:
+                        price = self._price(secid, begin_)
+                        volume = 1 + begin_.minute
+                        rows.append(
+                            [
+                                price,
+                                round(price + 0.05, 2),
+                                round(price + 0.1, 2),
+                                round(price - 0.1, 2),
+                                round(price * volume * 10, 2),
+                                volume,
+                                begin_.isoformat(" "),
+                                end_.isoformat(" "),
+                            ]
+                        )
+            day += timedelta(days=1)
+        if interval in (7, 31):
+            rows = self._merge_days(rows, interval)
+        return rows[::-1] if reverse else rows
+
+    @staticmethod
+    def _candle_spans(day: date, interval: int) -> list[tuple[datetime, datetime]]:
+        if interval not in (1, 10, 60):
+            return [(datetime.combine(day, time()), datetime.combine(day, time(23, 59, 59)))]
+        spans = list()
+        for first, last in SESSION_MINUTES:
+            moment, stop = datetime.combine(day, first), datetime.combine(day, last)
+            while moment < stop:
+                spans.append((moment, moment + timedelta(minutes=interval, seconds=-1)))
+                moment += timedelta(minutes=interval)
+        return spans
+
+    @staticmethod
+    def _merge_days(rows: list[list[t.Any]], interval: int) -> list[list[t.Any]]:
+        result: list[list[t.Any]] = list()
+        for row in rows:
+            day = date.fromisoformat(row[6][:10])
+            key = day.isocalendar()[:2] if interval == 7 else (day.year, day.month)
+            if result and result[-1][-1] == key:
+                last = result[-1]
+                last[1], last[2], last[3] = row[1], max(last[2], row[2]), min(last[3], row[3])
+                last[4], last[5], last[7] = round(last[4] + row[4], 2), last[5] + row[5], row[7]
+            else:
+                result.append([*row, key])
+        return [row[:-1] for row in result]
+
+    def _futoi(self, sectype: str, params: dict[str, str]) -> dict[str, t.Any]:
+        begin, end = date.fromisoformat(params["from"]), date.fromisoformat(params["till"])
+        rows = self._cached(("futoi", sectype, begin, end), lambda: self._futoi_rows(sectype, begin, end))
+        return dict(futoi=self._table(FUTOI_COLUMNS, rows[: self._futoi_limit]))
+
+    def _futoi_rows(self, sectype: str, begin: date, end: date) -> list[list[t.Any]]:
+        rows = list()
+        day = begin
+        while day <= end:
+            if day.weekday() < 5:
+                moment, stop = datetime.combine(day, FUTOI_MINUTES[0]), datetime.combine(day, FUTOI_MINUTES[1])
+                seqnum = 0
+                while moment <= stop:
+                    for clgroup in ("fiz", "yur"):
+                        pos_long = int(self._price(sectype, moment, clgroup) * 1000)
+                        pos_short = -int(self._price(sectype, clgroup, moment) * 1000)
+                        row = [1, seqnum, day.isoformat(), moment.time().isoformat(), sectype, clgroup]
+                        row += [pos_long + pos_short, pos_long, pos_short, pos_long // 100, -pos_short // 100]
+                        row += [(moment + timedelta(minutes=5)).isoformat(" "), day.isoformat()]
+                        rows.append(row)
+                    seqnum += 1
+                    moment += timedelta(minutes=5)
+            day += timedelta(days=1)
+        # ISS отдает FutOI от поздних записей к ранним
+        return rows[::-1]
+
+    def _daily_futoi(self, symbol: str, day: date) -> list[dict[str, str]]:
+        def number(scale: int, *seed: t.Any) -> str:
+            return f"{int(self._price(symbol, day, *seed) * scale):,}".replace(",", "\xa0")
+
+        contracts = dict(
+            PhysicalLong=number(1000, "pl"),
+            PhysicalShort=number(1000, "ps"),
+            JuridicalLong=number(1000, "jl"),
+            JuridicalShort=number(1000, "js"),
+        )
+        clients = dict(
+            Date=day.strftime("%d.%m.%Y"),
+            PhysicalLong=number(10, "cpl"),
+            PhysicalShort=number(10, "cps"),
+            JuridicalLong=number(10, "cjl"),
+            JuridicalShort=number(10, "cjs"),
+        )
+        return [contracts, dict(contracts), dict(contracts), clients]
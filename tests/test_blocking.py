@@ -0,0 +1,43 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import moexsrc.session
+from moexsrc.blocking import BackgroundLoop
+from moexsrc.tickers import Ticker
+
+from replay import SHARES
+
+
+def test_session_ctx_per_loop(replay):
+    async def context():
+        return moexsrc.session.ctx
+
+    first, second = asyncio.run(context()), asyncio.run(context())
+    assert first.client is not second.client and moexsrc.session.ctx.client is moexsrc.session.ctx.client
+    with ThreadPoolExecutor(1) as pool:
+        other = pool.submit(lambda: moexsrc.session.ctx).result()
+    assert other.client is not moexsrc.session.ctx.client
+    # Кэши, индекс инструментов и ограничители частоты общие для всех клиентов
+    assert first.meta is second.meta is other.meta and first.index is other.index
+
+
+def test_background_loop(replay):
+    background = BackgroundLoop()
+
+    def load(secid: str) -> int:
+        candles = background.collect(Ticker(background.ctx(), secid).candles("1D", latest=5))
+        assert all(candle["secid"] == secid for candle in candles)
+        return len(candles)
+
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(load, SHARES)) == [5] * len(SHARES)
+        items = background.iterate(Ticker(background.ctx(), "MOEX").candles("10min", latest=30), size=7)
+        assert len(list(items)) == 30
+        # Описание инструмента загружено один раз на все потоки
+        assert sum(1 for request in replay.requests if request.url.path.endswith("/securities/MOEX.json")) == 1
+        client = background.ctx().client
+    finally:
+        background.close()
+    assert client.closed and not background.ctx().client.closed
+    background.close()
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from moexsrc.candlestore import CandleStore
+from moexsrc.utils import rollup
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = list()
+
+    async def request(self, path, section, **params):
+        self.calls.append((params["from"], params["till"]))
+        day = date.fromisoformat(params["from"])
+        while day <= date.fromisoformat(params["till"]):
+            yield dict(
+                begin=f"{day} 10:00:00", end=f"{day} 10:00:59", open=1, close=2, high=3, low=0, value=9, volume=1
+            )
+            day += timedelta(days=1)
+
+
+def test_candlestore_missing():
+    store = CandleStore()
+    store.put("MOEX", "TQBR", 1, [], (date(2026, 1, 5), date(2026, 1, 9)))
+    store.put("MOEX", "TQBR", 1, [], (date(2026, 1, 10), date(2026, 1, 12)))
+    assert store.coverage("MOEX", "TQBR", 1) == [(date(2026, 1, 5), date(2026, 1, 12))]
+    assert store.missing("MOEX", "TQBR", 1, date(2026, 1, 1), date(2026, 1, 20)) == [
+        (date(2026, 1, 1), date(2026, 1, 4)),
+        (date(2026, 1, 13), date(2026, 1, 20)),
+    ]
+    assert store.missing("MOEX", "TQBR", 1, date(2026, 1, 6), date(2026, 1, 8)) == []
+
+
+async def test_candlestore_request():
+    store, client = CandleStore(), FakeClient()
+    params = {"interval": 1, "from": "2026-01-05", "till": "2026-01-09"}
+    first = await rollup(store.request(client, "candles", "MOEX", "TQBR", **params))
+    assert len(first) == 5 and len(client.calls) == 1
+
+    params = {"interval": 1, "from": "2026-01-07", "till": "2026-01-12 12:00:00"}
+    second = await rollup(store.request(client, "candles", "MOEX", "TQBR", **params))
+    assert len(second) == 6 and client.calls[-1] == ("2026-01-10", "2026-01-12")
+
+    again = await rollup(store.request(client, "candles", "MOEX", "TQBR", **params))
+    assert again == second and len(client.calls) == 2
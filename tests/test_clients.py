@@ -29,3 +29,11 @@ async def test_iss_get_market_securities(client, check_fields):
     assert check_fields(rfud_securities[0], ("boardid", "engine", "is_traded", "market", "secid"))
     all_securities = await rollup(client.get_market_securities("futures", "forts"))
     assert len(all_securities) == len(rfud_securities)
+
+
+async def test_iss_request_read_ahead(client):
+    path = "engines/stock/markets/shares/boards/TQBR/securities/MOEX/candles"
+    params = {"from": "2026-02-16", "till": "2026-02-20", "interval": 1}
+    sequential = await rollup(client.request(path, "candles", read_ahead=0, **params))
+    parallel = await rollup(client.request(path, "candles", read_ahead=8, **params))
+    assert sequential and sequential == parallel
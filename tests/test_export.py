@@ -0,0 +1,76 @@
+import csv
+import json
+import os
+from datetime import date
+
+import pytest
+
+from moexsrc.__main__ import main
+from moexsrc.export import export, partitions, universe
+from moexsrc.session import Session
+
+from replay import ReplayTransport
+
+
+def test_partitions():
+    parts = partitions(date(2025, 11, 20), date(2026, 2, 3), "month")
+    assert [name for _, _, name in parts] == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert parts[0][1] == date(2025, 11, 30) and parts[-1][1] == date(2026, 2, 3)
+    assert main(["export", "--begin", "2026-01-01", "--output", "."]) == 2
+
+
+async def test_export(tmp_path):
+    transport = ReplayTransport()
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        sources = await universe(ctx, "candles", tickers=["MOEX", "SBER"])
+        report = await export(
+            ctx, sources, "candles", "1h", begin="2026-01-26", end="2026-02-06", output=tmp_path, format="csv"
+        )
+        assert (report.jobs, report.skipped, report.files) == (4, 0, 4) and report.requests > 0
+        with open(tmp_path / "candles" / "period=1h" / "secid=MOEX" / "2026-02.csv") as file:
+            rows = list(csv.DictReader(file))
+        assert len(rows) == 5 * 14 and rows[0]["period"] == "1h" and rows[0]["begin"] == "2026-02-02 10:00:00"
+        with open(tmp_path / "_checkpoint.jsonl") as file:
+            assert len([json.loads(line) for line in file]) == 4
+        # Повторная выгрузка пропускает готовые части
+        count = len(transport.requests)
+        report = await export(
+            ctx, sources, "candles", "1h", begin="2026-01-26", end="2026-02-06", output=tmp_path, format="csv"
+        )
+        assert (report.jobs, report.skipped) == (0, 4) and len(transport.requests) == count
+        # Части не охваченные прежней выгрузкой выгружаются заново, вместе с прежними датами
+        report = await export(
+            ctx, sources, "candles", "1h", begin="2026-01-20", end="2026-02-04", output=tmp_path, format="csv"
+        )
+        assert (report.jobs, report.skipped) == (2, 2)
+        with open(tmp_path / "candles" / "period=1h" / "secid=MOEX" / "2026-01.csv") as file:
+            rows = list(csv.DictReader(file))
+        assert rows[0]["begin"] == "2026-01-20 10:00:00" and rows[-1]["begin"] == "2026-01-30 23:00:00"
+
+
+async def test_export_new_directory(tmp_path):
+    output = tmp_path / "data" / "eq"
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        sources = await universe(ctx, "candles", tickers=["MOEX"])
+        report = await export(
+            ctx, sources, "candles", "1D", begin="2026-02-02", end="2026-02-06", output=output, format="csv"
+        )
+    assert report.files == 1 and os.path.exists(output / "_checkpoint.jsonl")
+
+
+async def test_export_futoi_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        sources = await universe(ctx, "futoi", assets=["SILV"])
+        report = await export(ctx, sources, "futoi", "5min", begin="2026-02-02", end="2026-02-03", output=tmp_path)
+    path = tmp_path / "futoi" / "period=5min" / "assetcode=SILV" / "2026-02.parquet"
+    assert report.rows == 2 * 180 * 2 and os.path.exists(path)
+    table = pq.read_table(path)
+    assert table.num_rows == report.rows and str(table.schema.field("tradetime").type) == "timestamp[us]"
+    # Выгрузка в другом формате не считается готовой
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        sources = await universe(ctx, "futoi", assets=["SILV"])
+        report = await export(
+            ctx, sources, "futoi", "5min", begin="2026-02-02", end="2026-02-03", output=tmp_path, format="csv"
+        )
+    assert (report.jobs, report.skipped) == (1, 0) and os.path.exists(path.with_suffix(".csv"))
@@ -0,0 +1,70 @@
+import math
+import os
+
+import httpx
+
+from moexsrc.assets import Asset
+from moexsrc.httpcache import CachingTransport, ResponseCache, cache_key, cache_ttl
+from moexsrc.session import Session
+from moexsrc.tickers import Ticker
+from moexsrc.types import Period
+from moexsrc.utils import rollup
+
+from replay import ReplayTransport
+
+
+def test_cache_ttl():
+    candles = "https://iss.moex.com/iss/engines/stock/markets/shares/boards/TQBR/securities/MOEX/candles.json"
+    assert cache_ttl(httpx.URL(candles, params={"interval": 1, "till": "2026-02-17T23:59:59"})) == math.inf
+    assert cache_ttl(httpx.URL(candles, params={"interval": 1, "from": "2026-02-17"})) is None
+    assert cache_ttl(httpx.URL(candles, params={"interval": 1, "till": "2099-01-01"})) is None
+    assert cache_ttl(httpx.URL("https://iss.moex.com/iss/securities/MOEX.json")) == 12 * 3600
+    assert cache_ttl(httpx.URL("https://iss.moex.com/iss/engines/stock/markets/shares/securities.json")) is None
+    daily = "https://www.moex.com/api/contract/OpenOptionService/2026-02-02/F/SV/json"
+    assert cache_ttl(httpx.URL(daily)) == math.inf
+    assert cache_key(httpx.URL(candles, params={"till": 1, "from": 0})) == cache_key(
+        httpx.URL(candles, params={"from": 0, "till": 1})
+    )
+
+
+def test_response_cache():
+    cache = ResponseCache(max_size=3000)
+    for key in "abcd":
+        cache.set(key, "application/json", os.urandom(1000))
+        cache.get("a")
+    assert cache.size <= 3000 and cache.get("a") is not None and cache.get("b") is None
+    cache.set("e", "application/json", b"{}", ttl=-1)
+    assert cache.get("e") is None
+
+
+async def test_http_cache_errors():
+    calls = list()
+
+    def handler(request):
+        calls.append(request)
+        message = "Free users can't receive data"
+        return httpx.Response(200, json=dict(futoi=dict(columns=["ERROR_MESSAGE"], data=[[message]])))
+
+    url = "https://iss.moex.com/iss/analyticalproducts/futoi/securities/SV.json?from=2026-02-02&till=2026-02-02"
+    async with httpx.AsyncClient(transport=CachingTransport(httpx.MockTransport(handler))) as client:
+        for _ in range(2):
+            assert (await client.get(url)).json()["futoi"]["columns"] == ["ERROR_MESSAGE"]
+    # Сообщение об ошибке пришло со статусом 200, но не закэшировано
+    assert len(calls) == 2
+
+
+async def test_http_cache(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    transport = ReplayTransport()
+    with Session(idle_timeout=0, transport=transport, http_cache=path, meta_cache=None) as ctx:
+        candles = await rollup(Ticker(ctx, "MOEX").candles("1h", begin="2026-02-16", end="2026-02-20"))
+        futoi = await rollup(Asset(ctx, "SILV").futoi(Period.ONE_DAY, begin="2026-02-02", end="2026-02-06"))
+    count = len(transport.requests)
+    with Session(idle_timeout=0, transport=transport, http_cache=path, meta_cache=None) as ctx:
+        assert await rollup(Ticker(ctx, "MOEX").candles("1h", begin="2026-02-16", end="2026-02-20")) == candles
+        cached = await rollup(Asset(ctx, "SILV").futoi(Period.ONE_DAY, begin="2026-02-02", end="2026-02-06"))
+        # `systime` дневных данных moex.com проставляется при разборе ответа, а не берется из него
+        assert [dict(item, systime=None) for item in cached] == [dict(item, systime=None) for item in futoi]
+    # Повторно запрашиваются только списки инструментов рынков, они не кэшируются
+    assert all("/candles" not in str(request.url) for request in transport.requests[count:])
+    assert all("OpenOptionService" not in str(request.url) for request in transport.requests[count:])
@@ -0,0 +1,52 @@
+from moexsrc.assets import Asset
+from moexsrc.instrument import HistogramSink, Instrumentation, OpenTelemetrySink, RequestEvent, StageEvent
+from moexsrc.session import Session
+from moexsrc.tickers import Ticker
+from moexsrc.utils import rollup
+
+from replay import ReplayTransport
+
+
+class Tracer:
+    def __init__(self):
+        self.spans = list()
+
+    def start_span(self, name, start_time, attributes):
+        tracer = self
+
+        class Span:
+            def end(self, end_time):
+                tracer.spans.append((name, end_time - start_time, attributes))
+
+        return Span()
+
+
+async def test_instrument():
+    events, histogram, tracer = list(), HistogramSink(), Tracer()
+    instrument = Instrumentation(events.append, histogram, OpenTelemetrySink(tracer))
+    with Session(idle_timeout=0, transport=ReplayTransport(), instrument=instrument) as ctx:
+        candles = await rollup(Ticker(ctx, "MOEX").candles("15min", begin="2026-02-16", end="2026-02-17"))
+        await rollup(Asset(ctx, "SILV").futoi(begin="2026-02-02", end="2026-02-03"))
+    requests = [event for event in events if isinstance(event, RequestEvent)]
+    assert requests and all(event.status == 200 and event.bytes > 0 for event in requests)
+    stages = dict(((event.pipeline, event.stage), event) for event in events if isinstance(event, StageEvent))
+    assert stages["candles", "resample"].rows == len(candles)
+    assert stages["candles", "normalize"].rows == 2 * 820 and stages["candles", "fetch"].rows == 2 * 820
+    assert ("futoi", "fetch") in stages and ("request", "deserialize") in stages
+    summary = histogram.summary()
+    assert summary["candles.fetch"]["count"] == 1 and summary["request.candles"]["count"] >= 1
+    assert len(tracer.spans) == len(events) and all(duration >= 0 for _, duration, _ in tracer.spans)
+
+
+async def test_instrument_disabled():
+    instrument = Instrumentation()
+    assert not instrument.enabled and instrument.pipeline("candles").stage(iter_ := object(), "fetch") is iter_
+    events = list()
+    with Session(idle_timeout=0, transport=ReplayTransport(), instrument=instrument) as ctx:
+        await rollup(Ticker(ctx, "MOEX").candles("1h", begin="2026-02-16", end="2026-02-16"))
+        instrument.add_sink(events.append)
+        await rollup(Ticker(ctx, "MOEX").candles("1h", begin="2026-02-16", end="2026-02-16"))
+        instrument.remove_sink(events.append)
+        count = len(events)
+        await rollup(Ticker(ctx, "MOEX").candles("1h", begin="2026-02-16", end="2026-02-16"))
+    assert count and len(events) == count
@@ -41,3 +41,20 @@ async def test_markets_assets(token):
         eq = Market(ctx, "EQ")
         with pytest.raises(NotImplementedError):
             await rollup(eq.get_assets())
+
+
+async def test_markets_candles(token):
+    with Session(token) as ctx:
+        fo = Market(ctx, "FO")
+        data = await rollup(fo.candles("1D", begin="2026-02-16", end="2026-02-20", assetcode="SILV"))
+        assert data and len({item["secid"] for item in data}) > 1
+        assert all(a["begin"] <= b["begin"] for a, b in zip(data, data[1:]))
+
+
+async def test_markets_snapshot(token):
+    with Session(token) as ctx:
+        eq = Market(ctx, "EQ")
+        snapshot = await eq.snapshot("last", "bid", "offer", "voltoday")
+        assert list(snapshot.keys()) == ["secid", "last", "bid", "offer", "voltoday"]
+        assert snapshot.nrows > 100 and snapshot.record("SBER")["secid"] == "SBER"
+        assert snapshot.diff(snapshot).nrows == 0
@@ -0,0 +1,19 @@
+from moexsrc.metacache import MetaCache
+
+
+async def test_metacache(tmp_path):
+    calls = list()
+
+    async def factory():
+        calls.append(1)
+        return dict(secid="MOEX", boardid="TQBR")
+
+    cache = MetaCache(tmp_path / "meta.db")
+    assert await cache.fetch("security/MOEX", factory) == dict(secid="MOEX", boardid="TQBR")
+    assert await cache.fetch("security/MOEX", factory) == dict(secid="MOEX", boardid="TQBR")
+    assert len(calls) == 1
+    assert await cache.fetch("security/MOEX", factory, ttl=0) and len(calls) == 2
+    cache.close()
+
+    assert MetaCache(tmp_path / "meta.db").get("security/MOEX") == dict(secid="MOEX", boardid="TQBR")
+    assert MetaCache(tmp_path / "meta.db", ttl=0).get("security/MOEX") is None
@@ -1,6 +1,13 @@
-from datetime import date
+import asyncio
+import json
+from datetime import date, datetime, timedelta
 
-from moexsrc.utils import date_pair_gen
+from moexsrc._candles import resample_candle
+from moexsrc._futoi import FutOIWindows
+from moexsrc._jsonstream import StreamParser
+
+from moexsrc.types import Block, CandleRecord, Period, Snapshot, Timeframe
+from moexsrc.utils import date_pair_gen, gather_ordered, interleave, merge, puffup, rollup
 
 
 def test_date_pair_gen():
@@ -19,3 +26,149 @@ def test_date_pair_gen():
         date(2026, 1, 4),
         date(2026, 1, 5),
     ]
+
+
+def test_block():
+    block = Block.from_rows(["secid", "open"], [["MOEX", 1.0], ["SBER", 2.0]])
+    assert block == {"secid": ["MOEX", "SBER"], "open": [1.0, 2.0]} and block.nrows == 2
+    assert list(block.records()) == [{"secid": "MOEX", "open": 1.0}, {"secid": "SBER", "open": 2.0}]
+    assert Block.from_records(block.records()) == block
+    assert Block.from_rows(["secid", "open"], []).nrows == 0
+
+
+def test_snapshot():
+    previous = Snapshot(secid=["MOEX", "SBER"], last=[200.0, 300.0], systime=["10:00:00", "10:00:00"])
+    current = Snapshot(secid=["MOEX", "SBER", "GAZP"], last=[200.0, 301.0, 150.0], systime=["10:00:05"] * 3)
+    assert current.record("SBER") == dict(secid="SBER", last=301.0, systime="10:00:05")
+    assert current.record("VTBR") is None
+    assert current.diff(previous, ["last"])["secid"] == ["SBER", "GAZP"]
+    assert current.diff(previous).nrows == 3
+    assert Block.concat([Block(a=[1]), Block(a=[2, 3])]) == Block(a=[1, 2, 3])
+
+
+def test_timeframe():
+    assert Timeframe.parse("5min").period is Period.FIVE_MINUTES
+    assert Timeframe.parse("15min").source is Period.ONE_MINUTE
+    assert Timeframe.parse("30min").source is Period.TEN_MINUTES
+    assert Timeframe.parse("4h").source is Period.ONE_HOUR
+    assert Timeframe.parse("2W").source is Period.ONE_WEEK
+    assert Timeframe.parse("4h").bounds(datetime(2026, 2, 20, 13, 30)) == (
+        datetime(2026, 2, 20, 12, 0),
+        datetime(2026, 2, 20, 15, 59, 59),
+    )
+    assert Timeframe.parse("1W").bounds(date(2026, 2, 20)) == (date(2026, 2, 16), date(2026, 2, 22))
+    assert Timeframe.parse("1M").bounds(date(2026, 2, 20)) == (date(2026, 2, 1), date(2026, 2, 28))
+
+
+async def test_resample_candle():
+    begin = datetime(2026, 2, 20, 10, 0)
+    candles = [
+        dict(
+            begin=begin + timedelta(minutes=n),
+            end=begin + timedelta(minutes=n, seconds=59),
+            open=100.0 + n,
+            high=110.0 + n,
+            low=90.0 + n,
+            close=101.0 + n,
+            volume=1,
+            secid="MOEX",
+            period=Period.ONE_MINUTE,
+        )
+        # пропуск между 10:10 и 11:00 не должен порождать свечей
+        for n in [*range(10), *range(60, 70)]
+    ]
+    result = await rollup(resample_candle(puffup(candles), "15min"))
+    assert [item["begin"].strftime("%H:%M") for item in result] == ["10:00", "11:00"]
+    assert result[0]["open"] == 100.0 and result[0]["close"] == 110.0
+    assert result[0]["high"] == 119.0 and result[0]["low"] == 90.0
+    assert result[0]["volume"] == 10
+    assert result[0]["period"] == Timeframe(15, "min")
+
+
+def test_stream_parser():
+    doc = {
+        "candles": {"columns": ["open", "begin"], "data": [[1.5, "2026-02-20 10:00:00"], [-2e3, "Ф\\"]]},
+        "candles.cursor": {"columns": ["INDEX", "TOTAL", "PAGESIZE"], "data": [[0, 2, 500]]},
+    }
+    raw = json.dumps(doc, ensure_ascii=False).encode()
+    for size in (1, 3, len(raw)):
+        parser = StreamParser()
+        for N in range(0, len(raw), size):
+            parser.feed(raw[N : N + size])
+        assert parser.close() == doc
+
+
+async def test_merge_interleave():
+    sources = [[1, 4, 7], [2, 5], [], [3, 6, 8]]
+    assert await rollup(merge([puffup(items) for items in sources], key=lambda x: x, concurrency=2)) == list(
+        range(1, 9)
+    )
+    assert sorted(await rollup(interleave([puffup(items) for items in sources], 2))) == list(range(1, 9))
+
+    # Источники читаются не дальше `buffer` элементов вперед от слияния
+    produced = 0
+
+    async def source(start):
+        nonlocal produced
+        for item in range(start, 10000, 4):
+            produced += 1
+            yield item
+
+    merged = merge([source(start) for start in range(4)], key=lambda x: x, concurrency=2, buffer=10)
+    assert [await anext(merged) for _ in range(8)] == list(range(8))
+    await asyncio.sleep(0.01)
+    assert produced <= 4 * (2 + 1 + 10 + 1)  # выданные, в куче, в очереди и ожидающий места в очереди
+    await merged.aclose()
+
+
+async def test_gather_ordered():
+    running = 0
+
+    async def job(n):
+        nonlocal running
+        running += 1
+        assert running <= 3
+        await asyncio.sleep(0.01 * (5 - n % 5))
+        running -= 1
+        return n
+
+    assert await rollup(gather_ordered((lambda n=n: job(n) for n in range(10)), 3)) == list(range(10))
+
+
+def test_futoi_windows():
+    windows = FutOIWindows(date(2026, 1, 1), date(2026, 1, 5))
+    assert list(windows) == [
+        (date(2026, 1, 1), date(2026, 1, 2)),
+        (date(2026, 1, 3), date(2026, 1, 4)),
+        (date(2026, 1, 5), date(2026, 1, 5)),
+    ]
+    windows = FutOIWindows(date(2026, 1, 1), date(2026, 1, 31), reverse=True)
+    result = list()
+    for begin, end in windows:
+        result.append((begin, end))
+        windows.feedback((end - begin).days + 1, 100 * ((end - begin).days + 1))
+    assert result[0] == (date(2026, 1, 30), date(2026, 1, 31))
+    assert result[1] == (date(2026, 1, 21), date(2026, 1, 29))
+    assert result[-1][0] == date(2026, 1, 1)
+
+
+def test_compact_record():
+    candle = dict(
+        secid="MOEX",
+        period=Period.ONE_MINUTE,
+        open=1.0,
+        high=2.0,
+        low=0.5,
+        close=1.5,
+        volume=10,
+        begin=datetime(2026, 1, 1, 10),
+        end=datetime(2026, 1, 1, 10, 0, 59),
+    )
+    series = dict()
+    records = [CandleRecord.from_mapping(candle, series) for _ in range(2)]
+    assert records[0] == candle and dict(records[1]) == candle and records[0].shared is records[1].shared
+    assert records[0].open == records[0]["open"] == 1.0 and "value" not in records[0] and len(records[0]) == 9
+    # Поля идут в порядке `FIELDS`, а не отсортированных слотов
+    assert list(records[0])[-7:] == ["begin", "end", "open", "high", "low", "close", "volume"]
+    block = Block.from_records([candle, dict(candle, open=3.0)])
+    assert [record["open"] for record in CandleRecord.from_block(block)] == [1.0, 3.0]
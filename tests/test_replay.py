@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import moexsrc.markets
+from moexsrc.assets import Asset
+from moexsrc.markets import Market
+from moexsrc.resolver import get_board
+from moexsrc.session import Session
+from moexsrc.tickers import Ticker
+from moexsrc.types import Block, CandleRecord, Period, Snapshot, Timeframe
+from moexsrc.utils import puffup, rollup
+
+from replay import SHARES, ReplayTransport
+
+
+async def test_replay_candles():
+    transport = ReplayTransport(page_size=100)
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        ticker = Ticker(ctx, "MOEX")
+        data = await rollup(ticker.candles("10min", begin="2026-02-16", end="2026-02-22"))
+        assert len(data) == 5 * 82 and all(a["begin"] < b["begin"] for a, b in zip(data, data[1:]))
+        halves = await rollup(ticker.candles("30min", begin="2026-02-16", end="2026-02-16"))
+        assert halves[0]["open"] == data[0]["open"] and halves[0]["volume"] == sum(c["volume"] for c in data[:3])
+        assert any(request.url.params.get("start") == "400" for request in transport.requests)
+
+
+async def test_replay_futoi():
+    transport = ReplayTransport()
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        silv = Asset(ctx, "SILV")
+        data = await rollup(silv.futoi(begin="2026-02-02", end="2026-02-06"))
+        assert len(data) == 5 * 180 * 2 and all(a["tradetime"] <= b["tradetime"] for a, b in zip(data, data[1:]))
+        daily = await rollup(silv.futoi(Period.ONE_DAY, begin="2026-02-02", end="2026-02-06"))
+        assert len(daily) == 10 and daily[0]["clgroup"] == "FIZ"
+        assert "authorization" not in transport.requests[-1].headers
+
+
+async def test_replay_coalesce():
+    transport = ReplayTransport(latency=0.01)
+    with Session(idle_timeout=0, transport=transport, meta_cache=None) as ctx:
+        assert ctx.meta is None
+        assets = [Asset(ctx, "SILV") for _ in range(4)]
+        results = await asyncio.gather(
+            *(rollup(asset.futoi(Period.ONE_DAY, begin="2026-02-02", end="2026-02-03")) for asset in assets)
+        )
+        assert all(result == results[0] for result in results)
+        urls = [str(request.url) for request in transport.requests]
+        assert len(urls) == len(set(urls))
+        # Отмена одного из ожидающих не отменяет запрос остальных
+        path = "engines/futures/markets/forts/securities"
+        first = asyncio.ensure_future(rollup(ctx.client.request(path, "securities", start=-1)))
+        second = asyncio.ensure_future(rollup(ctx.client.request(path, "securities", start=-1)))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second and first.cancelled()
+        # Пришедший сразу после отмены последнего ожидающего получает новый запрос, а не отмененный
+        first = asyncio.ensure_future(rollup(ctx.client.request(path, "securities", start=-1)))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert await rollup(ctx.client.request(path, "securities", start=-1)) and first.cancelled()
+
+
+async def test_replay_index():
+    transport = ReplayTransport()
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        assets = await rollup(Market(ctx, "fo").get_assets())
+        tickers = [ticker for asset in assets for ticker in await rollup(asset.get_tickers())]
+        assert [asset.symbol for asset in assets] == ["MOEX", "SILV", "Si"] and len(tickers) == 12
+        assert len(transport.requests) == 1
+        board = await get_board(ctx, "futures", "forts", "RFUD")
+        assert [row["secid"] for row in board.find(sectype="SV")] == ["SVH6", "SVM6", "SVU6", "SVZ6"]
+        # Описание инструмента ссылается на строку индекса, а не копирует ее
+        assert tickers[0]._desc.maps[1] is board.get(tickers[0].symbol)
+        shares = await get_board(ctx, "stock", "shares", "TQBR")
+        assert shares.find(isin="RU000MOEX")[0]["secid"] == "MOEX"
+        ctx.index.refresh(board.board)
+        assert await get_board(ctx, "futures", "forts", "RFUD") is not board and len(transport.requests) == 3
+
+
+async def test_replay_columns():
+    transport = ReplayTransport(page_size=100)
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        ticker = Ticker(ctx, "MOEX")
+        full = await rollup(ticker.candles("30min", begin="2026-02-16", end="2026-02-17"))
+        data = await rollup(ticker.candles("30min", begin="2026-02-16", end="2026-02-17", columns=("close", "volume")))
+        assert transport.requests[-1].url.params["candles.columns"] == "begin,end,close,volume"
+        assert data == [dict((k, v) for k, v in c.items() if k not in ("open", "high", "low", "value")) for c in full]
+        blocks = await rollup(ticker.candle_batches("10min", begin="2026-02-16", end="2026-02-16", columns=["close"]))
+        assert list(blocks[0].keys())[:3] == ["close", "begin", "end"]
+        futoi = await rollup(Asset(ctx, "SILV").futoi(begin="2026-02-02", end="2026-02-02", columns=["pos"]))
+        assert transport.requests[-1].url.params["iss.only"] == "futoi,futoi.cursor"
+        assert set(futoi[0]) == {"sectype", "clgroup", "pos", "tradetime", "period", "assetcode"}
+        tickers = await rollup(Market(ctx, "eq").get_tickers(columns=["shortname"]))
+        assert transport.requests[-1].url.params["securities.columns"] == "SECID,BOARDID,SHORTNAME"
+        assert "isin" not in tickers[0]._desc and tickers[0]._desc["shortname"] == tickers[0].symbol
+        with pytest.raises(ValueError):
+            await rollup(ticker.candles("10min", begin="2026-02-16", columns=["bid"]))
+
+
+async def test_replay_latest():
+    transport = ReplayTransport(page_size=500)
+    with Session(idle_timeout=0, transport=transport) as ctx:
+        ticker = Ticker(ctx, "MOEX")
+        assert len(await rollup(ticker.candles("5min", latest=3))) == 3
+        for period, count in (("1min", 700), ("5min", 500), ("1h", 100), ("1D", 15)):
+            transport.requests.clear()
+            data = await rollup(ticker.candles(period, latest=count))
+            assert len(data) == count and all(a["begin"] > b["begin"] for a, b in zip(data, data[1:]))
+            # Страниц запрашивается не больше, чем может понадобиться исходных свечей
+            assert len(transport.requests) <= -(-count * Timeframe.parse(period).ratio // 500)
+        futoi = await rollup(Asset(ctx, "SILV").futoi(latest=400))
+        assert len(futoi) == 800 and futoi[0]["tradetime"] > futoi[-1]["tradetime"]
+
+
+async def test_replay_session():
+    async with Session(idle_timeout=0, transport=ReplayTransport(), max_connections=4, keepalive_expiry=1) as ctx:
+        assert len(await rollup(Ticker(ctx, "MOEX").candles("1D", latest=5))) == 5
+    assert ctx.client.closed
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        assert await get_board(ctx, "stock", "shares", "TQBR")
+    await asyncio.sleep(0)
+    assert ctx.client.closed
+
+
+def test_replay_session_sync():
+    # Вне цикла событий пул соединений закрывается сразу при выходе из `with`
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        assert len(asyncio.run(rollup(Ticker(ctx, "MOEX").candles("1D", latest=5)))) == 5
+    assert ctx.client.closed
+
+
+def test_session_sync_keepalive():
+    # Соединения пула открыты в цикле `asyncio.run`, закрытом до выхода из `with`
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = json.dumps({"securities": {"columns": ["SECID"], "data": [["MOEX"]]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_port}/iss"
+        with Session(None, base_url, idle_timeout=0, transport=httpx.AsyncHTTPTransport()) as ctx:
+            rows = asyncio.run(rollup(ctx.client.request("securities.json", "securities", start=-1)))
+            assert rows == [{"SECID": "MOEX"}]
+        assert ctx.client.closed
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+async def test_replay_compact():
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        ticker, silv = Ticker(ctx, "MOEX"), Asset(ctx, "SILV")
+        for period in ("10min", "30min"):
+            candles = await rollup(ticker.candles(period, begin="2026-02-16", end="2026-02-17"))
+            compact = await rollup(ticker.candles(period, begin="2026-02-16", end="2026-02-17", compact=True))
+            assert compact == candles and isinstance(compact[0], CandleRecord)
+        latest = await rollup(ticker.candles("1h", latest=3, compact=True))
+        assert len(latest) == 3 and latest[0].shared is latest[-1].shared
+        futoi = await rollup(silv.futoi(begin="2026-02-02", end="2026-02-03"))
+        assert await rollup(silv.futoi(begin="2026-02-02", end="2026-02-03", compact=True)) == futoi
+
+
+async def test_replay_frames(replay, monkeypatch):
+    pytest.importorskip("pandas")
+    from moexsrc.dataframes import Market as FrameMarket, block_arrays, frame, frames, record_blocks
+
+    with Session(idle_timeout=0, transport=ReplayTransport()) as ctx:
+        ticker = Ticker(ctx, "MOEX")
+        candles = await rollup(ticker.candles("15min", begin="2026-02-16", end="2026-02-17"))
+        df = await frame(ticker.candle_batches("15min", begin="2026-02-16", end="2026-02-17"), float32=True)
+        assert len(df) == len(candles) and str(df["secid"].dtype) == "category"
+        assert str(df["begin"].dtype) == "datetime64[s]" and str(df["close"].dtype) == "float32"
+        assert df["begin"].iloc[0].to_pydatetime() == candles[0]["begin"] and df["volume"].sum() == sum(
+            candle["volume"] for candle in candles
+        )
+        chunks = await rollup(frames(record_blocks(puffup(candles), 50)))
+        assert [len(chunk) for chunk in chunks] == [50, 50, 12]
+        arrays = block_arrays(Block.from_records(candles[:2]))
+        assert list(arrays["period"]) == ["15min", "15min"]
+
+    snapshot = await FrameMarket("eq").snapshot("LAST")
+    assert list(snapshot.index) == list(SHARES) and list(snapshot.columns) == ["last"]
+
+    async def empty(self, *columns):
+        return Snapshot()
+
+    # Пустая доска дает пустую таблицу, а не KeyError
+    monkeypatch.setattr(moexsrc.markets.Market, "snapshot", empty)
+    snapshot = await FrameMarket("eq").snapshot("LAST")
+    assert snapshot.empty and snapshot.index.name == "secid"
@@ -0,0 +1,36 @@
+import httpx
+import pytest
+
+from moexsrc.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, retrying
+
+
+async def test_retrying():
+    calls = list()
+    request = httpx.Request("GET", "https://iss.moex.com/iss/securities.json")
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ReadTimeout("timeout", request=request)
+        if len(calls) == 2:
+            raise httpx.HTTPStatusError("503", request=request, response=httpx.Response(503, request=request))
+        return "ok"
+
+    assert await retrying(RetryPolicy(backoff=0.001), flaky) == "ok" and len(calls) == 3
+
+    async def not_found():
+        calls.append(1)
+        raise httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+
+    calls.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        await retrying(RetryPolicy(backoff=0.001), not_found)
+    assert len(calls) == 1
+
+    calls.clear()
+    breaker = CircuitBreaker(threshold=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        await retrying(RetryPolicy(attempts=2, backoff=0.001), flaky, breaker)
+    calls.clear()
+    with pytest.raises(CircuitOpenError):
+        await retrying(RetryPolicy(backoff=0.001), flaky, breaker)
@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+
+from moexsrc.issclient import ISSClientError
+from moexsrc.scheduler import Scheduler
+from moexsrc.session import SessionCtx
+from moexsrc.tickers import Ticker
+from moexsrc.types import Period
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = list()
+        self.failures = 0  # сколько запросов подряд завершатся ошибкой
+
+    async def request(self, path, section, **params):
+        if self.failures:
+            self.failures -= 1
+            raise httpx.ConnectError("ISS is unavailable")
+        if section == "securities":
+            return
+        self.calls.append((path, params.get("securities")))
+        for secid in ("GAZP", "MOEX", "SBER"):
+            yield dict(SECID=secid, LAST=100.0, BID=99.0, OFFER=101.0)
+
+    async def get_security(self, secid):
+        return None
+
+
+def make_ticker(ctx, secid, boardid="TQBR"):
+    ticker = Ticker(ctx, secid)
+    ticker._desc.update(engine="stock", market="shares", boardid=boardid)
+    return ticker
+
+
+async def test_scheduler():
+    client = FakeClient()
+    ctx = SessionCtx(client)
+    scheduler = Scheduler(ctx, lag=0)
+    moex = scheduler.subscribe(make_ticker(ctx, "MOEX"), "1min")
+    sber = scheduler.subscribe(make_ticker(ctx, "SBER"), "5min")
+    futures = scheduler.subscribe(make_ticker(ctx, "SiZ6", "RFUD"), "1min")
+    for subscription in (moex, sber, futures):
+        subscription.due = scheduler._now()
+    await scheduler.tick()
+
+    # Подписки одной доски сведены в один запрос
+    assert len(client.calls) == 2
+    assert ("engines/stock/markets/shares/boards/TQBR/securities.json", "MOEX,SBER") in client.calls
+    row = await asyncio.wait_for(anext(moex), 1)
+    assert row["secid"] == "MOEX" and row["last"] == 100.0 and row["period"] is Period.ONE_MINUTE
+    assert (await anext(sber))["secid"] == "SBER"
+    assert futures._queue.empty()
+    assert all(item.due > scheduler._now() for item in (moex, sber, futures))
+
+    moex.cancel()
+    assert [item async for item in moex] == []
+    assert scheduler.subscriptions == [sber, futures]
+
+
+async def test_scheduler_run():
+    client = FakeClient()
+    ctx = SessionCtx(client)
+    async with Scheduler(ctx, lag=0) as scheduler:
+        moex = scheduler.subscribe(make_ticker(ctx, "MOEX"), "1min")
+        moex.due = scheduler._now()
+        scheduler.subscribe(make_ticker(ctx, "SBER"), "1min")
+        assert (await asyncio.wait_for(anext(moex), 1))["secid"] == "MOEX"
+        assert client.calls == [("engines/stock/markets/shares/boards/TQBR/securities.json", "MOEX")]
+    assert [item async for item in moex] == []
+
+
+async def test_scheduler_failure():
+    client = FakeClient()
+    ctx = SessionCtx(client)
+    scheduler = Scheduler(ctx, lag=0)
+    moex = scheduler.subscribe(make_ticker(ctx, "MOEX"), "1min")
+    # Ошибка опроса доходит до подписчика, подписка сохраняется и следующий опрос проходит
+    client.failures, moex.due = 1, scheduler._now()
+    await scheduler.tick()
+    with pytest.raises(httpx.ConnectError):
+        await asyncio.wait_for(anext(moex), 1)
+    assert scheduler.subscriptions == [moex] and moex.due > scheduler._now()
+    moex.due = scheduler._now()
+    await scheduler.tick()
+    assert (await asyncio.wait_for(anext(moex), 1))["secid"] == "MOEX"
+
+    # Ошибка разрешения одного инструмента не задевает остальные
+    broken = scheduler.subscribe(Ticker(ctx, "SBER"), "1min")
+    client.failures, moex.due, broken.due = 2, scheduler._now(), scheduler._now()
+    await scheduler.tick()
+    with pytest.raises(httpx.ConnectError):
+        await asyncio.wait_for(anext(broken), 1)
+    assert (await asyncio.wait_for(anext(moex), 1))["secid"] == "MOEX"
+    assert scheduler.subscriptions == [moex, broken]
+
+    # Подписка на неизвестный инструмент отменяется
+    broken.due = scheduler._now()
+    await scheduler.tick()
+    with pytest.raises(ISSClientError):
+        await asyncio.wait_for(anext(broken), 1)
+    assert [item async for item in broken] == [] and scheduler.subscriptions == [moex]
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from moexsrc.throttle import RateLimiter, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None and parse_retry_after("soon") is None
+
+
+async def test_rate_limiter():
+    limiter = RateLimiter(50)
+    started = time.monotonic()
+    for _ in range(11):
+        await limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+    limiter.feedback(429, "0")
+    assert limiter.rate == 25
+    # "Retry-After: 0" снижает частоту, но не приостанавливает запросы
+    assert await limiter.acquire() <= 1 / 25
+    limiter.feedback(200)
+    assert 25 < limiter.rate <= 50
+
+
+async def test_rate_limiter_backoff():
+    limiter = RateLimiter(100)
+    started = time.monotonic()
+    released = list()
+
+    async def request():
+        await limiter.acquire()
+        released.append(time.monotonic() - started)
+
+    tasks = [asyncio.create_task(request()) for _ in range(12)]
+    await asyncio.sleep(0.005)
+    limiter.feedback(429, "1")
+    await asyncio.gather(*tasks)
+    # Ожидавшие запросы не начинаются разом по окончании паузы, а идут по сниженной вдвое частоте
+    after = sorted(moment for moment in released if moment >= 1)
+    assert len(after) == 11 and all(b - a >= 0.01 for a, b in zip(after, after[1:]))
+    assert after[-1] - after[0] >= 10 / 50 * 0.9
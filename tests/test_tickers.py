@@ -1,4 +1,4 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 import pytest
 from moexsrc.tickers import Ticker
@@ -78,3 +78,25 @@ async def test_tickers_resampled_latest_candles(token, check_candle_fields):
         assert (data[0]["begin"] - data[1]["begin"]).total_seconds() == 5 * 60
         assert data[0]["begin"] > data[-1]["begin"]
         assert check_candle_fields(data[0])
+
+
+async def test_tickers_candle_batches(token):
+    with Session(token) as ctx:
+        ticker = Ticker(ctx, "IMOEXF")
+        for period in (Period.ONE_MINUTE, Period.FIVE_MINUTES):
+            data = await rollup(ticker.candles(period, begin="2026-02-20", end="2026-02-20"))
+            blocks = await rollup(ticker.candle_batches(period, begin="2026-02-20", end="2026-02-20"))
+            assert blocks and sum(block.nrows for block in blocks) == len(data)
+            assert [item["begin"] for block in blocks for item in block.records()] == [item["begin"] for item in data]
+
+
+async def test_tickers_watch_candles(token, check_candle_fields):
+    with Session(token) as ctx:
+        ticker = Ticker(ctx, "IMOEXF")
+        data = list()
+        async for item in ticker.watch_candles(Period.ONE_HOUR, begin=date.today() - timedelta(days=7)):
+            data.append(item)
+            if len(data) >= 3:
+                break
+        assert check_candle_fields(data[0])
+        assert data[0]["begin"] < data[1]["begin"] < data[2]["begin"]